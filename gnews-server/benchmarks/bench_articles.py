@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: upstream articles kept as nested dicts vs compact Articles
+
+Builds synthetic GNews response bodies (100 articles per page, drawn from a
+few hundred sources) and measures, for the old handling (response.json()
+into dicts) and the compact model from articles.py:
+- decode time per page
+- memory retained while holding all decoded articles (tracemalloc)
+- time to shape a full-detail tool response and to encode a page for the
+  disk cache, where compact articles are expanded
+
+Usage: python benchmarks/bench_articles.py [articles]
+"""
+
+import gc
+import sys
+import json
+import time
+import random
+import statistics
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from gnews_server.articles import decode_response, encode_response, orjson
+from gnews_server.projection import shape_response
+
+
+PAGE_SIZE = 100
+SOURCES = 300
+
+
+def make_pages(total: int) -> list:
+    """Upstream response bodies holding `total` articles"""
+    rng = random.Random(7)
+    words = [f"word{i}" for i in range(5000)]
+
+    def text(count: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(count))
+
+    pages = []
+    for start in range(0, total, PAGE_SIZE):
+        articles = []
+        for i in range(start, min(total, start + PAGE_SIZE)):
+            source = rng.randrange(SOURCES)
+            articles.append({
+                "title": text(10),
+                "description": text(25),
+                "content": text(35) + " ... [2048 chars]",
+                "url": f"https://news{source}.example.com/2025/01/01/story-{i}",
+                "image": f"https://cdn.news{source}.example.com/images/{i}.jpg",
+                "publishedAt": f"2025-01-01T{i % 24:02d}:{i % 60:02d}:00Z",
+                "source": {"name": f"News Source {source}", "url": f"https://news{source}.example.com"},
+            })
+        pages.append(json.dumps({"totalArticles": total, "articles": articles}).encode("utf-8"))
+    return pages
+
+
+def time_decode(label: str, decode, pages: list, rounds: int = 5) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for body in pages:
+            decode(body)
+        samples.append((time.perf_counter() - start) / len(pages))
+    best = min(samples) * 1000
+    print(f"{label:<26} {best:7.3f}ms per page of {PAGE_SIZE}  (median {statistics.median(samples) * 1000:.3f}ms)")
+    return best
+
+
+def retained(decode, pages: list) -> int:
+    """Bytes still allocated while every decoded page is held"""
+    gc.collect()
+    tracemalloc.start()
+    held = [decode(body) for body in pages]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return size
+
+
+def time_call(fn, rounds: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    pages = make_pages(total)
+    print(f"📊 {total} articles in {len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB of JSON "
+          f"(orjson {'installed' if orjson is not None else 'not installed'})")
+
+    def as_dicts(body):
+        # What response.json() did before: the stdlib decoder into nested dicts
+        return json.loads(body)
+
+    print("\nDecode")
+    dict_time = time_decode("dicts (json.loads)", as_dicts, pages)
+    if orjson is not None:
+        time_decode("dicts (orjson.loads)", orjson.loads, pages)
+    compact_time = time_decode("compact Articles", decode_response, pages)
+    print(f"{'compact vs json.loads':<26} {dict_time / compact_time:7.2f}x")
+
+    print("\nRetained memory")
+    dict_bytes = retained(as_dicts, pages)
+    compact_bytes = retained(decode_response, pages)
+    print(f"{'dicts':<26} {dict_bytes / 1e6:7.1f} MB  ({dict_bytes / total:.0f} B per article)")
+    print(f"{'compact Articles':<26} {compact_bytes / 1e6:7.1f} MB  ({compact_bytes / total:.0f} B per article)")
+    print(f"{'saved':<26} {100 - compact_bytes * 100 / dict_bytes:7.1f}%")
+
+    print("\nEncoding back (one page)")
+    dict_page, compact_page = as_dicts(pages[0]), decode_response(pages[0])
+    for label, page in (("dicts", dict_page), ("compact Articles", compact_page)):
+        shaped = time_call(lambda: shape_response(page))
+        stored = time_call(lambda: encode_response(page))
+        print(f"{label:<26} shape {shaped:6.3f}ms  disk-cache encode {stored:6.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call httpx client vs the shared pooled client
+
+Compares the old make_gnews_request behaviour (a new AsyncClient per call)
+with the shared client from http_client.py, against a local GNews stand-in.
+
+Usage: python benchmarks/bench_http_client.py [calls]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault("GNEWS_API_KEY", "benchmark-key")
+# Measure the transport, not the response cache or the rate limiter
+os.environ["GNEWS_CACHE_ENABLED"] = "0"
+os.environ["GNEWS_RATE_LIMIT_RPS"] = "0"
+os.environ["GNEWS_DAILY_QUOTA"] = "0"
+
+import httpx
+
+from gnews_server import http_client
+from gnews_server.server import make_gnews_request
+from fake_gnews import FakeGNewsServer
+
+
+def summarize(label: str, samples: list) -> None:
+    """Print latency statistics in milliseconds"""
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(f"{label:<22} mean={statistics.mean(ms):7.2f}ms  p50={statistics.median(ms):7.2f}ms  p95={p95:7.2f}ms")
+
+
+async def per_call_client(base_url: str, calls: int) -> list:
+    """Old behaviour: build and tear down a client for every request"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{base_url}/top-headlines", params={"category": "general", "apikey": "x"})
+            response.json()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def shared_client(calls: int) -> list:
+    """New behaviour: make_gnews_request on the shared pooled client"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await make_gnews_request("top-headlines", {"category": "general"})
+        samples.append(time.perf_counter() - start)
+    await http_client.close_client()
+    return samples
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with FakeGNewsServer() as server:
+        os.environ["GNEWS_BASE_URL"] = server.base_url
+        print(f"📊 {calls} sequential calls against {server.base_url}")
+        summarize("per-call client", asyncio.run(per_call_client(server.base_url, calls)))
+        summarize("shared pooled client", asyncio.run(shared_client(calls)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark and regression check for the stdio entry point.
+
+Launches the server the way a desktop client does, as a fresh process per
+session speaking MCP over stdio. Each launch measures:
+- time to the initialize response
+- time to the first tools/list response
+- time to the first tools/call result (against the local GNews stand-in)
+
+Launches are measured with the fast-start snapshot (fast) and without it
+(full), along with the bare import time of each entry module. Results are
+written as JSON. --compare fails on a regression beyond --threshold, and
+--max-list-tools-ms sets an absolute budget for the fast path.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --compare benchmarks/results/startup-baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_gnews import FakeGNewsServer
+
+
+SERVER_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Measurements where a higher value is a regression
+CHECKED = ["fast_initialize_ms", "fast_list_tools_ms", "fast_first_call_ms", "fast_import_ms"]
+
+
+def import_ms(module: str, runs: int) -> float:
+    """Best-of-N wall time of a fresh interpreter importing `module`"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=SERVER_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def launch(env: dict) -> dict:
+    """Run one stdio session and time each step from process start"""
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, str(SERVER_DIR / "fast_start.py")], cwd=SERVER_DIR, env=env,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def send(message: dict) -> None:
+        server.stdin.write((json.dumps(message) + "\n").encode())
+        server.stdin.flush()
+
+    def receive(request_id: int) -> dict:
+        while True:
+            line = server.stdout.readline()
+            if not line:
+                raise RuntimeError("Server exited during the session")
+            message = json.loads(line)
+            if message.get("id") == request_id and "method" not in message:
+                return message
+
+    try:
+        send({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2025-06-18", "capabilities": {},
+            "clientInfo": {"name": "bench-startup", "version": "1.0"},
+        }})
+        receive(1)
+        initialized = time.perf_counter()
+        send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        tools = receive(2)["result"]["tools"]
+        listed = time.perf_counter()
+        send({"jsonrpc": "2.0", "id": 3, "method": "tools/call",
+              "params": {"name": "search_news", "arguments": {"q": "startup", "max_articles": 5}}})
+        result = receive(3)["result"]
+        called = time.perf_counter()
+        if result.get("isError"):
+            raise RuntimeError(f"tools/call failed: {result}")
+    finally:
+        server.stdin.close()
+        server.terminate()
+        server.wait(timeout=10)
+
+    return {
+        "initialize_ms": (initialized - start) * 1000,
+        "list_tools_ms": (listed - start) * 1000,
+        "first_call_ms": (called - start) * 1000,
+        "tools": len(tools),
+    }
+
+
+def measure(env: dict, runs: int) -> dict:
+    samples = [launch(env) for _ in range(runs)]
+    return {
+        key: round(statistics.median(sample[key] for sample in samples), 1)
+        for key in ("initialize_ms", "list_tools_ms", "first_call_ms")
+    } | {"tools": samples[0]["tools"]}
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    regressions = []
+    for metric in CHECKED:
+        new, old = current.get(metric), baseline.get(metric)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        worse = change > threshold
+        print(f"{'❌' if worse else '✅'} {metric:<24} {old:>10} -> {new:>10} ({change:+.1%})")
+        if worse:
+            regressions.append(f"{metric} {change:+.1%}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure stdio startup and check for regressions")
+    parser.add_argument("--runs", type=int, default=5, help="Launches per mode (median is reported)")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path, help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--max-list-tools-ms", type=float, help="Fail if the fast path lists tools slower than this")
+    args = parser.parse_args(argv)
+
+    subprocess.run([sys.executable, str(SERVER_DIR / "fast_start.py"), "--build"], cwd=SERVER_DIR, check=True,
+                   stderr=subprocess.DEVNULL)
+
+    with FakeGNewsServer() as upstream, tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "GNEWS_API_KEY": "startup-bench-key",
+            "GNEWS_BASE_URL": upstream.base_url,
+            "GNEWS_RATE_LIMIT_RPS": "0",
+            "GNEWS_DAILY_QUOTA": "0",
+            "GNEWS_CACHE_ENABLED": "0",
+            "GNEWS_ARTICLE_DB": str(Path(tmp) / "articles.db"),
+        }
+        fast = measure(env, args.runs)
+        full = measure({**env, "GNEWS_FAST_START": "0"}, args.runs)
+
+    results = {
+        "fast_import_ms": round(import_ms("fast_start", args.runs), 1),
+        "full_import_ms": round(import_ms("gnews_server.server", args.runs), 1),
+        **{f"fast_{key}": value for key, value in fast.items() if key != "tools"},
+        **{f"full_{key}": value for key, value in full.items() if key != "tools"},
+        "tools": fast["tools"],
+    }
+    results["list_tools_speedup"] = round(results["full_list_tools_ms"] / results["fast_list_tools_ms"], 2)
+
+    for key, value in results.items():
+        print(f"   {key:<24} {value}")
+
+    output = args.output or RESULTS_DIR / f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "results": results,
+    }, indent=2))
+    print(f"💾 Results written to {output}")
+
+    failed = False
+    if args.max_list_tools_ms and results["fast_list_tools_ms"] > args.max_list_tools_ms:
+        print(f"❌ Fast path listed tools in {results['fast_list_tools_ms']}ms, budget {args.max_list_tools_ms}ms")
+        failed = True
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        print(f"\n🔍 Comparing against {args.compare}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Startup regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            failed = True
+    if not failed:
+        print("\n✅ Startup within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the GNews API used by the benchmarks.
+
+Serves /search and /top-headlines with generated articles so the server can
+be exercised without an API key or network access. Latency, error rate and
+payload size are configurable, and /__stats reports how many upstream
+requests were received.
+
+Usage: python benchmarks/fake_gnews.py [--port 8100] [--latency-ms 50] [--error-rate 0.01]
+"""
+
+import random
+import socket
+import asyncio
+import argparse
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def make_articles(count: int, prefix: str = "Article", offset: int = 0, content_chars: int = 500) -> list:
+    """Build a list of GNews-shaped article dicts"""
+    slug = "-".join(prefix.lower().split()) or "article"
+    filler = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (content_chars // 56 + 1))[:content_chars]
+    return [
+        {
+            "title": f"{prefix} {i}",
+            "description": f"Description for {prefix.lower()} {i}",
+            "content": f"{prefix} {i}. {filler}",
+            "url": f"https://example.com/{slug}/{i}",
+            "image": f"https://example.com/{slug}/{i}.jpg",
+            "publishedAt": "2025-01-01T00:00:00Z",
+            "source": {"name": "Example News", "url": "https://example.com"},
+        }
+        for i in range(offset, offset + count)
+    ]
+
+
+def create_app(
+    total_articles: int = 500,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    content_chars: int = 500,
+) -> Starlette:
+    """Create the stand-in ASGI app serving `total_articles` results per query"""
+    stats = Counter()
+
+    async def articles(request: Request) -> JSONResponse:
+        endpoint = request.url.path.strip("/")
+        stats["requests"] += 1
+        stats[endpoint] += 1
+
+        delay = latency_ms + random.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"errors": ["Simulated upstream failure"]}, status_code=500)
+
+        page_size = int(request.query_params.get("max", 10))
+        page = int(request.query_params.get("page", 1))
+        prefix = request.query_params.get("q") or request.query_params.get("category") or "Article"
+        offset = (page - 1) * page_size
+        count = max(0, min(page_size, total_articles - offset))
+        return JSONResponse({
+            "totalArticles": total_articles,
+            "articles": make_articles(count, prefix=prefix, offset=offset, content_chars=content_chars),
+        })
+
+    async def report(request: Request) -> JSONResponse:
+        return JSONResponse(dict(stats))
+
+    app = Starlette(routes=[
+        Route("/search", articles),
+        Route("/top-headlines", articles),
+        Route("/__stats", report),
+    ])
+    app.state.stats = stats
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeGNewsServer:
+    """Run the stand-in app with uvicorn in a background thread"""
+
+    def __init__(self, port: Optional[int] = None, total_articles: int = 500, **options):
+        self.port = port or _free_port()
+        self.app = create_app(total_articles, **options)
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def stats(self) -> Counter:
+        return self.app.state.stats
+
+    def __enter__(self) -> "FakeGNewsServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local GNews API stand-in")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--total-articles", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--content-chars", type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app(args.total_articles, args.latency_ms, args.jitter_ms, args.error_rate, args.content_chars)
+    print(f"🛰️  Fake GNews API on http://127.0.0.1:{args.port}")
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
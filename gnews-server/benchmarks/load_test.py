@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the GNews MCP server
+
+Runs main.py over streamable-http against the local GNews stand-in, drives
+concurrent MCP client sessions, and reports:
+- p50/p95/p99 tool latency and throughput
+- upstream calls per tool call
+- server RSS (current and peak)
+
+Results are written as JSON so runs can be compared for regressions.
+
+Usage:
+    python benchmarks/load_test.py --sessions 8 --calls 50 --latency-ms 50
+    python benchmarks/load_test.py --compare benchmarks/results/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_gnews import FakeGNewsServer, _free_port
+
+
+SERVER_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+
+CATEGORIES = ["general", "world", "business", "technology", "sports", "science", "health"]
+
+# Metrics where a higher value is a regression
+LOWER_IS_BETTER = ["p50_ms", "p95_ms", "p99_ms", "upstream_calls_per_tool_call", "peak_rss_mb"]
+HIGHER_IS_BETTER = ["throughput_per_s"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def read_rss_mb(pid: int) -> dict:
+    """Current and peak resident memory of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+        return {
+            "rss_mb": int(fields["VmRSS"].split()[0]) / 1024,
+            "peak_rss_mb": int(fields["VmHWM"].split()[0]) / 1024,
+        }
+    except (OSError, KeyError, ValueError):
+        return {"rss_mb": None, "peak_rss_mb": None}
+
+
+def wait_for_port(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"Server did not start listening on port {port}")
+
+
+def pick_call(rng: random.Random, query_pool: int, headline_ratio: float) -> tuple:
+    """Choose the next tool call from the workload mix"""
+    if rng.random() < headline_ratio:
+        return "get_top_headlines", {"category": rng.choice(CATEGORIES), "country": "us", "max_articles": 10}
+    return "search_news", {"q": f"topic {rng.randrange(query_pool)}", "lang": "en", "max_articles": 10}
+
+
+async def run_session(url: str, calls: int, seed: int, args, latencies: List[float], failures: List[str]) -> None:
+    """One MCP client session issuing `calls` sequential tool calls"""
+    rng = random.Random(seed)
+    async with streamablehttp_client(url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for _ in range(calls):
+                name, arguments = pick_call(rng, args.query_pool, args.headline_ratio)
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(name, arguments)
+                    failed = result.isError or '"success": false' in (result.content[0].text if result.content else "")
+                except Exception as e:
+                    failed = True
+                    failures.append(str(e))
+                latencies.append(time.perf_counter() - start)
+                if failed:
+                    failures.append(name)
+
+
+async def drive(url: str, args, server_pid: int) -> dict:
+    latencies: List[float] = []
+    failures: List[str] = []
+    peak = {"peak_rss_mb": 0.0}
+
+    async def sample_rss():
+        while True:
+            sample = read_rss_mb(server_pid)
+            if sample["peak_rss_mb"]:
+                peak.update(sample)
+            await asyncio.sleep(0.25)
+
+    sampler = asyncio.create_task(sample_rss())
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(url, args.calls, args.seed + i, args, latencies, failures)
+        for i in range(args.sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+
+    ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "tool_calls": len(latencies),
+        "failed_calls": len(failures),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.mean(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+        **{key: round(value, 1) if value else value for key, value in read_rss_mb(server_pid).items()},
+        "peak_rss_mb": round(peak["peak_rss_mb"], 1) if peak["peak_rss_mb"] else None,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Return a description of every metric that regressed beyond `threshold`"""
+    regressions = []
+    for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+        new, old = current.get(metric), baseline.get(metric)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        worse = change > threshold if metric in LOWER_IS_BETTER else change < -threshold
+        marker = "❌" if worse else "✅"
+        print(f"{marker} {metric:<30} {old:>10} -> {new:>10} ({change:+.1%})")
+        if worse:
+            regressions.append(f"{metric} {change:+.1%}")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline load test for the GNews MCP server")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent MCP client sessions")
+    parser.add_argument("--calls", type=int, default=50, help="Tool calls per session")
+    parser.add_argument("--query-pool", type=int, default=20, help="Distinct search queries in the workload")
+    parser.add_argument("--headline-ratio", type=float, default=0.3, help="Share of calls that are get_top_headlines")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Upstream latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream requests that fail")
+    parser.add_argument("--content-chars", type=int, default=500, help="Characters of content per article")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], help="Extra server environment, KEY=VALUE")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    upstream_options = {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "content_chars": args.content_chars,
+    }
+
+    with FakeGNewsServer(**upstream_options) as upstream, tempfile.TemporaryDirectory() as tmp:
+        port = _free_port()
+        env = {
+            **os.environ,
+            "GNEWS_API_KEY": "load-test-key",
+            "GNEWS_BASE_URL": upstream.base_url,
+            "GNEWS_SERVER_PORT": str(port),
+            "GNEWS_RATE_LIMIT_RPS": "0",
+            "GNEWS_DAILY_QUOTA": "0",
+            "GNEWS_ARTICLE_DB": str(Path(tmp) / "articles.db"),
+        }
+        env.update(item.split("=", 1) for item in args.env)
+
+        log_path = Path(tmp) / "server.log"
+        with open(log_path, "w") as log:
+            server = subprocess.Popen([sys.executable, str(SERVER_DIR / "main.py")], env=env, stdout=log, stderr=log)
+            try:
+                wait_for_port(port)
+                print(f"📊 {args.sessions} sessions x {args.calls} calls, upstream latency {args.latency_ms}ms")
+                results = asyncio.run(drive(f"http://localhost:{port}/mcp", args, server.pid))
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+        upstream_calls = upstream.stats["requests"]
+        results["upstream_calls"] = upstream_calls
+        results["upstream_calls_per_tool_call"] = round(upstream_calls / results["tool_calls"], 4) if results["tool_calls"] else 0.0
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()},
+        "results": results,
+    }
+
+    for key, value in results.items():
+        print(f"   {key:<30} {value}")
+
+    output = args.output or RESULTS_DIR / f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"💾 Results written to {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        print(f"\n🔍 Comparing against {args.compare}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,7 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 # Set example API key (replace with your actual key)
 os.environ["GNEWS_API_KEY"] = "your_api_key_here"
 
-from main import search_news, get_top_headlines
+from gnews_server.server import search_news, get_top_headlines
 
 
 async def example_search():
@@ -37,9 +37,10 @@ async def example_search():
             print("\nTop articles:")
             for i, article in enumerate(result["articles"][:3], 1):
                 print(f"\n{i}. {article['title']}")
-                print(f"   Source: {article['source']['name']}")
+                print(f"   Source: {article['source']}")
                 print(f"   Published: {article['publishedAt']}")
                 print(f"   URL: {article['url']}")
+                print(f"   Full article: {article['uri']}")
         else:
             print(f"Search failed: {result['error']}")
             
@@ -64,7 +65,7 @@ async def example_headlines():
             print(f"\nTop {result['category']} headlines:")
             for i, article in enumerate(result["articles"], 1):
                 print(f"\n{i}. {article['title']}")
-                print(f"   Source: {article['source']['name']}")
+                print(f"   Source: {article['source']}")
                 print(f"   Published: {article['publishedAt']}")
         else:
             print(f"Headlines failed: {result['error']}")
@@ -83,7 +84,8 @@ async def example_complex_search():
             q='(Tesla OR "electric vehicle") AND NOT "stock price"',
             lang="en",
             max=3,
-            sortby="relevance"
+            sortby="relevance",
+            detail="full"
         )
         
         if result["success"]:
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Fast-start stdio entry point for desktop launches.
+
+Desktop clients start a fresh server process per session. They then wait
+for initialize and the tools/resources/prompts listings before the user can
+do anything. Importing the MCP SDK and gnews_server.server takes most of a second.
+
+This entry point answers those first requests from a precomputed snapshot
+using only the standard library. The snapshot holds the tool schemas,
+including the long Field descriptions built from the supported language and
+country tables. Meanwhile the server is imported in a background thread. The
+first request the snapshot cannot answer (usually tools/call) hands the
+session over to the full FastMCP server. The recorded initialize handshake
+is replayed to it, so the session is set up exactly as if it had been there
+from the start.
+
+The snapshot lives in data/startup_snapshot.json and carries a fingerprint
+of the files that define the tools. If it is missing or stale, the server
+starts the slow way and writes a fresh one. Build it ahead of time with:
+
+    python fast_start.py --build
+
+Set GNEWS_FAST_START=0 to always start the full server.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import threading
+from io import TextIOWrapper
+from pathlib import Path
+from typing import List, Optional
+
+
+SERVER_DIR = Path(__file__).parent
+SNAPSHOT_PATH = SERVER_DIR / "data" / "startup_snapshot.json"
+
+# Files whose contents determine the tool, resource and prompt listings
+FINGERPRINT_FILES = ("gnews_server/server.py", "gnews_server/projection.py")
+
+# Listings answered from the snapshot, by JSON-RPC method
+SNAPSHOT_METHODS = {
+    "tools/list": "tools",
+    "resources/list": "resources",
+    "resources/templates/list": "resource_templates",
+    "prompts/list": "prompts",
+}
+
+
+def fingerprint() -> str:
+    digest = hashlib.sha256()
+    for name in FINGERPRINT_FILES:
+        digest.update((SERVER_DIR / name).read_bytes())
+    return digest.hexdigest()
+
+
+def load_snapshot() -> Optional[dict]:
+    """Return the snapshot if it exists and matches the current sources"""
+    try:
+        snapshot = json.loads(SNAPSHOT_PATH.read_text())
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("fingerprint") != fingerprint():
+        return None
+    return snapshot
+
+
+async def build_snapshot(server) -> dict:
+    """Capture the initialize result and static listings of a FastMCP server"""
+    from mcp.shared.version import LATEST_PROTOCOL_VERSION, SUPPORTED_PROTOCOL_VERSIONS
+
+    options = server._mcp_server.create_initialization_options()
+    server_info = {"name": options.server_name, "version": options.server_version}
+    if options.website_url:
+        server_info["websiteUrl"] = options.website_url
+
+    def dump(items) -> list:
+        return [item.model_dump(mode="json", by_alias=True, exclude_none=True) for item in items]
+
+    initialize = {
+        "capabilities": options.capabilities.model_dump(mode="json", by_alias=True, exclude_none=True),
+        "serverInfo": server_info,
+    }
+    if options.instructions:
+        initialize["instructions"] = options.instructions
+
+    return {
+        "fingerprint": fingerprint(),
+        "latest_protocol_version": LATEST_PROTOCOL_VERSION,
+        "supported_protocol_versions": list(SUPPORTED_PROTOCOL_VERSIONS),
+        "initialize": initialize,
+        "tools": {"tools": dump(await server.list_tools())},
+        "resources": {"resources": dump(await server.list_resources())},
+        "resource_templates": {"resourceTemplates": dump(await server.list_resource_templates())},
+        "prompts": {"prompts": dump(await server.list_prompts())},
+    }
+
+
+def write_snapshot(snapshot: dict) -> None:
+    SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = SNAPSHOT_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(snapshot))
+    os.replace(tmp, SNAPSHOT_PATH)
+
+
+class _ReplayStdin:
+    """Async line iterator yielding the replayed lines, then the rest of stdin"""
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+
+    async def __aiter__(self):
+        import anyio
+
+        for line in self.lines:
+            yield line
+        async for line in anyio.wrap_file(TextIOWrapper(sys.stdin.buffer, encoding="utf-8")):
+            yield line
+
+
+class _DropReplayedResponse:
+    """Stdout writer that swallows the full server's answer to the replayed initialize"""
+
+    def __init__(self, request_id):
+        import anyio
+
+        self.request_id = request_id
+        self.dropped = request_id is None
+        self.stdout = anyio.wrap_file(TextIOWrapper(sys.stdout.buffer, encoding="utf-8"))
+
+    async def write(self, data: str) -> None:
+        if not self.dropped:
+            message = json.loads(data)
+            if message.get("id") == self.request_id and "method" not in message:
+                self.dropped = True
+                return
+        await self.stdout.write(data)
+
+    async def flush(self) -> None:
+        await self.stdout.flush()
+
+
+async def _serve_full(replay: List[str], initialize_id) -> None:
+    """Run the full server over stdio, starting with the replayed messages"""
+    from gnews_server import server as gnews
+    from mcp.server.stdio import stdio_server
+
+    gnews.configure_logging()
+    if load_snapshot() is None:
+        write_snapshot(await build_snapshot(gnews.mcp))
+
+    server = gnews.mcp._mcp_server
+    async with gnews.server_lifespan():
+        stdin = _ReplayStdin(replay) if replay else None
+        stdout = _DropReplayedResponse(initialize_id) if initialize_id is not None else None
+        async with stdio_server(stdin=stdin, stdout=stdout) as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+def _hand_over(replay: List[str], initialize_id, warmup: Optional[threading.Thread]) -> None:
+    if warmup is not None:
+        warmup.join()
+    import anyio
+
+    anyio.run(_serve_full, replay, initialize_id)
+
+
+def _send(message: dict) -> None:
+    sys.stdout.buffer.write(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+    sys.stdout.buffer.flush()
+
+
+def serve_fast(snapshot: dict) -> None:
+    """Answer startup requests from the snapshot until a real request arrives"""
+    replay: List[str] = []
+    initialize_id = None
+    warmup: Optional[threading.Thread] = None
+
+    while True:
+        raw = sys.stdin.buffer.readline()
+        if not raw:
+            return
+        line = raw.decode("utf-8")
+        try:
+            message = json.loads(line)
+        except ValueError:
+            message = {}
+        method = message.get("method")
+        request_id = message.get("id")
+
+        if method == "initialize" and initialize_id is None:
+            requested = (message.get("params") or {}).get("protocolVersion")
+            version = requested if requested in snapshot["supported_protocol_versions"] else snapshot["latest_protocol_version"]
+            _send({"jsonrpc": "2.0", "id": request_id, "result": {"protocolVersion": version, **snapshot["initialize"]}})
+            replay.append(line)
+            initialize_id = request_id
+            # Import the full server while the client reads the listings
+            warmup = threading.Thread(target=__import__, args=("gnews_server.server",), daemon=True)
+            warmup.start()
+        elif initialize_id is not None and request_id is not None and method == "ping":
+            _send({"jsonrpc": "2.0", "id": request_id, "result": {}})
+        elif initialize_id is not None and request_id is not None and method in SNAPSHOT_METHODS:
+            _send({"jsonrpc": "2.0", "id": request_id, "result": snapshot[SNAPSHOT_METHODS[method]]})
+        elif request_id is None and method is not None:
+            # Notifications (initialized, cancelled, ...) are replayed in order
+            replay.append(line)
+        else:
+            replay.append(line)
+            _hand_over(replay, initialize_id, warmup)
+            return
+
+
+def run() -> None:
+    """Serve MCP over stdio, from the snapshot when possible"""
+    snapshot = load_snapshot() if os.getenv("GNEWS_FAST_START", "1").strip().lower() not in ("0", "false", "no", "off") else None
+    if snapshot is None:
+        _hand_over([], None, None)
+    else:
+        serve_fast(snapshot)
+
+
+def build() -> None:
+    """Write the startup snapshot from the current sources"""
+    import anyio
+    from gnews_server import server as gnews
+
+    snapshot = anyio.run(build_snapshot, gnews.mcp)
+    write_snapshot(snapshot)
+    print(f"Wrote {SNAPSHOT_PATH} ({len(snapshot['tools']['tools'])} tools)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    if "--build" in sys.argv[1:]:
+        build()
+    else:
+        run()
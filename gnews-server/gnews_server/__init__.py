@@ -0,0 +1 @@
+"""GNews MCP server; the FastMCP instance and its tools are in gnews_server.server"""
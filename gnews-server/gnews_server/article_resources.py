@@ -0,0 +1,158 @@
+"""
+Fetched articles as MCP resources behind lightweight handles.
+
+search_news and get_top_headlines return a handle per article by default
+(id, resource URI, title, source name, publishedAt, URL) instead of the
+full article. The full article is kept here and served as the resource
+gnews://article/{id} when a client reads it. Most content is never read,
+so this keeps tool results small.
+
+Ids are derived from the article URL, so the same story gets the same URI
+across queries. The store is an LRU bounded by entry count and by the
+approximate size of the stored articles. Entries also expire after a TTL.
+An article that is not in memory, because it was evicted or because the
+handle came from another server process (serve.py --workers N), is read
+from the shared article store (see article_store.py). With the article
+store disabled, such an article has to be fetched again by repeating the
+search.
+
+Configuration (environment variables):
+- GNEWS_ARTICLE_RESOURCE_MAX_ENTRIES: articles kept (default 5000)
+- GNEWS_ARTICLE_RESOURCE_MAX_MB: approximate memory budget (default 64)
+- GNEWS_ARTICLE_RESOURCE_TTL: seconds an article stays readable (default 21600)
+"""
+
+import os
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from gnews_server.article_store import ArticleStore
+
+
+logger = logging.getLogger(__name__)
+
+URI_PREFIX = "gnews://article/"
+URI_TEMPLATE = URI_PREFIX + "{article_id}"
+
+
+def article_id(article: dict) -> str:
+    """Stable id for an article, from its URL (or title and date when it has none)"""
+    key = article.get("url") or f"{article.get('title')}|{article.get('publishedAt')}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _size(article: dict) -> int:
+    """Approximate memory held by an article, counted over its string values"""
+    size = 0
+    for value in article.values():
+        if isinstance(value, str):
+            size += len(value)
+        elif isinstance(value, dict):
+            size += _size(value)
+    return size + 200
+
+
+def make_handle(article: dict, resource_id: str) -> dict:
+    source = article.get("source")
+    return {
+        "id": resource_id,
+        "uri": URI_PREFIX + resource_id,
+        "title": article.get("title"),
+        "source": source.get("name") if isinstance(source, dict) else source,
+        "publishedAt": article.get("publishedAt"),
+        "url": article.get("url"),
+    }
+
+
+class ArticleResources:
+    """LRU of full articles addressed by id, bounded by count, size and age"""
+
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 21600.0,
+                 store: Optional[Callable[[], Optional["ArticleStore"]]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Returns the shared article store to read misses from, or None when it is disabled
+        self.store = store
+        self._entries: "OrderedDict[str, Tuple[float, int, dict]]" = OrderedDict()
+        self.bytes = 0
+        self.stored = 0
+        self.reads = 0
+        self.misses = 0
+        self.store_reads = 0
+        self.evictions = 0
+
+    def put(self, article: dict) -> dict:
+        """Keep the full article and return its handle"""
+        resource_id = article_id(article)
+        previous = self._entries.pop(resource_id, None)
+        if previous is not None:
+            self.bytes -= previous[1]
+        size = _size(article)
+        self._entries[resource_id] = (time.monotonic() + self.ttl, size, article)
+        self.bytes += size
+        self.stored += 1
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+        return make_handle(article, resource_id)
+
+    def put_many(self, articles: List[dict]) -> List[dict]:
+        return [self.put(article) for article in articles]
+
+    def get(self, resource_id: str) -> Optional[dict]:
+        entry = self._entries.get(resource_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[resource_id]
+                self.bytes -= entry[1]
+                self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(resource_id)
+        self.reads += 1
+        return entry[2]
+
+    async def read(self, resource_id: str) -> Optional[dict]:
+        """The article behind a handle, from memory or else from the shared article store"""
+        article = self.get(resource_id)
+        store = self.store() if article is None and self.store is not None else None
+        if store is not None:
+            article = await store.get(resource_id)
+            if article is not None:
+                self.store_reads += 1
+                self.put(article)
+        return article
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "stored": self.stored,
+            "reads": self.reads,
+            "misses": self.misses,
+            "store_reads": self.store_reads,
+            "evictions": self.evictions,
+        }
+
+
+_resources: Optional[ArticleResources] = None
+
+
+def get_article_resources() -> ArticleResources:
+    """Return the process-wide article resource store"""
+    global _resources
+    if _resources is None:
+        from gnews_server.article_store import get_article_store
+        _resources = ArticleResources(
+            max_entries=int(os.getenv("GNEWS_ARTICLE_RESOURCE_MAX_ENTRIES", 5000)),
+            max_bytes=int(float(os.getenv("GNEWS_ARTICLE_RESOURCE_MAX_MB", 64)) * 1024 * 1024),
+            ttl=float(os.getenv("GNEWS_ARTICLE_RESOURCE_TTL", 21600)),
+            store=get_article_store,
+        )
+    return _resources
@@ -0,0 +1,268 @@
+"""
+Local article store with a full-text index.
+
+Every article returned by the upstream API is persisted here, deduplicated
+by URL, together with the lang/country/category of the request that found
+it. An SQLite FTS5 index over title, description and content lets the
+local_search tool answer follow-up questions without an upstream call.
+Articles can also be looked up by their resource id, so a handle returned
+by one server process can be read from any other process sharing the file
+(see article_resources.py).
+
+Configuration (environment variables):
+- GNEWS_ARTICLE_STORE_ENABLED: set to "0" to disable the store (default enabled)
+- GNEWS_ARTICLE_DB: path of the SQLite file (default data/articles.db in the
+  gnews-server directory)
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional, Set
+
+from gnews_server.article_resources import article_id
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "articles.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT,
+    description TEXT,
+    content TEXT,
+    image TEXT,
+    published_at TEXT,
+    source_name TEXT,
+    source_url TEXT,
+    lang TEXT,
+    country TEXT,
+    category TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS article_ids (
+    resource_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at);
+CREATE INDEX IF NOT EXISTS articles_source_name ON articles (source_name COLLATE NOCASE);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, description, content, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, description, content)
+    VALUES (new.id, new.title, new.description, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+    VALUES ('delete', old.id, old.title, old.description, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE OF title, description, content ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+    VALUES ('delete', old.id, old.title, old.description, old.content);
+    INSERT INTO articles_fts (rowid, title, description, content)
+    VALUES (new.id, new.title, new.description, new.content);
+END;
+"""
+
+UPSERT = """
+INSERT INTO articles (
+    url, title, description, content, image, published_at, source_name,
+    source_url, lang, country, category, first_seen, last_seen
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url) DO UPDATE SET
+    title = excluded.title,
+    description = COALESCE(excluded.description, articles.description),
+    content = COALESCE(excluded.content, articles.content),
+    image = COALESCE(excluded.image, articles.image),
+    published_at = COALESCE(excluded.published_at, articles.published_at),
+    lang = COALESCE(excluded.lang, articles.lang),
+    country = COALESCE(excluded.country, articles.country),
+    category = COALESCE(excluded.category, articles.category),
+    last_seen = excluded.last_seen
+"""
+
+
+def _fts_literal(query: str) -> str:
+    """Quote every term so arbitrary user input is a valid FTS5 query"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+def _row_to_article(row: sqlite3.Row) -> dict:
+    """Convert a stored row back into the GNews article shape"""
+    return {
+        "title": row["title"],
+        "description": row["description"],
+        "content": row["content"],
+        "url": row["url"],
+        "image": row["image"],
+        "publishedAt": row["published_at"],
+        "source": {"name": row["source_name"], "url": row["source_url"]},
+        "lang": row["lang"],
+        "country": row["country"],
+        "category": row["category"],
+    }
+
+
+class ArticleStore:
+    """SQLite-backed article store; all I/O runs in a worker thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._pending: Set[asyncio.Task] = set()
+
+    def _ingest(self, articles: List[dict], lang: Optional[str], country: Optional[str],
+                category: Optional[str]) -> int:
+        now = time.time()
+        rows = []
+        ids = []
+        for article in articles:
+            url = article.get("url")
+            if not url:
+                continue
+            source = article.get("source") or {}
+            rows.append((
+                url, article.get("title"), article.get("description"), article.get("content"),
+                article.get("image"), article.get("publishedAt"), source.get("name"),
+                source.get("url"), lang, country, category, now, now,
+            ))
+            ids.append((article_id(article), url))
+        with self._lock:
+            self._conn.executemany(UPSERT, rows)
+            self._conn.executemany("INSERT OR IGNORE INTO article_ids (resource_id, url) VALUES (?, ?)", ids)
+            self._conn.commit()
+        return len(rows)
+
+    def _get(self, resource_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT a.* FROM article_ids i JOIN articles a ON a.url = i.url WHERE i.resource_id = ?",
+                (resource_id,),
+            ).fetchone()
+        return _row_to_article(row) if row is not None else None
+
+    def _search(self, q: Optional[str], date_from: Optional[str], date_to: Optional[str],
+                source: Optional[str], lang: Optional[str], country: Optional[str],
+                category: Optional[str], limit: int, sortby: str) -> List[dict]:
+        clauses = []
+        args: list = []
+        if date_from:
+            clauses.append("a.published_at >= ?")
+            args.append(date_from)
+        if date_to:
+            clauses.append("a.published_at <= ?")
+            args.append(date_to)
+        if source:
+            clauses.append("a.source_name = ? COLLATE NOCASE")
+            args.append(source)
+        for column, value in (("lang", lang), ("country", country), ("category", category)):
+            if value:
+                clauses.append(f"a.{column} = ?")
+                args.append(value)
+
+        if q:
+            where = " AND ".join(["articles_fts MATCH ?"] + clauses)
+            order = "bm25(articles_fts)" if sortby == "relevance" else "a.published_at DESC"
+            sql = (
+                "SELECT a.* FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+                f"WHERE {where} ORDER BY {order} LIMIT ?"
+            )
+            with self._lock:
+                try:
+                    rows = self._conn.execute(sql, [q, *args, limit]).fetchall()
+                except sqlite3.OperationalError:
+                    # Not valid FTS5 syntax; fall back to matching the plain terms
+                    rows = self._conn.execute(sql, [_fts_literal(q), *args, limit]).fetchall()
+        else:
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            sql = f"SELECT a.* FROM articles a {where} ORDER BY a.published_at DESC LIMIT ?"
+            with self._lock:
+                rows = self._conn.execute(sql, [*args, limit]).fetchall()
+        return [_row_to_article(row) for row in rows]
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    async def ingest(self, articles: List[dict], lang: Optional[str] = None,
+                     country: Optional[str] = None, category: Optional[str] = None) -> int:
+        """Upsert articles (deduplicated by URL) and update the index"""
+        return await asyncio.to_thread(self._ingest, articles, lang, country, category)
+
+    def ingest_later(self, articles: List[dict], **labels) -> None:
+        """Index articles in the background without delaying the caller"""
+        task = asyncio.create_task(self.ingest(articles, **labels))
+        self._pending.add(task)
+        task.add_done_callback(self._ingest_done)
+
+    def _ingest_done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to index articles: {task.exception()}")
+
+    async def search(self, q: Optional[str] = None, date_from: Optional[str] = None,
+                     date_to: Optional[str] = None, source: Optional[str] = None,
+                     lang: Optional[str] = None, country: Optional[str] = None,
+                     category: Optional[str] = None, limit: int = 10,
+                     sortby: str = "publishedAt") -> List[dict]:
+        """Query the local index"""
+        return await asyncio.to_thread(
+            self._search, q, date_from, date_to, source, lang, country, category, limit, sortby
+        )
+
+    async def get(self, resource_id: str) -> Optional[dict]:
+        """The stored article with this resource id (see article_resources.article_id)"""
+        return await asyncio.to_thread(self._get, resource_id)
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self._count)
+
+    async def flush(self) -> None:
+        """Wait for background indexing to finish"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[ArticleStore] = None
+
+
+def get_article_store() -> Optional[ArticleStore]:
+    """Return the process-wide article store, or None if it is disabled"""
+    global _store
+    if os.getenv("GNEWS_ARTICLE_STORE_ENABLED", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    if _store is None:
+        path = os.getenv("GNEWS_ARTICLE_DB") or str(DEFAULT_DB_PATH)
+        _store = ArticleStore(path)
+        logger.info(f"Article store opened at {path}")
+    return _store
+
+
+async def close_article_store() -> None:
+    """Finish pending indexing and close the store at server shutdown"""
+    global _store
+    if _store is not None:
+        await _store.flush()
+        _store.close()
+        _store = None
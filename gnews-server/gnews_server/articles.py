@@ -0,0 +1,169 @@
+"""
+Compact article representation for cached and stored results.
+
+Upstream responses are decoded straight from the response bytes (with
+orjson when installed) and each article becomes an Article instead of a
+pair of nested dicts:
+- fixed slots instead of a per-article dict and a per-article source dict
+- source names and URLs are interned, so a source that appears in thousands
+  of cached articles is stored once
+- the key layout of the upstream article is shared between articles
+
+An Article is a read-only Mapping with the upstream key names ("publishedAt",
+"source" as {"name", "url"}), so code that reads articles with .get(), [],
+** or dict() works unchanged. The plain dict form is only built when a
+response is shaped for a client (see projection.py) or serialized.
+"""
+
+import sys
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+# Upstream keys kept in slots; "source" is split into its name and URL
+_SLOTTED = {
+    "title": "title",
+    "description": "description",
+    "content": "content",
+    "url": "url",
+    "image": "image",
+    "publishedAt": "published_at",
+}
+
+# Per distinct upstream key order: the shared key tuple and the keys kept in `extra`
+_LAYOUTS: Dict[Tuple[str, ...], Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+
+def _shared_layout(keys: Tuple[str, ...]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    layout = _LAYOUTS.get(keys)
+    if layout is None:
+        layout = _LAYOUTS[keys] = (keys, tuple(key for key in keys if key not in _SLOTTED and key != "source"))
+    return layout
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Article(Mapping):
+    """One upstream article, stored compactly and read like the upstream dict"""
+
+    __slots__ = (
+        "title", "description", "content", "url", "image", "published_at",
+        "source_name", "source_url", "source_extra", "extra", "_layout",
+    )
+
+    def __init__(self, title: Optional[str] = None, description: Optional[str] = None,
+                 content: Optional[str] = None, url: Optional[str] = None, image: Optional[str] = None,
+                 published_at: Optional[str] = None, source_name: Optional[str] = None,
+                 source_url: Optional[str] = None):
+        self.title = title
+        self.description = description
+        self.content = content
+        self.url = url
+        self.image = image
+        self.published_at = published_at
+        self.source_name = _intern(source_name)
+        self.source_url = _intern(source_url)
+        self.source_extra: Optional[dict] = None
+        self.extra: Optional[dict] = None
+        self._layout = _shared_layout((*_SLOTTED, "source"))[0]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Article":
+        """Build an Article from an upstream article dict; unknown keys are kept"""
+        get = data.get
+        article = cls.__new__(cls)
+        article.title = get("title")
+        article.description = get("description")
+        article.content = get("content")
+        article.url = get("url")
+        article.image = get("image")
+        article.published_at = get("publishedAt")
+        article._layout, extra_keys = _shared_layout(tuple(data))
+        extra = {key: data[key] for key in extra_keys} if extra_keys else None
+        source = get("source")
+        if type(source) is dict:
+            name, url = source.get("name"), source.get("url")
+            article.source_name = sys.intern(name) if type(name) is str else name
+            article.source_url = sys.intern(url) if type(url) is str else url
+            article.source_extra = (
+                {key: value for key, value in source.items() if key != "name" and key != "url"} or None
+                if len(source) > 2 else None
+            )
+        else:
+            article.source_name = article.source_url = article.source_extra = None
+            if "source" in data:
+                extra = {**(extra or {}), "source": source}
+        article.extra = extra
+        return article
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._layout:
+            raise KeyError(key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        if key == "source":
+            source = {"name": self.source_name, "url": self.source_url}
+            if self.source_extra:
+                source.update(self.source_extra)
+            return source
+        return getattr(self, _SLOTTED[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layout)
+
+    def __len__(self) -> int:
+        return len(self._layout)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._layout
+
+    def to_dict(self) -> dict:
+        """The upstream dict form of this article"""
+        if self.extra is None and self._layout is _STANDARD_LAYOUT:
+            return {
+                "title": self.title, "description": self.description, "content": self.content,
+                "url": self.url, "image": self.image, "publishedAt": self.published_at,
+                "source": self["source"],
+            }
+        return {key: self[key] for key in self._layout}
+
+    def __repr__(self) -> str:
+        return f"Article({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return Article.from_dict, (self.to_dict(),)
+
+
+# The key order GNews uses, with its fast path in to_dict()
+_STANDARD_LAYOUT = _shared_layout(("title", "description", "content", "url", "image", "publishedAt", "source"))[0]
+
+
+def to_plain(value: Any) -> Any:
+    """JSON `default` hook: Articles serialize as their upstream dict"""
+    if isinstance(value, Article):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode_response(body: Union[bytes, str]) -> dict:
+    """Decode an upstream response body, turning its articles into Articles"""
+    data = orjson.loads(body) if orjson is not None else json.loads(body)
+    articles = data.get("articles") if isinstance(data, dict) else None
+    if isinstance(articles, list):
+        data["articles"] = [Article.from_dict(a) if isinstance(a, dict) else a for a in articles]
+    return data
+
+
+def encode_response(value: Any) -> str:
+    """Serialize a response that may hold Articles, e.g. for the disk cache"""
+    if orjson is not None:
+        return orjson.dumps(value, default=to_plain).decode("utf-8")
+    return json.dumps(value, default=to_plain)
@@ -0,0 +1,285 @@
+"""
+Tiered response cache for GNews API requests.
+
+Responses are cached by a normalized form of the request parameters (the
+API key is never part of the key) in two tiers:
+1. An in-memory LRU with per-endpoint TTLs
+2. An optional on-disk SQLite tier that survives restarts
+
+Configuration (environment variables):
+- GNEWS_CACHE_ENABLED: set to "0" to disable caching (default enabled)
+- GNEWS_CACHE_MAX_ENTRIES: in-memory LRU capacity (default 1024)
+- GNEWS_CACHE_TTL_HEADLINES: TTL in seconds for top-headlines (default 300)
+- GNEWS_CACHE_TTL_SEARCH: TTL in seconds for search (default 900)
+- GNEWS_CACHE_TTL_SEARCH_FIXED: TTL for searches whose date_to is in the past,
+  whose results no longer change (default 86400)
+- GNEWS_CACHE_DB: path of the SQLite file for the disk tier (disabled if unset)
+- GNEWS_CACHE_STALE_GRACE: seconds an expired in-memory entry is kept, to be
+  served while the GNews API is failing (default 3600)
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from gnews_server.articles import decode_response, encode_response
+
+
+logger = logging.getLogger(__name__)
+
+# Parameters that never take part in the cache key
+EXCLUDED_PARAMS = {"apikey"}
+
+
+def cache_key(endpoint: str, params: dict) -> str:
+    """Build a normalized cache key from an endpoint and its parameters"""
+    normalized = {
+        str(name): str(value).strip()
+        for name, value in params.items()
+        if name not in EXCLUDED_PARAMS and value is not None and value != ""
+    }
+    return f"{endpoint}?{json.dumps(normalized, sort_keys=True, separators=(',', ':'))}"
+
+
+def _parse_iso8601(value: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def ttl_for(endpoint: str, params: dict) -> float:
+    """Return the TTL in seconds for a request"""
+    if endpoint == "top-headlines":
+        return float(os.getenv("GNEWS_CACHE_TTL_HEADLINES", 300))
+
+    date_to = params.get("to")
+    if date_to:
+        parsed = _parse_iso8601(str(date_to))
+        if parsed and parsed < datetime.now(timezone.utc):
+            return float(os.getenv("GNEWS_CACHE_TTL_SEARCH_FIXED", 86400))
+    return float(os.getenv("GNEWS_CACHE_TTL_SEARCH", 900))
+
+
+class CacheStats:
+    """Hit, miss and eviction counters for operators"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stores = 0
+        self.stale_hits = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stores": self.stores,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryCache:
+    """In-memory LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int, stats: CacheStats, stale_grace: float = 0.0):
+        self.max_entries = max_entries
+        self.stats = stats
+        self.stale_grace = stale_grace
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            if expires_at + self.stale_grace <= time.time():
+                del self._entries[key]
+                self.stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: str) -> Optional[Tuple[float, dict]]:
+        """Return (expires_at, value) for an entry, even if it expired within the grace period"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] + self.stale_grace <= time.time():
+            return None
+        return entry
+
+    def set(self, key: str, value: dict, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class DiskCache:
+    """SQLite-backed cache tier; all I/O runs in a worker thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, body TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[Tuple[float, dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] <= time.time():
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return row[0], decode_response(row[1])
+
+    def _set(self, key: str, value: dict, expires_at: float) -> None:
+        body = encode_response(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, body) VALUES (?, ?, ?)",
+                (key, expires_at, body),
+            )
+            self._conn.commit()
+
+    def _purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    async def get(self, key: str) -> Optional[Tuple[float, dict]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: dict, expires_at: float) -> None:
+        await asyncio.to_thread(self._set, key, value, expires_at)
+
+    async def purge_expired(self) -> int:
+        return await asyncio.to_thread(self._purge_expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Two-tier response cache keyed by normalized request parameters"""
+
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None, stale_grace: float = 0.0):
+        self.stats = CacheStats()
+        self.memory = MemoryCache(max_entries, self.stats, stale_grace)
+        self.disk = DiskCache(db_path) if db_path else None
+
+    async def get(self, endpoint: str, params: dict) -> Optional[dict]:
+        """Look up a response, promoting disk hits into memory"""
+        key = cache_key(endpoint, params)
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats.memory_hits += 1
+            return value
+
+        if self.disk is not None:
+            entry = await self.disk.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                self.memory.set(key, value, expires_at)
+                self.stats.disk_hits += 1
+                return value
+
+        self.stats.misses += 1
+        return None
+
+    def get_stale(self, endpoint: str, params: dict) -> Optional[Tuple[dict, float]]:
+        """Return (value, age in seconds past expiry) from memory, ignoring expiry within the grace period"""
+        entry = self.memory.get_stale(cache_key(endpoint, params))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        self.stats.stale_hits += 1
+        return value, max(0.0, time.time() - expires_at)
+
+    async def set(self, endpoint: str, params: dict, value: dict) -> None:
+        """Store a successful response in every tier"""
+        key = cache_key(endpoint, params)
+        expires_at = time.time() + ttl_for(endpoint, params)
+        self.memory.set(key, value, expires_at)
+        if self.disk is not None:
+            await self.disk.set(key, value, expires_at)
+        self.stats.stores += 1
+
+    def snapshot(self) -> dict:
+        """Return counters and sizes for operators"""
+        return {
+            **self.stats.as_dict(),
+            "memory_entries": len(self.memory),
+            "memory_capacity": self.memory.max_entries,
+            "disk_enabled": self.disk is not None,
+        }
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Return the process-wide cache, or None if caching is disabled"""
+    global _cache
+    if os.getenv("GNEWS_CACHE_ENABLED", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    if _cache is None:
+        _cache = ResponseCache(
+            max_entries=int(os.getenv("GNEWS_CACHE_MAX_ENTRIES", 1024)),
+            db_path=os.getenv("GNEWS_CACHE_DB") or None,
+            stale_grace=float(os.getenv("GNEWS_CACHE_STALE_GRACE", 3600)),
+        )
+        logger.info(
+            f"Response cache enabled (max_entries={_cache.memory.max_entries}, "
+            f"disk={'on' if _cache.disk else 'off'})"
+        )
+    return _cache
+
+
+def close_cache() -> None:
+    """Close the process-wide cache at server shutdown"""
+    global _cache
+    if _cache is not None:
+        logger.info(f"Response cache stats at shutdown: {_cache.snapshot()}")
+        _cache.close()
+        _cache = None
@@ -0,0 +1,181 @@
+"""
+Article deduplication across queries and pages.
+
+Two articles are treated as the same story when either:
+1. Their canonical URLs match (tracking parameters, fragments, "www." and
+   AMP variants removed), or
+2. The estimated Jaccard similarity of the word sets of their title and
+   description reaches `threshold` (near-identical syndicated copies)
+
+Similarity is estimated with MinHash signatures. Candidate pairs are found
+with banded LSH: signatures are split into bands and only articles sharing
+an identical band are compared, so a batch is processed in linear time
+instead of comparing every pair.
+
+Configuration (environment variables):
+- GNEWS_DEDUP_ENABLED: set to "0" to disable deduplication (default enabled)
+- GNEWS_DEDUP_THRESHOLD: Jaccard similarity treated as a duplicate (default 0.7)
+"""
+
+import os
+import re
+import struct
+import hashlib
+from functools import lru_cache
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+NUM_PERMUTATIONS = 64
+_UNPACK_HASHES = struct.Struct(f">{NUM_PERMUTATIONS}I").unpack
+
+# Only parameters known to carry click or campaign tracking. Short generic names
+# such as ref, cid or src also select content on some sites, so they are kept.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ocid", "cmpid",
+    "ref_src", "ref_url", "smid", "smtyp", "guccounter", "_ga", "igshid",
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so that tracking and AMP variants compare equal"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "amp.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+
+    path = parts.path or "/"
+    path = re.sub(r"/amp(/|$)", "/", path)
+    path = re.sub(r"\.amp(\.html?)?$", r"\1", path)
+    path = re.sub(r"/+$", "", path) or "/"
+
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+@lru_cache(maxsize=65536)
+def _token_hashes(token: str) -> Tuple[int, ...]:
+    """NUM_PERMUTATIONS independent 32-bit hashes of a token, from one XOF digest"""
+    return _UNPACK_HASHES(hashlib.shake_128(token.encode("utf-8")).digest(4 * NUM_PERMUTATIONS))
+
+
+def minhash(text: str) -> Optional[Tuple[int, ...]]:
+    """MinHash signature of the set of words in `text` (None if it has no words)"""
+    words = set(_TOKEN_RE.findall(text.lower()))
+    if not words:
+        return None
+    return tuple(map(min, zip(*map(_token_hashes, words))))
+
+
+def estimated_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """Estimate Jaccard similarity from two signatures"""
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+def lsh_bands(threshold: float) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) so the LSH candidate threshold (1/bands)^(1/rows)
+    sits just below the similarity threshold, favouring recall.
+    """
+    best = (NUM_PERMUTATIONS, 1)
+    best_gap = None
+    for rows in range(1, NUM_PERMUTATIONS + 1):
+        bands = NUM_PERMUTATIONS // rows
+        candidate_threshold = (1 / bands) ** (1 / rows)
+        gap = threshold - candidate_threshold
+        if gap >= 0 and (best_gap is None or gap < best_gap):
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+def _article_text(article: dict) -> str:
+    return f"{article.get('title') or ''} {article.get('description') or ''}"
+
+
+class Deduplicator:
+    """
+    Incremental deduplicator.
+
+    Keeps the URLs and signatures it has seen, so one instance can be fed
+    several pages or query results in turn and drops repeats across them.
+    Each distinct story gets an id, so callers can also group the repeats.
+    """
+
+    def __init__(self, threshold: float = 0.7):
+        if not 0 < threshold <= 1:
+            raise ValueError("Threshold must be greater than 0 and at most 1")
+        self.threshold = threshold
+        self.bands, self.rows = lsh_bands(threshold)
+        self._urls: Dict[str, int] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[Tuple[Tuple[int, ...], int]]] = defaultdict(list)
+        self.removed = 0
+        self.stories = 0
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def assign(self, article: dict) -> Tuple[int, bool]:
+        """Record an article; returns its story id and False if it duplicates one already seen"""
+        url = canonicalize_url(article.get("url") or "")
+        if url and url in self._urls:
+            self.removed += 1
+            return self._urls[url], False
+
+        story = self.stories
+        signature = minhash(_article_text(article))
+        if signature is not None:
+            keys = self._band_keys(signature)
+            for key in keys:
+                for candidate, candidate_story in self._buckets.get(key, ()):
+                    if estimated_similarity(candidate, signature) >= self.threshold:
+                        self.removed += 1
+                        return candidate_story, False
+            for key in keys:
+                self._buckets[key].append((signature, story))
+
+        self.stories += 1
+        if url:
+            self._urls[url] = story
+        return story, True
+
+    def add(self, article: dict) -> bool:
+        """Record an article; returns False if it duplicates one already seen"""
+        return self.assign(article)[1]
+
+    def filter(self, articles: List[dict]) -> List[dict]:
+        """Return the articles that are not duplicates, in their original order"""
+        return [article for article in articles if self.add(article)]
+
+
+def dedup_enabled() -> bool:
+    return os.getenv("GNEWS_DEDUP_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def new_deduplicator() -> Optional[Deduplicator]:
+    """Create a deduplicator from the environment, or None if disabled"""
+    if not dedup_enabled():
+        return None
+    return Deduplicator(float(os.getenv("GNEWS_DEDUP_THRESHOLD", 0.7)))
+
+
+def dedupe_articles(articles: List[dict]) -> Tuple[List[dict], int]:
+    """Deduplicate one list of articles; returns (unique articles, removed count)"""
+    deduplicator = new_deduplicator()
+    if deduplicator is None:
+        return articles, 0
+    unique = deduplicator.filter(articles)
+    return unique, deduplicator.removed
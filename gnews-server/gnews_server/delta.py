@@ -0,0 +1,227 @@
+"""
+Incremental ("what's new since my last call") results for monitoring agents.
+
+A delta call to search_news or get_top_headlines returns a next_cursor.
+Passing it back on the next call with the same query returns only articles
+that were not returned before, plus a new cursor. The payload then grows
+with the amount of new news, not with the size of the query.
+
+The cursor is opaque to clients. It holds a stream id, a fingerprint of the
+query and the newest publishedAt returned so far (the high-water mark). On
+the next call the upstream request is narrowed with `from` set to the
+high-water mark minus an overlap window. The overlap catches articles that
+were indexed late with an older publication time. Articles already returned
+on the stream are then dropped using a server-side set of canonical URLs.
+Polls with a cursor bypass the response cache, so each one sees what
+upstream has at that moment.
+
+Stream state is in memory, bounded by stream count and age. If it is gone
+(restart, eviction, another worker), the cursor alone still works:
+only articles strictly newer than the high-water mark are returned.
+
+Configuration (environment variables):
+- GNEWS_DELTA_OVERLAP: seconds before the high-water mark to re-check (default 3600)
+- GNEWS_DELTA_MAX_STREAMS: streams whose seen sets are kept (default 10000)
+- GNEWS_DELTA_STREAM_TTL: seconds an idle stream is kept (default 604800)
+- GNEWS_DELTA_MAX_SEEN: URLs remembered per stream (default 2000)
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import secrets
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from gnews_server.cache import cache_key
+from gnews_server.dedup import canonicalize_url
+
+
+# Parameters that delta mode sets itself and that do not identify the query
+DELTA_PARAMS = ("from", "page", "max", "sortby")
+
+DELTA_DESCRIPTION = (
+    "Delta mode for monitoring: return a next_cursor, and with it only articles not returned before. "
+    "Starts a new stream when no cursor is given"
+)
+CURSOR_DESCRIPTION = "next_cursor from the previous delta call with the same query (implies delta mode)"
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _format_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def query_fingerprint(endpoint: str, params: dict) -> str:
+    identity = {name: value for name, value in params.items() if name not in DELTA_PARAMS}
+    return hashlib.sha256(cache_key(endpoint, identity).encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(stream_id: str, fingerprint: str, high_water: Optional[str]) -> str:
+    payload = json.dumps({"s": stream_id, "q": fingerprint, "t": high_water}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, Optional[str]]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return payload["s"], payload["q"], payload["t"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor; pass the next_cursor value from a previous delta call")
+
+
+class DeltaStream:
+    """One monitoring stream: its query, high-water mark and the URLs it has returned"""
+
+    def __init__(self, stream_id: str, endpoint: str, fingerprint: str, high_water: Optional[str], known: bool):
+        self.stream_id = stream_id
+        self.endpoint = endpoint
+        self.fingerprint = fingerprint
+        self.high_water = high_water
+        # False when the seen set was lost: fall back to a strict high-water mark
+        self.known = known
+        self.seen: Dict[str, Optional[str]] = {}
+        self.last_used = time.monotonic()
+
+
+class DeltaTracker:
+    """Opens streams from cursors and filters each response down to what is new"""
+
+    def __init__(self, overlap: float = 3600.0, max_streams: int = 10000, stream_ttl: float = 604800.0,
+                 max_seen: int = 2000):
+        self.overlap = overlap
+        self.max_streams = max_streams
+        self.stream_ttl = stream_ttl
+        self.max_seen = max_seen
+        self._streams: "OrderedDict[str, DeltaStream]" = OrderedDict()
+        self.calls = 0
+        self.returned = 0
+        self.filtered = 0
+        self.lost_streams = 0
+
+    def open(self, endpoint: str, params: dict, cursor: Optional[str]) -> DeltaStream:
+        """Resume the stream a cursor belongs to, or start a new one"""
+        fingerprint = query_fingerprint(endpoint, params)
+        if not cursor:
+            return DeltaStream(secrets.token_urlsafe(9), endpoint, fingerprint, None, known=True)
+
+        stream_id, cursor_fingerprint, high_water = decode_cursor(cursor)
+        if cursor_fingerprint != fingerprint:
+            raise ValueError("This cursor belongs to a different query; start a new delta stream without a cursor")
+        stream = self._streams.get(stream_id)
+        if stream is None or time.monotonic() - stream.last_used > self.stream_ttl:
+            self.lost_streams += 1
+            return DeltaStream(stream_id, endpoint, fingerprint, high_water, known=False)
+        stream.high_water = high_water
+        return stream
+
+    def request_params(self, stream: DeltaStream, params: dict) -> dict:
+        """Narrow the upstream request to the window that can hold new articles"""
+        params = {**params, "page": 1}
+        if stream.endpoint == "search":
+            params["sortby"] = "publishedAt"
+        high_water = _parse_time(stream.high_water)
+        if high_water is None:
+            return params
+        since = high_water - timedelta(seconds=self.overlap if stream.known else 0)
+        requested = _parse_time(params.get("from"))
+        if requested is None or since > requested:
+            params["from"] = _format_time(since)
+        return params
+
+    def advance(self, stream: DeltaStream, response: dict) -> dict:
+        """Keep only unseen articles, remember them and attach the next cursor"""
+        articles = response.get("articles", [])
+        since = stream.high_water
+        high_water = _parse_time(since)
+        fresh: List[dict] = []
+        newest = high_water
+        for article in articles:
+            key = canonicalize_url(article.get("url") or "") or f"{article.get('title')}|{article.get('publishedAt')}"
+            published = _parse_time(article.get("publishedAt"))
+            if key in stream.seen:
+                continue
+            if not stream.known and high_water is not None and published is not None and published <= high_water:
+                continue
+            stream.seen[key] = article.get("publishedAt")
+            fresh.append(article)
+            if published is not None and (newest is None or published > newest):
+                newest = published
+
+        if newest is not None:
+            stream.high_water = _format_time(newest)
+        self._forget_old(stream)
+        stream.known = True
+        self._remember(stream)
+
+        self.calls += 1
+        self.returned += len(fresh)
+        self.filtered += len(articles) - len(fresh)
+        return {
+            **response,
+            "articles": fresh,
+            "next_cursor": encode_cursor(stream.stream_id, stream.fingerprint, stream.high_water),
+            "delta": {
+                "since": since,
+                "new_articles": len(fresh),
+                "already_seen": len(articles) - len(fresh),
+                # The upstream window held more than one page: raise max_articles or poll more often
+                "truncated": response.get("totalArticles", 0) > len(articles),
+            },
+        }
+
+    def _forget_old(self, stream: DeltaStream) -> None:
+        """Drop seen URLs published before the overlap window; upstream no longer returns them"""
+        high_water = _parse_time(stream.high_water)
+        if high_water is None:
+            return
+        cutoff = high_water - timedelta(seconds=self.overlap)
+        kept = [
+            (key, published) for key, published in stream.seen.items()
+            if (_parse_time(published) or high_water) >= cutoff
+        ]
+        stream.seen = dict(kept[-self.max_seen:])
+
+    def _remember(self, stream: DeltaStream) -> None:
+        stream.last_used = time.monotonic()
+        self._streams[stream.stream_id] = stream
+        self._streams.move_to_end(stream.stream_id)
+        while len(self._streams) > self.max_streams:
+            self._streams.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        return {
+            "streams": len(self._streams),
+            "calls": self.calls,
+            "returned": self.returned,
+            "filtered": self.filtered,
+            "lost_streams": self.lost_streams,
+        }
+
+
+_tracker: Optional[DeltaTracker] = None
+
+
+def get_delta_tracker() -> DeltaTracker:
+    """Return the process-wide delta tracker"""
+    global _tracker
+    if _tracker is None:
+        _tracker = DeltaTracker(
+            overlap=float(os.getenv("GNEWS_DELTA_OVERLAP", 3600)),
+            max_streams=int(os.getenv("GNEWS_DELTA_MAX_STREAMS", 10000)),
+            stream_ttl=float(os.getenv("GNEWS_DELTA_STREAM_TTL", 604800)),
+            max_seen=int(os.getenv("GNEWS_DELTA_MAX_SEEN", 2000)),
+        )
+    return _tracker
@@ -0,0 +1,111 @@
+"""
+Merging and ranking of headlines fetched for several regions.
+
+get_global_headlines fetches top headlines for many country/language
+regions at once. This module merges the per-region lists into one list of
+stories. Copies of a story (same canonical URL, or near-identical title and
+description, see dedup.py) are collapsed, and the regions that carried the
+story are recorded. Stories are ranked by:
+- recency: 1 for a story published now, halving every half-life
+- prevalence: the share of the other regions that also carried the story,
+  times a weight
+Ties go to the story placed highest in any region's list.
+
+Configuration (environment variables):
+- GNEWS_FANOUT_HALF_LIFE: hours after which a story's recency score halves (default 6)
+- GNEWS_FANOUT_PREVALENCE_WEIGHT: weight of prevalence against recency (default 1)
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from gnews_server.dedup import Deduplicator, canonicalize_url
+
+
+# Keys added to each merged article, kept even when the caller selects fields
+RANKING_FIELDS = ("regions", "region_count", "score")
+
+
+def region_label(country: Optional[str], lang: Optional[str]) -> str:
+    return "/".join(part for part in (country, lang) if part) or "any"
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class Story:
+    """One story as seen across regions: the first copy found and where it appeared"""
+
+    def __init__(self, article: dict):
+        self.article = article
+        self.regions: List[str] = []
+        self.best_position: Optional[int] = None
+        self.published: Optional[datetime] = None
+        self.score = 0.0
+
+    def add(self, region: str, position: int, article: dict) -> None:
+        if region not in self.regions:
+            self.regions.append(region)
+        if self.best_position is None or position < self.best_position:
+            self.best_position = position
+        published = _parse_time(article.get("publishedAt"))
+        if published is not None and (self.published is None or published > self.published):
+            self.published = published
+
+    def ranking(self) -> dict:
+        return {"regions": self.regions, "region_count": len(self.regions), "score": round(self.score, 4)}
+
+
+def merge_headlines(
+    results: List[Tuple[str, List[dict]]],
+    deduplicator: Optional[Deduplicator] = None,
+    now: Optional[datetime] = None,
+    half_life: Optional[float] = None,
+    prevalence_weight: Optional[float] = None,
+) -> Tuple[List[Story], int]:
+    """
+    Merge (region label, articles) results into ranked stories.
+
+    Without a deduplicator only copies with the same canonical URL are
+    collapsed. Returns the stories, best first, and the number of copies
+    collapsed.
+    """
+    now = now or datetime.now(timezone.utc)
+    half_life = half_life if half_life is not None else float(os.getenv("GNEWS_FANOUT_HALF_LIFE", 6))
+    if prevalence_weight is None:
+        prevalence_weight = float(os.getenv("GNEWS_FANOUT_PREVALENCE_WEIGHT", 1))
+
+    stories: Dict[object, Story] = {}
+    collapsed = 0
+    for region, articles in results:
+        for position, article in enumerate(articles):
+            if deduplicator is not None:
+                key, _ = deduplicator.assign(article)
+            else:
+                key = canonicalize_url(article.get("url") or "") or id(article)
+            story = stories.get(key)
+            if story is None:
+                story = stories[key] = Story(article)
+            else:
+                collapsed += 1
+            story.add(region, position, article)
+
+    other_regions = max(1, len(results) - 1)
+    for story in stories.values():
+        recency = 0.0
+        if story.published is not None:
+            age_hours = max(0.0, (now - story.published).total_seconds() / 3600)
+            recency = 0.5 ** (age_hours / half_life) if half_life > 0 else 1.0
+        prevalence = (len(story.regions) - 1) / other_regions
+        story.score = recency + prevalence_weight * prevalence
+
+    ranked = sorted(stories.values(), key=lambda story: (-story.score, story.best_position))
+    return ranked, collapsed
@@ -0,0 +1,119 @@
+"""
+Shared upstream HTTP client for the GNews API.
+
+A single httpx.AsyncClient is kept for the lifetime of the server so that
+DNS, TCP and TLS state is reused across tool calls instead of being rebuilt
+for every request. The client is opened by the server lifespan in server.py
+and closed when the server shuts down.
+
+Configuration (environment variables):
+- GNEWS_HTTP_MAX_CONNECTIONS: maximum open connections (default 100)
+- GNEWS_HTTP_MAX_KEEPALIVE: maximum idle keep-alive connections (default 20)
+- GNEWS_HTTP_KEEPALIVE_EXPIRY: seconds an idle connection is kept (default 30)
+- GNEWS_HTTP_CONNECT_TIMEOUT: connect timeout in seconds (default 5)
+- GNEWS_HTTP_READ_TIMEOUT: read timeout in seconds (default 15)
+- GNEWS_HTTP_POOL_TIMEOUT: seconds to wait for a free connection (default 5)
+- GNEWS_HTTP2: set to "1" to enable HTTP/2 (requires the "h2" package)
+"""
+
+import os
+import logging
+import importlib.util
+from typing import Optional
+
+import httpx
+
+from gnews_server.logging_config import redact_library_logs
+
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def create_client() -> httpx.AsyncClient:
+    """Build an AsyncClient configured from the environment"""
+    # httpx logs request URLs, which carry the API key
+    redact_library_logs()
+    limits = httpx.Limits(
+        max_connections=_env_int("GNEWS_HTTP_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_int("GNEWS_HTTP_MAX_KEEPALIVE", 20),
+        keepalive_expiry=_env_float("GNEWS_HTTP_KEEPALIVE_EXPIRY", 30.0),
+    )
+    timeout = httpx.Timeout(
+        connect=_env_float("GNEWS_HTTP_CONNECT_TIMEOUT", 5.0),
+        read=_env_float("GNEWS_HTTP_READ_TIMEOUT", 15.0),
+        write=_env_float("GNEWS_HTTP_READ_TIMEOUT", 15.0),
+        pool=_env_float("GNEWS_HTTP_POOL_TIMEOUT", 5.0),
+    )
+
+    http2 = _env_bool("GNEWS_HTTP2")
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("GNEWS_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+
+    logger.info(
+        f"Creating upstream HTTP client (max_connections={limits.max_connections}, "
+        f"keepalive={limits.max_keepalive_connections}, http2={http2})"
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def request_timeout(client: httpx.AsyncClient, remaining: Optional[float]) -> httpx.Timeout:
+    """The client's timeouts, each capped to the time left in the caller's deadline"""
+    timeout = client.timeout
+    if remaining is None:
+        return timeout
+
+    def cap(value: Optional[float]) -> float:
+        return max(0.001, remaining if value is None else min(value, remaining))
+
+    return httpx.Timeout(connect=cap(timeout.connect), read=cap(timeout.read),
+                         write=cap(timeout.write), pool=cap(timeout.pool))
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared upstream client.
+
+    The client is normally opened by the server lifespan. When the tools are
+    called directly (tests, examples) it is created on first use instead.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Open the shared client at server startup"""
+    return get_client()
+
+
+async def close_client() -> None:
+    """Close the shared client and release its pooled connections"""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+        logger.info("Upstream HTTP client closed")
@@ -0,0 +1,99 @@
+"""
+GNews API keys and their persisted daily usage.
+
+Several keys can be provisioned, and each has its own rate limit and daily
+quota. The scheduler (see scheduler.py) sends every upstream request with
+the key that has the most budget left. Throughput then grows with the
+number of keys.
+
+Keys are never logged or stored. They are identified by a short hash. Each
+key's usage for the current UTC day, and whether upstream reported it
+spent, is saved in SQLite so a restart does not forget quota already used.
+Server processes sharing the file add their requests to the day's count,
+so none of them overwrites another's.
+
+Configuration (environment variables):
+- GNEWS_API_KEYS: comma-separated keys; GNEWS_API_KEY is used when unset
+- GNEWS_KEY_USAGE_DB: path of the SQLite file for per-key usage (default
+  data/key_usage.db in the gnews-server directory). The file is opened
+  whenever keys are configured and the daily quota is enforced, which is
+  the default; set GNEWS_DAILY_QUOTA=0 to run without it.
+"""
+
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "key_usage.db"
+
+
+def load_api_keys() -> List[str]:
+    """Configured API keys, in order and without duplicates"""
+    value = os.getenv("GNEWS_API_KEYS") or os.getenv("GNEWS_API_KEY") or ""
+    keys: List[str] = []
+    for key in value.split(","):
+        key = key.strip()
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def key_id(key: str) -> str:
+    """Short, stable name for a key that is safe to log and store"""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+class KeyUsageStore:
+    """Per-key usage for a UTC day, in SQLite; reads and writes are synchronous and small"""
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS key_usage ("
+            "key_id TEXT PRIMARY KEY, day TEXT NOT NULL, used INTEGER NOT NULL, exhausted INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, day: str) -> Dict[str, Tuple[int, bool]]:
+        """Return {key_id: (used, exhausted)} recorded for `day`"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key_id, used, exhausted FROM key_usage WHERE day = ?", (day,)
+            ).fetchall()
+        return {row[0]: (row[1], bool(row[2])) for row in rows}
+
+    def add(self, rows: List[Tuple[str, str, int, bool]]) -> None:
+        """Add (key_id, day, requests, exhausted) rows to the counts for that day, replacing earlier days"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO key_usage (key_id, day, used, exhausted) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key_id) DO UPDATE SET "
+                "used = CASE WHEN day = excluded.day THEN used + excluded.used ELSE excluded.used END, "
+                "exhausted = CASE WHEN day = excluded.day THEN MAX(exhausted, excluded.exhausted) "
+                "ELSE excluded.exhausted END, "
+                "day = excluded.day "
+                "WHERE excluded.day >= day",
+                [(kid, day, used, int(exhausted)) for kid, day, used, exhausted in rows],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_usage_store() -> KeyUsageStore:
+    """Open the usage store at the configured path"""
+    path = os.getenv("GNEWS_KEY_USAGE_DB") or str(DEFAULT_DB_PATH)
+    logger.info(f"Persisting per-key usage in {path}")
+    return KeyUsageStore(path)
@@ -0,0 +1,242 @@
+"""
+Non-blocking, redacted, sampled logging for the server.
+
+Log calls on the event loop only put the record on a bounded in-memory
+queue. A listener thread then formats, redacts and writes it. If the queue
+is full, records are dropped and counted, so log I/O never stalls a tool call.
+
+Per-request records are marked with extra=PER_REQUEST and can be sampled
+and rate limited. Warnings and errors are always kept. Secrets (the GNews
+API keys, `apikey=` query parameters and similar) are redacted before output.
+This includes httpx's request-URL logs.
+
+configure_logging() is for processes where gnews owns logging (main.py,
+fast_start.py). When gnews is mounted in another app, that app's handlers
+write the records, so redact_library_logs() puts the redacting filter on the
+httpx and gnews_server loggers themselves. The server lifespan and the
+shared HTTP client both call it.
+
+Configuration (environment variables):
+- GNEWS_LOG_LEVEL: minimum level (default INFO)
+- GNEWS_LOG_FORMAT: "text" or "json" (default text)
+- GNEWS_LOG_FILE: write to this file instead of stderr
+- GNEWS_LOG_QUEUE_SIZE: records buffered before dropping (default 10000)
+- GNEWS_LOG_SAMPLE_RATE: share of per-request records kept, 0-1 (default 1)
+- GNEWS_LOG_MAX_PER_SECOND: cap on per-request records per second (default 0, no cap)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Optional
+
+from gnews_server.key_pool import load_api_keys
+
+
+# Pass as extra= on hot-path log calls so they can be sampled
+PER_REQUEST = {"per_request": True}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+SECRET_NAMES = ("apikey", "api_key", "token", "access_token", "password", "secret")
+REDACTED = "***"
+
+# Keys shorter than this are still redacted, but a warning is logged: they may mask unrelated text
+SHORT_SECRET = 8
+
+# apikey=abc in URLs and query strings, 'apikey': 'abc' in dict reprs and JSON
+_QUERY_SECRET = re.compile(rf"(?i)\b({'|'.join(SECRET_NAMES)})=([^&\s'\"]+)")
+_MAPPING_SECRET = re.compile(rf"(?i)(['\"]({'|'.join(SECRET_NAMES)})['\"]\s*:\s*)(['\"])(.*?)\3")
+
+# Attributes every LogRecord has; anything else came from extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def redact(text: str, secrets: tuple = ()) -> str:
+    """Mask secret values in a log message"""
+    for secret in secrets:
+        if secret:
+            text = text.replace(secret, REDACTED)
+    text = _QUERY_SECRET.sub(rf"\1={REDACTED}", text)
+    return _MAPPING_SECRET.sub(rf"\1\3{REDACTED}\3", text)
+
+
+class RedactingFilter(logging.Filter):
+    """Render the message once and mask secrets in it and in any traceback"""
+
+    def __init__(self, secrets: tuple = ()):
+        super().__init__()
+        self.secrets = tuple(secret for secret in secrets if secret)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage(), self.secrets)
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text, self.secrets)
+        return True
+
+
+class RequestSampler(logging.Filter):
+    """Sample and rate-limit per-request records; other records always pass"""
+
+    def __init__(self, sample_rate: float = 1.0, max_per_second: float = 0.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        self._allowance = max_per_second
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "per_request", False) or record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.suppressed += 1
+            return False
+        if self.max_per_second > 0:
+            with self._lock:
+                now = time.monotonic()
+                self._allowance = min(self.max_per_second, self._allowance + (now - self._last) * self.max_per_second)
+                self._last = now
+                if self._allowance < 1:
+                    self.suppressed += 1
+                    return False
+                self._allowance -= 1
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "per_request":
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records without formatting them and never block.
+
+    Formatting is left to the listener thread, so log calls should not mutate
+    their arguments afterwards. When the queue is full the record is dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Loggers whose records are redacted whatever handlers the process uses
+REDACTED_LOGGERS = ("httpx", "httpcore", "gnews_server")
+
+_redacting_filter: Optional[RedactingFilter] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_sampler: Optional[RequestSampler] = None
+
+
+def configure_logging() -> None:
+    """Route all logging through the queue; safe to call more than once"""
+    global _listener, _queue_handler, _sampler
+    if _listener is not None:
+        return
+
+    log_file = os.getenv("GNEWS_LOG_FILE")
+    output = logging.FileHandler(log_file) if log_file else logging.StreamHandler(sys.stderr)
+    if os.getenv("GNEWS_LOG_FORMAT", "text").strip().lower() == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+    output.addFilter(RedactingFilter(tuple(load_api_keys())))
+
+    _sampler = RequestSampler(
+        sample_rate=float(os.getenv("GNEWS_LOG_SAMPLE_RATE", 1.0)),
+        max_per_second=float(os.getenv("GNEWS_LOG_MAX_PER_SECOND", 0)),
+    )
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=int(os.getenv("GNEWS_LOG_QUEUE_SIZE", 10000))))
+    _queue_handler.addFilter(_sampler)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(os.getenv("GNEWS_LOG_LEVEL", "INFO").strip().upper())
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    short = sum(1 for key in load_api_keys() if len(key) < SHORT_SECRET)
+    if short:
+        logging.getLogger(__name__).warning(
+            f"{short} configured API key(s) shorter than {SHORT_SECRET} characters; "
+            "they are redacted wherever they appear in log output, including inside unrelated words"
+        )
+
+
+def redact_library_logs() -> None:
+    """Redact secrets in records from httpx and the gnews_server modules; safe to call more than once"""
+    global _redacting_filter
+    if _redacting_filter is None:
+        _redacting_filter = RedactingFilter(tuple(load_api_keys()))
+    # A logger filter only sees records logged on that logger, so cover each module's logger
+    names = [
+        name for name in list(logging.root.manager.loggerDict)
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in REDACTED_LOGGERS)
+    ]
+    for name in set(names) | set(REDACTED_LOGGERS):
+        target = logging.getLogger(name)
+        if _redacting_filter not in target.filters:
+            target.addFilter(_redacting_filter)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    """Return queue depth and how many records were dropped or sampled out"""
+    if _queue_handler is None:
+        return {"enabled": False}
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "suppressed": _sampler.suppressed if _sampler is not None else 0,
+    }
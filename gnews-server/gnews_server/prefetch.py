@@ -0,0 +1,258 @@
+"""
+Background headline prefetcher with stale-while-revalidate serving.
+
+Headline traffic concentrates on a small matrix of categories, countries and
+languages. The prefetcher keeps those combinations warm by refreshing them
+on a schedule at background priority, within a daily quota budget.
+get_top_headlines serves a warm combination immediately. If the entry is
+older than the refresh interval it is still served, and a refresh starts in
+the background.
+
+Configuration (environment variables):
+- GNEWS_PREFETCH_ENABLED: set to "1" to run the prefetcher (default off)
+- GNEWS_PREFETCH_CATEGORIES: comma-separated categories (default all)
+- GNEWS_PREFETCH_COUNTRIES: comma-separated countries (default us,gb,in,ca,au)
+- GNEWS_PREFETCH_LANGUAGES: comma-separated languages (default en)
+- GNEWS_PREFETCH_MAX_ARTICLES: articles fetched per combination (default 10)
+- GNEWS_PREFETCH_INTERVAL: seconds between refreshes of a combination (default 900)
+- GNEWS_PREFETCH_MAX_STALE: seconds after which an entry is no longer served (default 21600)
+- GNEWS_PREFETCH_DAILY_BUDGET: upstream requests the prefetcher may spend per day (default 50)
+- GNEWS_PREFETCH_QUOTA_RESERVE: daily quota always left for interactive calls (default 20)
+"""
+
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# (category, lang, country)
+HeadlineKey = Tuple[str, Optional[str], Optional[str]]
+
+# Request parameters a warm entry can answer
+SERVABLE_PARAMS = {"category", "lang", "country", "max", "page"}
+
+
+def _env_list(name: str, default: List[str]) -> List[str]:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class HeadlineEntry:
+    """A prefetched top-headlines response and when it was fetched"""
+
+    def __init__(self, data: dict, max_articles: int):
+        self.data = data
+        self.max_articles = max_articles
+        self.fetched_at = time.time()
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class HeadlinePrefetcher:
+    """Keeps popular top-headlines combinations warm"""
+
+    def __init__(
+        self,
+        fetch: Callable[[dict], Awaitable[dict]],
+        quota_remaining: Callable[[], Optional[int]],
+        categories: List[str],
+        countries: List[str],
+        languages: List[str],
+        max_articles: int = 10,
+        interval: float = 900.0,
+        max_stale: float = 21600.0,
+        daily_budget: int = 50,
+        quota_reserve: int = 20,
+    ):
+        self.fetch = fetch
+        self.quota_remaining = quota_remaining
+        self.combinations: List[HeadlineKey] = [
+            (category, lang, country)
+            for category in categories
+            for country in countries
+            for lang in languages
+        ]
+        self.max_articles = max_articles
+        self.interval = interval
+        self.max_stale = max_stale
+        self.daily_budget = daily_budget
+        self.quota_reserve = quota_reserve
+        self.entries: Dict[HeadlineKey, HeadlineEntry] = {}
+        self._refreshing: Dict[HeadlineKey, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._budget_day = datetime.now(timezone.utc).date()
+        self.spent_today = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.skipped_for_quota = 0
+
+    def params_for(self, key: HeadlineKey) -> dict:
+        """Upstream parameters for a combination, as get_top_headlines builds them"""
+        category, lang, country = key
+        params = {"category": category, "max": self.max_articles, "page": 1}
+        if lang:
+            params["lang"] = lang
+        if country:
+            params["country"] = country
+        return params
+
+    def _budget_available(self) -> bool:
+        today = datetime.now(timezone.utc).date()
+        if today != self._budget_day:
+            self._budget_day = today
+            self.spent_today = 0
+        if self.spent_today >= self.daily_budget:
+            return False
+        remaining = self.quota_remaining()
+        return remaining is None or remaining > self.quota_reserve
+
+    async def refresh(self, key: HeadlineKey) -> bool:
+        """Fetch one combination if the quota budget allows it"""
+        if not self._budget_available():
+            self.skipped_for_quota += 1
+            return False
+        self.spent_today += 1
+        try:
+            data = await self.fetch(self.params_for(key))
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Prefetch of {key} failed: {e}")
+            return False
+        self.entries[key] = HeadlineEntry(data, self.max_articles)
+        self.refreshes += 1
+        return True
+
+    def refresh_in_background(self, key: HeadlineKey) -> None:
+        """Start a refresh unless one is already running for this key"""
+        task = self._refreshing.get(key)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self.refresh(key))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda done: self._refreshing.pop(key, None) if self._refreshing.get(key) is done else None)
+
+    def lookup(self, params: dict) -> Optional[Tuple[dict, float, bool]]:
+        """
+        Return (data, age_seconds, stale) for a request a warm entry can answer.
+
+        Stale entries are returned as well, and a background refresh is started.
+        """
+        if not set(params) <= SERVABLE_PARAMS or params.get("page", 1) != 1:
+            return None
+        key = (params.get("category") or "general", params.get("lang"), params.get("country"))
+        entry = self.entries.get(key)
+        requested = params.get("max", 10)
+        if entry is None or requested > entry.max_articles:
+            return None
+
+        age = entry.age
+        if age > self.max_stale:
+            return None
+        stale = age > self.interval
+        if stale:
+            self.stale_hits += 1
+            self.refresh_in_background(key)
+        else:
+            self.hits += 1
+
+        data = entry.data
+        if len(data.get("articles", [])) > requested:
+            data = {**data, "articles": data["articles"][:requested]}
+        return data, age, stale
+
+    async def run(self) -> None:
+        """Refresh every combination once per interval, spread evenly"""
+        if not self.combinations:
+            return
+        pause = self.interval / len(self.combinations)
+        logger.info(f"Prefetching {len(self.combinations)} headline combinations every {self.interval:.0f}s")
+        while True:
+            for key in self.combinations:
+                entry = self.entries.get(key)
+                # Skip entries a stale-while-revalidate refresh renewed recently
+                if entry is None or entry.age >= self.interval / 2:
+                    await self.refresh(key)
+                await asyncio.sleep(pause)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        tasks = [task for task in [self._task, *self._refreshing.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def snapshot(self) -> dict:
+        """Return coverage and freshness for operators"""
+        ages = [entry.age for entry in self.entries.values()]
+        return {
+            "combinations": len(self.combinations),
+            "warm": len(self.entries),
+            "oldest_age_seconds": round(max(ages), 1) if ages else None,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "spent_today": self.spent_today,
+            "daily_budget": self.daily_budget,
+            "skipped_for_quota": self.skipped_for_quota,
+        }
+
+
+_prefetcher: Optional[HeadlinePrefetcher] = None
+
+
+def prefetch_enabled() -> bool:
+    return os.getenv("GNEWS_PREFETCH_ENABLED", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_prefetcher() -> Optional[HeadlinePrefetcher]:
+    """Return the running prefetcher, or None if it is not running"""
+    return _prefetcher
+
+
+def start_prefetcher(
+    fetch: Callable[[dict], Awaitable[dict]],
+    quota_remaining: Callable[[], Optional[int]],
+    categories: List[str],
+) -> Optional[HeadlinePrefetcher]:
+    """Create and start the prefetcher from the environment, if enabled"""
+    global _prefetcher
+    if not prefetch_enabled():
+        return None
+    _prefetcher = HeadlinePrefetcher(
+        fetch=fetch,
+        quota_remaining=quota_remaining,
+        categories=_env_list("GNEWS_PREFETCH_CATEGORIES", categories),
+        countries=_env_list("GNEWS_PREFETCH_COUNTRIES", ["us", "gb", "in", "ca", "au"]),
+        languages=_env_list("GNEWS_PREFETCH_LANGUAGES", ["en"]),
+        max_articles=int(os.getenv("GNEWS_PREFETCH_MAX_ARTICLES", 10)),
+        interval=float(os.getenv("GNEWS_PREFETCH_INTERVAL", 900)),
+        max_stale=float(os.getenv("GNEWS_PREFETCH_MAX_STALE", 21600)),
+        daily_budget=int(os.getenv("GNEWS_PREFETCH_DAILY_BUDGET", 50)),
+        quota_reserve=int(os.getenv("GNEWS_PREFETCH_QUOTA_RESERVE", 20)),
+    )
+    _prefetcher.start()
+    return _prefetcher
+
+
+async def stop_prefetcher() -> None:
+    """Stop the prefetcher at server shutdown"""
+    global _prefetcher
+    if _prefetcher is not None:
+        await _prefetcher.stop()
+        _prefetcher = None
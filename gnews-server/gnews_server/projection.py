@@ -0,0 +1,108 @@
+"""
+Response projection and compaction for tool payloads.
+
+Tools can ask for:
+- A subset of article fields (e.g. ["title", "url", "publishedAt"])
+- Truncated article content
+- Compact output: redundant keys and null values are dropped, the source
+  object is flattened to its name, and the payload is serialized once with
+  a fast JSON encoder (orjson when installed) without indentation
+"""
+
+import json
+from typing import Any, List, Optional, Union
+
+from mcp.types import TextContent
+from mcp_common.metrics import span
+
+from gnews_server.articles import Article, to_plain
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+ARTICLE_FIELDS = ("title", "description", "content", "url", "image", "publishedAt", "source")
+
+# Keys that only echo what the caller already sent
+REDUNDANT_KEYS = ("parameters_used",)
+
+FIELDS_DESCRIPTION = f"Article fields to return (default all). Choose from: {', '.join(ARTICLE_FIELDS)}"
+MAX_CONTENT_CHARS_DESCRIPTION = "Truncate article content to this many characters"
+COMPACT_DESCRIPTION = "Return a compact payload: no null values, no parameter echo, source flattened to its name"
+
+
+def validate_projection(fields: Optional[List[str]], max_content_chars: Optional[int]) -> None:
+    """Raise ValueError for unknown fields or a bad truncation length"""
+    if fields:
+        unknown = [field for field in fields if field not in ARTICLE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unsupported fields: {', '.join(unknown)}. Supported fields: {', '.join(ARTICLE_FIELDS)}")
+    if max_content_chars is not None and max_content_chars < 0:
+        raise ValueError("Max content chars must be 0 or greater")
+
+
+def project_article(article: dict, fields: Optional[List[str]] = None,
+                    max_content_chars: Optional[int] = None, compact: bool = False) -> dict:
+    """Return a new article dict with only the requested, truncated fields"""
+    projected = {}
+    for field in fields or article.keys():
+        if field not in article:
+            continue
+        value = article[field]
+        if field == "content" and max_content_chars is not None and isinstance(value, str) and len(value) > max_content_chars:
+            value = value[:max_content_chars] + "…"
+        if compact:
+            if value is None or value == "":
+                continue
+            if field == "source" and isinstance(value, dict):
+                value = value.get("name")
+        projected[field] = value
+    return projected
+
+
+def project_articles(articles: List[dict], fields: Optional[List[str]] = None,
+                     max_content_chars: Optional[int] = None, compact: bool = False) -> List[dict]:
+    if not fields and max_content_chars is None and not compact:
+        # Compact Articles (see articles.py) are only expanded here, on the way out
+        return [article.to_dict() if isinstance(article, Article) else article for article in articles]
+    return [project_article(article, fields, max_content_chars, compact) for article in articles]
+
+
+def _shape(response: dict, fields, max_content_chars, compact) -> dict:
+    shaped = {}
+    for key, value in response.items():
+        if compact and (key in REDUNDANT_KEYS or value is None):
+            continue
+        if key == "articles" and isinstance(value, list):
+            value = project_articles(value, fields, max_content_chars, compact)
+        elif key == "results" and isinstance(value, list):
+            value = [_shape(item, fields, max_content_chars, compact) for item in value]
+        shaped[key] = value
+    return shaped
+
+
+def encode_json(payload: Any) -> str:
+    """Serialize without indentation, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=to_plain).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=to_plain)
+
+
+def shape_response(response: dict, fields: Optional[List[str]] = None,
+                   max_content_chars: Optional[int] = None,
+                   compact: bool = False) -> Union[dict, TextContent]:
+    """
+    Apply field selection and truncation to a tool response.
+
+    In compact mode the response is returned pre-serialized as a single
+    TextContent, which skips FastMCP's indented re-encoding. Without any
+    option the response is returned as is, with compact Articles expanded
+    to plain dicts.
+    """
+    with span("shaping"):
+        shaped = _shape(response, fields, max_content_chars, compact)
+        if compact:
+            return TextContent(type="text", text=encode_json(shaped))
+    return shaped
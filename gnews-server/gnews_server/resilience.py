@@ -0,0 +1,303 @@
+"""
+Tail-latency and failure control for upstream GNews requests.
+
+- Deadlines: each tool call gets a time budget. The budget is kept in a
+  context variable, so the upstream request made on the tool's behalf sees
+  it. Per-attempt HTTP timeouts are capped to what is left, and the tool
+  stops waiting once it runs out.
+- Retries: idempotent GETs that fail with a network error or a 5xx reply
+  are retried with exponential backoff and full jitter. A retry is only
+  made when its backoff still fits in the deadline.
+- Hedging (optional): when an attempt is slower than a chosen percentile of
+  recent upstream latencies, a second identical request is sent. The first
+  reply wins and the other request is cancelled.
+- Circuit breaker: after consecutive upstream failures, calls fail fast, or
+  are served from cached data, until a probe request succeeds again.
+
+Cancellation reaches the upstream call because no step here detaches it
+from its caller. The shared call in singleflight.py is cancelled once its
+last waiter is gone.
+
+Configuration (environment variables):
+- GNEWS_DEADLINE_<TOOL>: seconds budget for a tool, e.g. GNEWS_DEADLINE_SEARCH_NEWS
+  (defaults are set per tool in server.py)
+- GNEWS_RETRY_MAX: retries after a network error or 5xx reply (default 2)
+- GNEWS_RETRY_BASE_DELAY: backoff before the first retry, in seconds (default 0.25)
+- GNEWS_RETRY_MAX_DELAY: longest backoff, in seconds (default 4)
+- GNEWS_HEDGE_PERCENTILE: latency percentile after which a request is hedged,
+  e.g. 0.95; empty or 0 disables hedging (default disabled)
+- GNEWS_HEDGE_MIN_SAMPLES: latencies recorded before hedging starts (default 20)
+- GNEWS_BREAKER_FAILURES: consecutive failures that open the circuit (default 5)
+- GNEWS_BREAKER_RESET: seconds the circuit stays open before a probe (default 30)
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import functools
+import contextlib
+import contextvars
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Absolute deadline (event loop time) of the tool call in progress
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("gnews_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a tool call's time budget runs out before the upstream reply"""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]):
+    """Limit the enclosed calls to `seconds`, or to an enclosing deadline if it is sooner"""
+    if seconds is None:
+        yield
+        return
+    expires_at = asyncio.get_running_loop().time() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(expires_at if outer is None else min(outer, expires_at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds left in the current deadline, or None when there is none"""
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return expires_at - asyncio.get_running_loop().time()
+
+
+def deadline_budget(default: float) -> Callable:
+    """
+    Give every call of an async tool a deadline.
+
+    The budget is read from GNEWS_DEADLINE_<TOOL NAME> when set. Apply below
+    @instrument_tool; the wrapped signature is preserved for FastMCP.
+    """
+    def decorator(fn: Callable) -> Callable:
+        setting = f"GNEWS_DEADLINE_{fn.__name__.upper()}"
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            budget = float(os.getenv(setting) or default)
+            with deadline(budget if budget > 0 else None):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by the current deadline"""
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 0.25, max_delay: float = 4.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.gave_up = 0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def wait(self, attempt: int) -> bool:
+        """Sleep before retry number `attempt` (from 0); False when no retry should be made"""
+        delay = self.backoff(attempt)
+        remaining = time_left()
+        if attempt >= self.max_retries or (remaining is not None and delay >= remaining):
+            self.gave_up += 1
+            return False
+        self.retries += 1
+        await asyncio.sleep(delay)
+        return True
+
+    def snapshot(self) -> dict:
+        return {"retries": self.retries, "gave_up": self.gave_up}
+
+
+class HedgePolicy:
+    """Send a second request when the first is slower than a percentile of recent latencies"""
+
+    def __init__(self, percentile: Optional[float] = None, min_samples: int = 20, window: int = 200):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._latencies: deque = deque(maxlen=window)
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or not yet calibrated"""
+        if not self.percentile or len(self._latencies) < self.min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile))]
+
+    async def run(self, call: Callable[[], Awaitable[T]],
+                  hedge_call: Optional[Callable[[], Awaitable[T]]] = None) -> T:
+        """
+        Run call(), and hedge_call() (default: call()) in parallel if the first
+        is slow. Return the first reply; the other request is cancelled.
+        """
+        primary = asyncio.ensure_future(call())
+        pending = {primary}
+        try:
+            delay = self.delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    self.hedged += 1
+                    hedge = asyncio.ensure_future((hedge_call or call)())
+                    pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": bool(self.percentile),
+            "threshold_seconds": self.delay(),
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+class CircuitBreaker:
+    """Closed, open or half-open; half-open lets a single probe request through"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether an upstream request may be made now"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless an upstream request may be made now"""
+        if not self.allow():
+            raise CircuitOpenError(
+                f"GNews API is failing; upstream calls are paused for {self.retry_after():.0f}s"
+            )
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("GNews API recovered; circuit closed")
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.opens += 1
+            logger.warning(f"GNews API failed {self.failures} times in a row; circuit open for {self.reset_timeout:.0f}s")
+
+    def release(self) -> None:
+        """Let another probe through when a probe ended without an outcome (cancelled)"""
+        self._probing = False
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "open": int(self.state == "open"),
+            "consecutive_failures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
+
+
+_retry_policy: Optional[RetryPolicy] = None
+_hedge_policy: Optional[HedgePolicy] = None
+_breaker: Optional[CircuitBreaker] = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the process-wide retry policy"""
+    global _retry_policy
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy(
+            max_retries=int(os.getenv("GNEWS_RETRY_MAX", 2)),
+            base_delay=float(os.getenv("GNEWS_RETRY_BASE_DELAY", 0.25)),
+            max_delay=float(os.getenv("GNEWS_RETRY_MAX_DELAY", 4)),
+        )
+    return _retry_policy
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """Return the process-wide hedging policy"""
+    global _hedge_policy
+    if _hedge_policy is None:
+        _hedge_policy = HedgePolicy(
+            percentile=float(os.getenv("GNEWS_HEDGE_PERCENTILE") or 0) or None,
+            min_samples=int(os.getenv("GNEWS_HEDGE_MIN_SAMPLES", 20)),
+        )
+    return _hedge_policy
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Return the process-wide upstream circuit breaker"""
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("GNEWS_BREAKER_FAILURES", 5)),
+            reset_timeout=float(os.getenv("GNEWS_BREAKER_RESET", 30)),
+        )
+    return _breaker
+
+
+def resilience_stats() -> dict:
+    """Return breaker state and retry and hedging counters"""
+    return {
+        "circuit": get_circuit_breaker().snapshot(),
+        "retry": get_retry_policy().snapshot(),
+        "hedge": get_hedge_policy().snapshot(),
+    }
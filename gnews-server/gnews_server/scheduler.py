@@ -0,0 +1,459 @@
+"""
+Quota-aware scheduler for upstream GNews requests.
+
+Every upstream call acquires a slot from the scheduler first, and the slot
+names the API key to send it with (see key_pool.py). For each key the
+scheduler:
+- Enforces a requests-per-second limit with a token bucket
+- Tracks the daily request quota (GNews resets quotas at 00:00 UTC)
+- Sidelines the key after a 429 response until Retry-After has passed, and
+  after a 403 (quota spent) until the quota resets
+Waiting calls are served in priority order, interactive tool calls first,
+each with the usable key that has the most quota left. Calls fail fast once
+every key's quota is spent instead of sending requests that will be rejected.
+
+Configuration (environment variables):
+- GNEWS_RATE_LIMIT_RPS: sustained requests per second per key, 0 to disable (default 1)
+- GNEWS_RATE_LIMIT_BURST: token bucket capacity per key (default 1)
+- GNEWS_DAILY_QUOTA: requests per UTC day per key, 0 for unlimited (default 100)
+- GNEWS_SCHEDULER_MAX_WAIT: seconds a call may wait for a slot (default 30)
+- MCP_WORKERS: server processes sharing the keys, set by
+  mcp_in_fastapi/serve.py (default 1). Each process gets an equal share of
+  every key's rate and daily quota, and adds its usage to the shared
+  usage store rather than overwriting the other processes' counts.
+"""
+
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from gnews_server.key_pool import KeyUsageStore, key_id, load_api_keys, open_usage_store
+
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Seconds between writes of per-key usage to the usage store
+USAGE_SAVE_INTERVAL = 5.0
+
+
+class QuotaExceededError(Exception):
+    """Raised when the daily quota is spent or a call waited too long for a slot"""
+
+
+def _next_utc_midnight(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self._refill()
+            self.tokens -= 1
+
+
+class DailyQuota:
+    """Requests remaining in the current UTC day"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.exhausted = False
+        self.resets_at = _next_utc_midnight()
+
+    def _roll_over(self) -> None:
+        if datetime.now(timezone.utc) >= self.resets_at:
+            self.used = 0
+            self.exhausted = False
+            self.resets_at = _next_utc_midnight()
+
+    @property
+    def remaining(self) -> Optional[int]:
+        self._roll_over()
+        if self.exhausted:
+            return 0
+        if self.limit <= 0:
+            return None
+        return max(0, self.limit - self.used)
+
+    def available(self) -> bool:
+        remaining = self.remaining
+        return remaining is None or remaining > 0
+
+    def consume(self) -> None:
+        self._roll_over()
+        self.used += 1
+
+    def mark_exhausted(self) -> None:
+        """Record that upstream reported the quota as spent"""
+        self._roll_over()
+        self.exhausted = True
+
+
+class ApiKeySlot:
+    """One API key with its own rate limit, daily quota and back-off"""
+
+    def __init__(self, key: Optional[str], rate: float, burst: float, daily_quota: int):
+        self.key = key
+        self.name = key_id(key) if key else "default"
+        self.bucket = TokenBucket(rate, burst)
+        self.quota = DailyQuota(daily_quota)
+        self.sidelined_until = 0.0
+        self.granted = 0
+        self.sidelined = 0
+
+    def ready_in(self, now: float) -> Optional[float]:
+        """Seconds until the key may be used (0 if now), or None while its quota is spent"""
+        if not self.quota.available():
+            return None
+        return max(0.0, self.sidelined_until - now, self.bucket.delay())
+
+    def budget(self) -> float:
+        remaining = self.quota.remaining
+        return float("inf") if remaining is None else remaining
+
+    @property
+    def day(self) -> str:
+        """The UTC day the quota counters belong to"""
+        return (self.quota.resets_at - timedelta(days=1)).date().isoformat()
+
+    def snapshot(self) -> dict:
+        return {
+            "key": self.name,
+            "quota_used_today": self.quota.used,
+            "quota_remaining": self.quota.remaining,
+            "sidelined_for_seconds": round(max(0.0, self.sidelined_until - time.monotonic()), 3),
+            "granted": self.granted,
+            "sidelined": self.sidelined,
+        }
+
+
+class UpstreamScheduler:
+    """Priority queue in front of the upstream API, spreading calls over the API keys"""
+
+    def __init__(self, rate: float, burst: float, daily_quota: int, max_wait: float,
+                 keys: Optional[List[str]] = None, usage: Optional[KeyUsageStore] = None, workers: int = 1):
+        # Each of `workers` processes paces its calls to its share of every key's limits
+        self.workers = max(1, workers)
+        rate = rate / self.workers
+        burst = burst / self.workers
+        if daily_quota > 0:
+            daily_quota = max(1, daily_quota // self.workers)
+        # Without keys, a single slot paces calls and acquire() returns None
+        self.slots = [ApiKeySlot(key, rate, burst, daily_quota) for key in (keys or [None])]
+        self.rate = rate
+        self.daily_quota = daily_quota
+        self.max_wait = max_wait
+        self.usage = usage
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._paused_until = 0.0
+        self._usage_dirty = False
+        self._usage_saved_at = 0.0
+        self._usage_save: Optional[asyncio.Task] = None
+        self._usage_timer: Optional[asyncio.TimerHandle] = None
+        # Per key name, the (day, used) already added to the usage store
+        self._usage_stored: Dict[str, Tuple[str, int]] = {}
+        self.usage_save_interval = USAGE_SAVE_INTERVAL
+        self.granted = 0
+        self.throttled = 0
+        self.rejected = 0
+        if usage is not None:
+            self._load_usage()
+
+    def _slots_for(self, key: Optional[str]) -> List[ApiKeySlot]:
+        return [slot for slot in self.slots if key is None or slot.key == key]
+
+    def available(self) -> bool:
+        """Whether any key has quota left today"""
+        return any(slot.quota.available() for slot in self.slots)
+
+    def quota_remaining(self) -> Optional[int]:
+        """Requests left today over all keys, or None when unlimited"""
+        remaining = [slot.quota.remaining for slot in self.slots]
+        return None if None in remaining else sum(remaining)
+
+    def _quota_error(self) -> QuotaExceededError:
+        resets_at = min(slot.quota.resets_at for slot in self.slots)
+        return QuotaExceededError(
+            f"GNews daily quota exhausted for every API key; it resets at {resets_at.isoformat()}"
+        )
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> Optional[str]:
+        """Wait for permission to send one upstream request, and return the API key to send it with"""
+        if not self.available():
+            self.rejected += 1
+            raise self._quota_error()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._counter), future))
+        self._ensure_dispatcher()
+        self._wakeup.set()
+
+        try:
+            return await asyncio.wait_for(future, timeout=self.max_wait or None)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise QuotaExceededError(
+                f"Timed out after {self.max_wait}s waiting for an upstream rate-limit slot"
+            )
+
+    def _pick(self, now: float) -> Tuple[Optional[ApiKeySlot], Optional[float]]:
+        """The usable key with the most budget left, or None and the seconds until one is usable"""
+        ready: List[ApiKeySlot] = []
+        soonest: Optional[float] = None
+        for slot in self.slots:
+            wait = slot.ready_in(now)
+            if wait is None:
+                continue
+            if wait <= 0:
+                ready.append(slot)
+            elif soonest is None or wait < soonest:
+                soonest = wait
+        if ready:
+            # Ties go to the fuller bucket, then to the key used least
+            return max(ready, key=lambda slot: (slot.budget(), slot.bucket.tokens, -slot.granted)), 0.0
+        return None, soonest
+
+    async def _dispatch(self) -> None:
+        while True:
+            # Drop waiters that gave up
+            while self._queue and self._queue[0][2].done():
+                heapq.heappop(self._queue)
+
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if not self.available():
+                error = self._quota_error()
+                while self._queue:
+                    _, _, future = heapq.heappop(self._queue)
+                    if not future.done():
+                        self.rejected += 1
+                        future.set_exception(error)
+                continue
+
+            now = time.monotonic()
+            slot, delay = self._pick(now)
+            delay = max(self._paused_until - now, delay or 0.0)
+            if slot is None or delay > 0:
+                self.throttled += 1
+                await asyncio.sleep(delay)
+                continue
+
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            slot.bucket.take()
+            slot.quota.consume()
+            slot.granted += 1
+            self.granted += 1
+            self._usage_changed()
+            future.set_result(slot.key)
+
+    def pause(self, seconds: float, key: Optional[str] = None) -> None:
+        """Stop using `key` (or every key) for `seconds` (used for Retry-After)"""
+        if key is None:
+            until = time.monotonic() + seconds
+            if until > self._paused_until:
+                logger.warning(f"Upstream asked us to back off; pausing dispatch for {seconds:.1f}s")
+                self._paused_until = until
+            return
+        for slot in self._slots_for(key):
+            slot.sidelined_until = max(slot.sidelined_until, time.monotonic() + seconds)
+            slot.sidelined += 1
+            logger.warning(f"API key {slot.name} was rate limited; sidelined for {seconds:.1f}s")
+
+    def mark_quota_exhausted(self, key: Optional[str] = None) -> None:
+        """Record that upstream reported the quota of `key` (or of every key) as spent"""
+        for slot in self._slots_for(key):
+            logger.warning(f"Upstream reported the daily quota of API key {slot.name} as exhausted")
+            slot.quota.mark_exhausted()
+        self._usage_changed()
+
+    def _load_usage(self) -> None:
+        for slot in self.slots:
+            if slot.key is None:
+                continue
+            saved = self.usage.load(slot.day).get(slot.name)
+            if saved is not None:
+                used, slot.quota.exhausted = saved
+                # The stored count is every process's; this one takes its share
+                slot.quota.used = math.ceil(used / self.workers)
+                self._usage_stored[slot.name] = (slot.day, slot.quota.used)
+        logger.info(f"Loaded API key usage for today: {[slot.snapshot() for slot in self.slots]}")
+
+    def _usage_rows(self) -> List[Tuple[str, str, int, bool]]:
+        """(key_id, day, requests since the last save, exhausted) for every key"""
+        rows = []
+        for slot in self.slots:
+            if slot.key is None:
+                continue
+            day, used = slot.day, slot.quota.used
+            saved_day, saved_used = self._usage_stored.get(slot.name, (day, 0))
+            rows.append((slot.name, day, used - saved_used if saved_day == day else used, slot.quota.exhausted))
+        return rows
+
+    def _usage_changed(self) -> None:
+        """Save per-key usage soon, at most every USAGE_SAVE_INTERVAL seconds"""
+        if self.usage is None:
+            return
+        self._usage_dirty = True
+        self._schedule_usage_save()
+
+    def _schedule_usage_save(self) -> None:
+        """Save now, or once the interval since the last save has passed"""
+        if self._usage_timer is not None or (self._usage_save is not None and not self._usage_save.done()):
+            return
+        wait = self._usage_saved_at + self.usage_save_interval - time.monotonic()
+        if wait > 0:
+            self._usage_timer = asyncio.get_running_loop().call_later(wait, self._flush_usage)
+        else:
+            self._usage_save = asyncio.create_task(self._save_usage())
+
+    def _flush_usage(self) -> None:
+        self._usage_timer = None
+        if self._usage_dirty and self.usage is not None:
+            self._schedule_usage_save()
+
+    async def _save_usage(self) -> None:
+        rows = self._usage_rows()
+        self._usage_dirty = False
+        self._usage_saved_at = time.monotonic()
+        try:
+            await asyncio.to_thread(self.usage.add, rows)
+            for name, day, added, _ in rows:
+                saved_day, saved_used = self._usage_stored.get(name, (day, 0))
+                self._usage_stored[name] = (day, saved_used + added if saved_day == day else added)
+        except Exception as e:
+            self._usage_dirty = True
+            logger.error(f"Could not save API key usage: {e}")
+        if self._usage_dirty and self.usage is not None:
+            # Changed while saving, or the save failed: save again after the interval
+            self._usage_save = None
+            self._schedule_usage_save()
+
+    def snapshot(self) -> dict:
+        """Return quota and queue state for operators"""
+        now = time.monotonic()
+        return {
+            "api_keys": len(self.slots),
+            "workers": self.workers,
+            "keys_usable": sum(1 for slot in self.slots if slot.ready_in(now) is not None),
+            "daily_quota_per_key": self.daily_quota or None,
+            "quota_used_today": sum(slot.quota.used for slot in self.slots),
+            "quota_remaining": self.quota_remaining(),
+            "quota_resets_at": min(slot.quota.resets_at for slot in self.slots).isoformat(),
+            "rate_limit_rps": self.rate * len(self.slots) or None,
+            "queued": sum(1 for _, _, future in self._queue if not future.done()),
+            "paused_for_seconds": round(max(0.0, self._paused_until - now), 3),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "keys": [slot.snapshot() for slot in self.slots],
+        }
+
+    async def close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        if self.usage is not None:
+            if self._usage_timer is not None:
+                self._usage_timer.cancel()
+                self._usage_timer = None
+            if self._usage_save is not None:
+                await self._usage_save
+            if self._usage_dirty:
+                await self._save_usage()
+            self.usage.close()
+            self.usage = None
+
+
+_scheduler: Optional[UpstreamScheduler] = None
+
+
+def get_scheduler() -> UpstreamScheduler:
+    """Return the process-wide scheduler, configured from the environment"""
+    global _scheduler
+    if _scheduler is None:
+        keys = load_api_keys()
+        daily_quota = int(os.getenv("GNEWS_DAILY_QUOTA", 100))
+        _scheduler = UpstreamScheduler(
+            rate=float(os.getenv("GNEWS_RATE_LIMIT_RPS", 1)),
+            burst=float(os.getenv("GNEWS_RATE_LIMIT_BURST", 1)),
+            daily_quota=daily_quota,
+            max_wait=float(os.getenv("GNEWS_SCHEDULER_MAX_WAIT", 30)),
+            keys=keys or None,
+            usage=open_usage_store() if keys and daily_quota > 0 else None,
+            workers=int(os.getenv("MCP_WORKERS", 1)),
+        )
+        logger.info(f"Upstream scheduler using {len(keys)} API key(s)")
+    return _scheduler
+
+
+async def close_scheduler() -> None:
+    """Stop the dispatcher at server shutdown"""
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.close()
+        _scheduler = None
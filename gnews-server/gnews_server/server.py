@@ -0,0 +1,1269 @@
+"""
+GNews API MCP Server
+
+This server provides access to the GNews API through the Model Context Protocol (MCP).
+It exposes these main tools for fetching news data:
+1. search_news - Search for news articles with specific keywords
+2. get_top_headlines - Get trending news articles by category
+3. search_news_batch - Run many searches concurrently in one call
+4. search_news_paginated - Walk result pages, streaming each page as progress
+5. local_search - Query previously fetched articles without an upstream call
+6. get_global_headlines - Top headlines for many regions in one call, merged and ranked
+7. get_trending_terms - Terms rising in recently fetched articles, without an upstream call
+
+Features:
+- Full support for GNews API parameters
+- Comprehensive error handling
+- Input validation
+- Proper response formatting
+- Shared, pooled upstream HTTP client (see http_client.py)
+- Tiered response cache (see cache.py)
+- Coalescing of identical in-flight requests (see singleflight.py)
+- Quota-aware, prioritized upstream scheduling (see scheduler.py)
+- A pool of API keys balanced by remaining quota (see key_pool.py)
+- Local full-text article store (see article_store.py)
+- Cross-query and cross-page deduplication (see dedup.py)
+- Field selection, truncation and compact output (see projection.py)
+- Background headline prefetching with stale-while-revalidate (see prefetch.py)
+- Queued, redacted and sampled logging (see logging_config.py)
+- Prometheus metrics at /metrics and optional per-call timing spans (see mcp_common.metrics)
+- Article handles with full articles served as gnews://article/{id} resources (see article_resources.py)
+- Delta mode returning only articles new since a cursor (see delta.py)
+- Per-tool deadlines, retries, hedged requests and a circuit breaker (see resilience.py)
+- Trending terms over a sliding window of fetched articles (see trending.py)
+- Stateless or resumable streamable-http sessions, as configured for the deployment (see mcp_common.deployment)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import contextlib
+from typing import Optional, Literal, List, Tuple
+from datetime import datetime
+from enum import Enum
+
+import anyio
+import httpx
+from pydantic import BaseModel, ConfigDict, Field, validator
+from mcp.server.fastmcp import FastMCP, Context
+from dotenv import load_dotenv
+from starlette.requests import Request
+from starlette.responses import Response
+from mcp_common.deployment import report_progress, server_options
+from mcp_common.metrics import CONTENT_TYPE, REGISTRY, SIZE_BUCKETS, gauge_lines, instrument_server, instrument_tool, span
+
+from gnews_server import http_client
+from gnews_server.articles import Article, decode_response
+from gnews_server.cache import get_cache, close_cache, cache_key
+from gnews_server.singleflight import SingleFlight
+from gnews_server.dedup import dedupe_articles, new_deduplicator
+from gnews_server.fanout import RANKING_FIELDS, merge_headlines, region_label
+from gnews_server.projection import (
+    COMPACT_DESCRIPTION,
+    FIELDS_DESCRIPTION,
+    MAX_CONTENT_CHARS_DESCRIPTION,
+    encode_json,
+    project_articles,
+    shape_response,
+    validate_projection,
+)
+from gnews_server.article_store import get_article_store, close_article_store
+from gnews_server.article_resources import URI_TEMPLATE, get_article_resources
+from gnews_server.delta import CURSOR_DESCRIPTION, DELTA_DESCRIPTION, get_delta_tracker
+from gnews_server.trending import close_trend_tracker, get_trend_tracker
+from gnews_server.logging_config import PER_REQUEST, configure_logging, logging_stats, redact_library_logs
+from gnews_server.key_pool import load_api_keys
+from gnews_server.prefetch import get_prefetcher, start_prefetcher, stop_prefetcher
+from gnews_server.resilience import (
+    CircuitOpenError,
+    DeadlineExceeded,
+    deadline_budget,
+    get_circuit_breaker,
+    get_hedge_policy,
+    get_retry_policy,
+    resilience_stats,
+    time_left,
+)
+from gnews_server.scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    get_scheduler,
+    close_scheduler,
+    parse_retry_after,
+)
+
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Create FastMCP server
+mcp = FastMCP(
+    name="gnews-server",
+    instructions="A Model Context Protocol server for accessing GNews API. Provides tools to search news articles and get top headlines.",
+    port=int(os.getenv("GNEWS_SERVER_PORT", 8000)),
+    host="localhost",
+    **server_options(),
+)
+instrument_server(mcp)
+
+# Supported languages and countries (from GNews API documentation)
+SUPPORTED_LANGUAGES = {
+    "ar": "Arabic", "zh": "Chinese", "nl": "Dutch", "en": "English",
+    "fr": "French", "de": "German", "el": "Greek", "hi": "Hindi",
+    "it": "Italian", "ja": "Japanese", "ml": "Malayalam", "mr": "Marathi",
+    "no": "Norwegian", "pt": "Portuguese", "ro": "Romanian", "ru": "Russian",
+    "es": "Spanish", "sv": "Swedish", "ta": "Tamil", "te": "Telugu", "uk": "Ukrainian"
+}
+
+SUPPORTED_COUNTRIES = {
+    "au": "Australia", "br": "Brazil", "ca": "Canada", "cn": "China",
+    "eg": "Egypt", "fr": "France", "de": "Germany", "gr": "Greece",
+    "hk": "Hong Kong", "in": "India", "ie": "Ireland", "it": "Italy",
+    "jp": "Japan", "nl": "Netherlands", "no": "Norway", "pk": "Pakistan",
+    "pe": "Peru", "ph": "Philippines", "pt": "Portugal", "ro": "Romania",
+    "ru": "Russian Federation", "sg": "Singapore", "es": "Spain",
+    "se": "Sweden", "ch": "Switzerland", "tw": "Taiwan", "ua": "Ukraine",
+    "gb": "United Kingdom", "us": "United States"
+}
+
+CATEGORIES = [
+    "general", "world", "nation", "business", "technology", 
+    "entertainment", "sports", "science", "health"
+]
+
+QUERY_SYNTAX = """# GNews query syntax
+
+- Keywords: `Apple iPhone` matches articles containing both words
+- Exact phrase: `"Apple iPhone 15"` (in double quotes)
+- AND: `Apple AND iPhone` requires both terms (the default between words)
+- OR: `Apple OR Microsoft` matches either term
+- NOT: `Apple NOT iPhone` excludes articles containing the second term
+- Grouping: `(Apple AND iPhone) OR Microsoft`
+
+Operators must be uppercase. Special characters other than quotes and
+parentheses should be avoided. Use search_in to restrict matching to the
+title, description or content.
+"""
+
+# Static resources are serialized once, at startup
+LANGUAGES_RESOURCE = json.dumps(SUPPORTED_LANGUAGES, indent=2)
+COUNTRIES_RESOURCE = json.dumps(SUPPORTED_COUNTRIES, indent=2)
+
+DETAIL_DESCRIPTION = (
+    "'handles' (default) returns id, resource uri, title, source, publishedAt and url per article; "
+    "read the uri (gnews://article/{id}) for the full article. 'full' returns full articles. "
+    "Setting fields or max_content_chars implies 'full'"
+)
+
+# Identical concurrent upstream requests share one call
+inflight = SingleFlight()
+
+# Upstream metrics, exposed with the tool metrics at /metrics
+UPSTREAM_DURATION = REGISTRY.histogram(
+    "gnews_upstream_duration_seconds", "GNews API request latency", ("endpoint",)
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "gnews_upstream_responses_total", "GNews API responses by status code", ("endpoint", "status")
+)
+UPSTREAM_RESPONSE_BYTES = REGISTRY.histogram(
+    "gnews_upstream_response_bytes", "GNews API response body size", ("endpoint",), SIZE_BUCKETS
+)
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "gnews_upstream_in_flight", "GNews API requests currently open"
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "gnews_cache_lookups_total", "Response cache lookups by result", ("result",)
+)
+
+
+class NewsResponse(BaseModel):
+    """Represents a news API response"""
+    totalArticles: int
+    articles: List[Article]
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+def get_api_key() -> str:
+    """Get the (first) GNews API key from environment variables"""
+    keys = load_api_keys()
+    if not keys:
+        raise ValueError(
+            "GNEWS_API_KEY (or GNEWS_API_KEYS for a pool of keys) environment variable is required. "
+            "Get your free API key from https://gnews.io/"
+        )
+    return keys[0]
+
+
+async def make_gnews_request(
+    endpoint: str,
+    params: dict,
+    priority: int = PRIORITY_INTERACTIVE,
+    use_cache: bool = True,
+) -> dict:
+    """
+    Make a request to the GNews API.
+
+    Repeated queries are served from the cache, concurrent identical
+    queries share a single upstream request, and upstream calls are paced
+    by the quota-aware scheduler (lower priority values are served first).
+    Pass use_cache=False to force a refresh; the result is still cached.
+
+    The wait is bounded by the calling tool's deadline (see resilience.py).
+    While the circuit breaker is open, or when the deadline passes, a
+    recently expired cached response is returned instead when there is one;
+    it carries a "freshness" entry saying so.
+    """
+    cache = get_cache()
+    if cache is not None and use_cache:
+        with span("cache_lookup"):
+            cached = await cache.get(endpoint, params)
+        CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+        if cached is not None:
+            logger.info("Cache hit for %s", endpoint, extra=PER_REQUEST)
+            return cached
+
+    key = cache_key(endpoint, params)
+    remaining = time_left()
+    try:
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded("The tool's deadline passed before the GNews API was called")
+        try:
+            async with asyncio.timeout(remaining):
+                return await inflight.do(key, lambda: _fetch_from_gnews(endpoint, dict(params), priority))
+        except TimeoutError:
+            raise DeadlineExceeded(f"The GNews API did not answer within the tool's {remaining:.1f}s deadline")
+    except (CircuitOpenError, DeadlineExceeded) as e:
+        stale = cache.get_stale(endpoint, params) if cache is not None else None
+        if stale is None:
+            raise
+        value, age = stale
+        logger.warning("Serving expired cached %s response: %s", endpoint, e, extra=PER_REQUEST)
+        return {**value, "freshness": {"expired_seconds": round(age, 1), "stale": True, "source": "cache", "reason": str(e)}}
+
+
+# Replies worth retrying; other errors would fail again
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+async def _fetch_from_gnews(endpoint: str, params: dict, priority: int) -> dict:
+    """Perform one upstream request, with retries and hedging, and cache a successful response"""
+    # Fail early when no key is configured
+    get_api_key()
+    
+    # Base URL for GNews API (overridable to point at a local stand-in)
+    base_url = os.getenv("GNEWS_BASE_URL", "https://gnews.io/api/v4")
+    url = f"{base_url}/{endpoint}"
+    
+    scheduler = get_scheduler()
+    breaker = get_circuit_breaker()
+    retry = get_retry_policy()
+    hedge = get_hedge_policy()
+    max_rate_limit_retries = int(os.getenv("GNEWS_MAX_RATE_LIMIT_RETRIES", 2))
+    rate_limited = 0
+    failures = 0
+    client = http_client.get_client()
+    
+    async def send(key: Optional[str]) -> Tuple[Optional[str], httpx.Response]:
+        # The API key goes into a private copy of the parameters
+        request_params = {**params, "apikey": key or get_api_key()}
+        return key, await _timed_get(client, endpoint, url, request_params)
+    
+    async def send_hedge() -> Tuple[Optional[str], httpx.Response]:
+        # A hedge is a second upstream request and is paced like any other
+        return await send(await scheduler.acquire(priority))
+    
+    while True:
+        breaker.check()
+        try:
+            with span("queue_wait"):
+                key = await scheduler.acquire(priority)
+            logger.info("Making request to %s with params: %s", endpoint, params, extra=PER_REQUEST)
+            key, response = await hedge.run(lambda: send(key), send_hedge)
+        except httpx.RequestError as e:
+            breaker.record_failure()
+            error_msg = f"Network error connecting to GNews API: {str(e)}"
+            if await retry.wait(failures):
+                failures += 1
+                logger.warning("%s; retrying", error_msg, extra=PER_REQUEST)
+                continue
+            logger.error(error_msg)
+            raise Exception(error_msg)
+        except BaseException:
+            # Cancelled, or no slot from the scheduler: no verdict on upstream health
+            breaker.release()
+            raise
+        
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        
+        if response.status_code == 200:
+            with span("decode"):
+                data = decode_response(response.content)
+            logger.info("Successfully retrieved %s articles", data.get("totalArticles", 0), extra=PER_REQUEST)
+            cache = get_cache()
+            if cache is not None:
+                await cache.set(endpoint, params, data)
+            store = get_article_store()
+            if store is not None:
+                store.ingest_later(
+                    data.get("articles", []),
+                    lang=params.get("lang"),
+                    country=params.get("country"),
+                    category=params.get("category"),
+                )
+            trends = get_trend_tracker()
+            if trends is not None:
+                trends.observe(
+                    data.get("articles", []),
+                    lang=params.get("lang"),
+                    country=params.get("country"),
+                    category=params.get("category"),
+                )
+            return data
+        
+        if response.status_code == 429:
+            # Rate limited: sideline the key and queue the call again (for another key if there is one)
+            scheduler.pause(parse_retry_after(response.headers.get("Retry-After")), key=key)
+            if rate_limited < max_rate_limit_retries:
+                rate_limited += 1
+                continue
+        elif response.status_code == 403:
+            # GNews answers 403 once the daily quota is spent; move on to a key with quota left
+            scheduler.mark_quota_exhausted(key)
+            if key is not None and scheduler.available():
+                continue
+        elif response.status_code in RETRYABLE_STATUSES and await retry.wait(failures):
+            failures += 1
+            logger.warning("GNews API error %s; retrying", response.status_code, extra=PER_REQUEST)
+            continue
+        
+        error_msg = f"GNews API error: {response.status_code}"
+        try:
+            error_data = response.json()
+            if "errors" in error_data:
+                error_msg += f" - {error_data['errors']}"
+        except:
+            error_msg += f" - {response.text}"
+        
+        logger.error(error_msg)
+        raise Exception(error_msg)
+
+
+async def _timed_get(client: httpx.AsyncClient, endpoint: str, url: str, params: dict) -> httpx.Response:
+    """Issue one upstream GET, within the deadline, and record its latency, status and size"""
+    UPSTREAM_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    try:
+        with span("upstream"):
+            response = await client.get(url, params=params, timeout=http_client.request_timeout(client, time_left()))
+    except httpx.RequestError:
+        UPSTREAM_RESPONSES.inc(endpoint=endpoint, status="network_error")
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec()
+        UPSTREAM_DURATION.observe(time.perf_counter() - start, endpoint=endpoint)
+    if response.status_code < 500:
+        get_hedge_policy().record(time.perf_counter() - start)
+    UPSTREAM_RESPONSES.inc(endpoint=endpoint, status=str(response.status_code))
+    UPSTREAM_RESPONSE_BYTES.observe(len(response.content), endpoint=endpoint)
+    return response
+
+
+def build_search_params(
+    q: str,
+    lang: Optional[str] = None,
+    country: Optional[str] = None,
+    max_articles: Optional[int] = 10,
+    search_in: Optional[str] = None,
+    nullable: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sortby: Optional[str] = "publishedAt",
+    page: Optional[int] = 1,
+) -> dict:
+    """Validate search_news arguments and build the upstream request parameters"""
+    
+    # Validate parameters
+    if lang and lang not in SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported language '{lang}'. Supported languages: {', '.join(SUPPORTED_LANGUAGES.keys())}")
+    
+    if country and country not in SUPPORTED_COUNTRIES:
+        raise ValueError(f"Unsupported country '{country}'. Supported countries: {', '.join(SUPPORTED_COUNTRIES.keys())}")
+    
+    if max_articles and (max_articles < 1 or max_articles > 100):
+        raise ValueError("Max articles must be between 1 and 100")
+    
+    if page and page < 1:
+        raise ValueError("Page must be 1 or greater")
+    
+    # Build request parameters
+    params = {"q": q}
+    
+    if lang:
+        params["lang"] = lang
+    if country:
+        params["country"] = country
+    if max_articles:
+        params["max"] = max_articles
+    if search_in:
+        params["in"] = search_in
+    if nullable:
+        params["nullable"] = nullable
+    if date_from:
+        params["from"] = date_from
+    if date_to:
+        params["to"] = date_to
+    if sortby:
+        params["sortby"] = sortby
+    if page:
+        params["page"] = page
+    
+    return params
+
+
+def with_handles(response: dict, detail: Optional[str], fields: Optional[List[str]],
+                 max_content_chars: Optional[int]) -> dict:
+    """Swap full articles for resource handles unless the caller asked for article fields"""
+    if detail == "full" or fields or max_content_chars is not None or not response.get("success"):
+        return response
+    with span("handles"):
+        handles = get_article_resources().put_many(response.get("articles", []))
+    return {**response, "articles": handles}
+
+
+async def run_search(q: str, params: dict, dedupe: bool = True, use_cache: bool = True) -> dict:
+    """Run a validated search and format the tool response"""
+    try:
+        result = await make_gnews_request("search", params, use_cache=use_cache)
+        articles = result.get("articles", [])
+        removed = 0
+        if dedupe:
+            with span("dedup"):
+                articles, removed = dedupe_articles(articles)
+        return {
+            "success": True,
+            "query": q,
+            "totalArticles": result.get("totalArticles", 0),
+            "articles": articles,
+            "duplicates_removed": removed,
+            "parameters_used": params
+        } | ({"freshness": result["freshness"]} if "freshness" in result else {})
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "query": q,
+            "parameters_used": params
+        }
+
+
+@mcp.tool()
+@instrument_tool
+@deadline_budget(20.0)
+async def search_news(
+    q: str = Field(description="Search keywords. Use logical operators like AND, OR, NOT. Use quotes for exact phrases."),
+    lang: Optional[str] = Field(default=None, description=f"Language code (2 letters). Supported: {', '.join(SUPPORTED_LANGUAGES.keys())}"),
+    country: Optional[str] = Field(default=None, description=f"Country code (2 letters). Supported: {', '.join(SUPPORTED_COUNTRIES.keys())}"),
+    max_articles: Optional[int] = Field(default=10, description="Number of articles to return (1-100)"),
+    search_in: Optional[str] = Field(default=None, description="Search in specific fields: title, description, content (comma-separated)"),
+    nullable: Optional[str] = Field(default=None, description="Allow null values for: description, content, image (comma-separated)"),
+    date_from: Optional[str] = Field(default=None, description="Filter articles from this date (ISO 8601 format: YYYY-MM-DDTHH:MM:SS.sssZ)"),
+    date_to: Optional[str] = Field(default=None, description="Filter articles until this date (ISO 8601 format: YYYY-MM-DDTHH:MM:SS.sssZ)"),
+    sortby: Optional[Literal["publishedAt", "relevance"]] = Field(default="publishedAt", description="Sort by publication date or relevance"),
+    page: Optional[int] = Field(default=1, description="Page number for pagination"),
+    fields: Optional[List[str]] = Field(default=None, description=FIELDS_DESCRIPTION),
+    max_content_chars: Optional[int] = Field(default=None, description=MAX_CONTENT_CHARS_DESCRIPTION),
+    compact: Optional[bool] = Field(default=False, description=COMPACT_DESCRIPTION),
+    detail: Optional[Literal["handles", "full"]] = Field(default="handles", description=DETAIL_DESCRIPTION),
+    delta: Optional[bool] = Field(default=False, description=DELTA_DESCRIPTION),
+    cursor: Optional[str] = Field(default=None, description=CURSOR_DESCRIPTION)
+) -> dict:
+    """
+    Search for news articles using specific keywords.
+    
+    This tool allows you to search for news articles based on keywords with various
+    filtering options including language, country, date range, and sorting preferences.
+    
+    Query Syntax Examples:
+    - Simple search: "Apple iPhone"
+    - Exact phrase: '"Apple iPhone 15"'
+    - Logical operators: "Apple AND iPhone", "Apple OR Microsoft", "Apple NOT iPhone"
+    - Complex queries: "(Apple AND iPhone) OR Microsoft"
+    
+    Returns a structured response with a handle per article (title, source,
+    publishedAt, URL and a gnews://article/{id} resource URI for the full
+    article). Use detail="full", fields or max_content_chars to get article
+    bodies inline, and compact to shrink the response.
+    
+    For monitoring a topic, pass delta=True and then the returned next_cursor
+    on each later call: only articles not returned before come back.
+    """
+    
+    with span("validation"):
+        validate_projection(fields, max_content_chars)
+        params = build_search_params(
+            q, lang=lang, country=country, max_articles=max_articles, search_in=search_in,
+            nullable=nullable, date_from=date_from, date_to=date_to, sortby=sortby, page=page
+        )
+        tracker = get_delta_tracker()
+        stream = tracker.open("search", params, cursor) if delta or cursor else None
+        if stream is not None:
+            params = tracker.request_params(stream, params)
+    # A poll with a cursor asks what is new now, so it must not be answered from the cache
+    response = await run_search(q, params, use_cache=not cursor)
+    if stream is not None and response["success"]:
+        response = tracker.advance(stream, response)
+    response = with_handles(response, detail, fields, max_content_chars)
+    return shape_response(response, fields, max_content_chars, compact)
+
+
+class SearchQuery(BaseModel):
+    """One query in a search_news_batch call; mirrors the search_news parameters"""
+    q: str = Field(description="Search keywords. Use logical operators like AND, OR, NOT. Use quotes for exact phrases.")
+    lang: Optional[str] = Field(default=None, description="Language code (2 letters)")
+    country: Optional[str] = Field(default=None, description="Country code (2 letters)")
+    max_articles: Optional[int] = Field(default=10, description="Number of articles to return (1-100)")
+    search_in: Optional[str] = Field(default=None, description="Search in specific fields: title, description, content (comma-separated)")
+    nullable: Optional[str] = Field(default=None, description="Allow null values for: description, content, image (comma-separated)")
+    date_from: Optional[str] = Field(default=None, description="Filter articles from this date (ISO 8601)")
+    date_to: Optional[str] = Field(default=None, description="Filter articles until this date (ISO 8601)")
+    sortby: Optional[Literal["publishedAt", "relevance"]] = Field(default="publishedAt", description="Sort by publication date or relevance")
+    page: Optional[int] = Field(default=1, description="Page number for pagination")
+
+
+MAX_BATCH_QUERIES = 50
+
+
+@mcp.tool()
+@instrument_tool
+@deadline_budget(60.0)
+async def search_news_batch(
+    queries: List[SearchQuery] = Field(description=f"Query specs, each taking the same parameters as search_news (1-{MAX_BATCH_QUERIES})"),
+    max_concurrency: Optional[int] = Field(default=5, description="Maximum number of queries run at the same time (1-10)"),
+    fields: Optional[List[str]] = Field(default=None, description=FIELDS_DESCRIPTION),
+    max_content_chars: Optional[int] = Field(default=None, description=MAX_CONTENT_CHARS_DESCRIPTION),
+    compact: Optional[bool] = Field(default=False, description=COMPACT_DESCRIPTION)
+) -> dict:
+    """
+    Run several news searches in one call.
+    
+    Use this instead of repeated search_news calls when you need many related
+    queries, for example one per company in a portfolio. Queries run
+    concurrently and each one reports its own success or failure, so one bad
+    query does not fail the whole batch.
+    
+    Returns one result per query, in the order given, with the same shape as
+    a search_news response.
+    """
+    
+    # Validate parameters
+    if not queries or len(queries) > MAX_BATCH_QUERIES:
+        raise ValueError(f"Batch must contain between 1 and {MAX_BATCH_QUERIES} queries")
+    
+    if max_concurrency and (max_concurrency < 1 or max_concurrency > 10):
+        raise ValueError("Max concurrency must be between 1 and 10")
+    
+    validate_projection(fields, max_content_chars)
+    
+    semaphore = asyncio.Semaphore(max_concurrency or 5)
+    
+    async def run_one(spec: SearchQuery) -> dict:
+        try:
+            params = build_search_params(**spec.model_dump())
+        except ValueError as e:
+            return {"success": False, "error": str(e), "query": spec.q}
+        async with semaphore:
+            return await run_search(spec.q, params, dedupe=False)
+    
+    logger.info("Running batch of %d searches (concurrency %d)", len(queries), max_concurrency or 5, extra=PER_REQUEST)
+    results = await asyncio.gather(*(run_one(spec) for spec in queries))
+    
+    # Drop stories already returned by an earlier query in the batch
+    deduplicator = new_deduplicator()
+    if deduplicator is not None:
+        for result in results:
+            if result["success"]:
+                before = deduplicator.removed
+                result["articles"] = deduplicator.filter(result["articles"])
+                result["duplicates_removed"] = deduplicator.removed - before
+    
+    succeeded = sum(1 for result in results if result["success"])
+    return shape_response({
+        "success": True,
+        "total_queries": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }, fields, max_content_chars, compact)
+
+
+MAX_PAGINATED_ARTICLES = 1000
+
+
+@mcp.tool()
+@instrument_tool
+async def search_news_paginated(
+    q: str = Field(description="Search keywords. Use logical operators like AND, OR, NOT. Use quotes for exact phrases."),
+    lang: Optional[str] = Field(default=None, description=f"Language code (2 letters). Supported: {', '.join(SUPPORTED_LANGUAGES.keys())}"),
+    country: Optional[str] = Field(default=None, description=f"Country code (2 letters). Supported: {', '.join(SUPPORTED_COUNTRIES.keys())}"),
+    search_in: Optional[str] = Field(default=None, description="Search in specific fields: title, description, content (comma-separated)"),
+    nullable: Optional[str] = Field(default=None, description="Allow null values for: description, content, image (comma-separated)"),
+    date_from: Optional[str] = Field(default=None, description="Filter articles from this date (ISO 8601 format: YYYY-MM-DDTHH:MM:SS.sssZ)"),
+    date_to: Optional[str] = Field(default=None, description="Filter articles until this date (ISO 8601 format: YYYY-MM-DDTHH:MM:SS.sssZ)"),
+    sortby: Optional[Literal["publishedAt", "relevance"]] = Field(default="publishedAt", description="Sort by publication date or relevance"),
+    page_size: Optional[int] = Field(default=10, description="Articles requested per upstream page (1-100)"),
+    max_total_articles: Optional[int] = Field(default=100, description=f"Stop once this many articles are collected (1-{MAX_PAGINATED_ARTICLES})"),
+    deadline_seconds: Optional[float] = Field(default=30.0, description="Stop fetching new pages after this many seconds"),
+    include_articles: Optional[bool] = Field(default=True, description="Include every collected article in the final result. Set to false when consuming the streamed pages instead"),
+    fields: Optional[List[str]] = Field(default=None, description=FIELDS_DESCRIPTION),
+    max_content_chars: Optional[int] = Field(default=None, description=MAX_CONTENT_CHARS_DESCRIPTION),
+    compact: Optional[bool] = Field(default=False, description=COMPACT_DESCRIPTION),
+    ctx: Context = None
+) -> dict:
+    """
+    Search for news articles across many pages in one call.
+    
+    Walks result pages until max_total_articles are collected, the results
+    run out, or the deadline passes. The next page is prefetched while the
+    current one is delivered. When the client sends a progress token, each
+    page is streamed as soon as it arrives as a progress notification whose
+    message is a JSON object: {"page": n, "articles": [...]}.
+    
+    Accepts the same search parameters as search_news.
+    """
+    
+    # Validate parameters
+    if page_size and (page_size < 1 or page_size > 100):
+        raise ValueError("Page size must be between 1 and 100")
+    
+    if max_total_articles and (max_total_articles < 1 or max_total_articles > MAX_PAGINATED_ARTICLES):
+        raise ValueError(f"Max total articles must be between 1 and {MAX_PAGINATED_ARTICLES}")
+    
+    if deadline_seconds is not None and deadline_seconds <= 0:
+        raise ValueError("Deadline must be greater than 0 seconds")
+    
+    validate_projection(fields, max_content_chars)
+    
+    page_size = page_size or 10
+    budget = max_total_articles or 100
+    
+    def params_for(page: int) -> dict:
+        return build_search_params(
+            q, lang=lang, country=country, max_articles=page_size, search_in=search_in,
+            nullable=nullable, date_from=date_from, date_to=date_to, sortby=sortby, page=page
+        )
+    
+    first_params = params_for(1)
+    
+    # Progress notifications need an active request with a progress token
+    streaming = False
+    if ctx is not None:
+        try:
+            streaming = ctx.request_context.meta is not None and ctx.request_context.meta.progressToken is not None
+        except ValueError:
+            streaming = False
+    
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (deadline_seconds or 30.0)
+    articles: List[dict] = []
+    total_available = 0
+    pages_fetched = 0
+    stopped_because = "exhausted"
+    error = None
+    
+    # Drop stories already delivered on an earlier page
+    deduplicator = new_deduplicator()
+    
+    page = 1
+    next_page = asyncio.create_task(make_gnews_request("search", first_params))
+    try:
+        while next_page is not None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                stopped_because = "deadline"
+                break
+            try:
+                result = await asyncio.wait_for(asyncio.shield(next_page), remaining)
+            except asyncio.TimeoutError:
+                stopped_because = "deadline"
+                break
+            except Exception as e:
+                error = str(e)
+                stopped_because = "error"
+                break
+            
+            page_articles = result.get("articles", [])
+            total_available = result.get("totalArticles", 0)
+            unique = deduplicator.filter(page_articles) if deduplicator is not None else page_articles
+            kept = unique[:budget - len(articles)]
+            articles.extend(kept)
+            pages_fetched += 1
+            
+            # Prefetch the next page before delivering this one
+            next_page = None
+            if len(articles) >= budget:
+                stopped_because = "budget"
+            elif len(page_articles) >= page_size and page * page_size < total_available:
+                next_page = asyncio.create_task(make_gnews_request("search", params_for(page + 1)))
+            
+            if streaming:
+                await report_progress(
+                    ctx,
+                    progress=len(articles),
+                    total=min(budget, total_available) or budget,
+                    message=encode_json({
+                        "page": page,
+                        "articles": project_articles(kept, fields, max_content_chars, compact)
+                    })
+                )
+            page += 1
+    finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+    
+    logger.info(
+        "Paginated search collected %d articles over %d pages (%s)",
+        len(articles), pages_fetched, stopped_because, extra=PER_REQUEST
+    )
+    first_params.pop("page", None)
+    response = {
+        "success": error is None or bool(articles),
+        "query": q,
+        "totalArticles": total_available,
+        "articles_collected": len(articles),
+        "pages_fetched": pages_fetched,
+        "duplicates_removed": deduplicator.removed if deduplicator is not None else 0,
+        "stopped_because": stopped_because,
+        "parameters_used": first_params
+    }
+    if error is not None:
+        response["error"] = error
+    if include_articles:
+        response["articles"] = articles
+    return shape_response(response, fields, max_content_chars, compact)
+
+
+@mcp.tool()
+@instrument_tool
+@deadline_budget(15.0)
+async def get_top_headlines(
+    category: Optional[Literal["general", "world", "nation", "business", "technology", "entertainment", "sports", "science", "health"]] = Field(
+        default="general", 
+        description="News category"
+    ),
+    lang: Optional[str] = Field(default=None, description=f"Language code (2 letters). Supported: {', '.join(SUPPORTED_LANGUAGES.keys())}"),
+    country: Optional[str] = Field(default=None, description=f"Country code (2 letters). Supported: {', '.join(SUPPORTED_COUNTRIES.keys())}"),
+    max_articles: Optional[int] = Field(default=10, description="Number of articles to return (1-100)"),
+    nullable: Optional[str] = Field(default=None, description="Allow null values for: description, content, image (comma-separated)"),
+    date_from: Optional[str] = Field(default=None, description="Filter articles from this date (ISO 8601 format: YYYY-MM-DDTHH:MM:SS.sssZ)"),
+    date_to: Optional[str] = Field(default=None, description="Filter articles until this date (ISO 8601 format: YYYY-MM-DDTHH:MM:SS.sssZ)"),
+    q: Optional[str] = Field(default=None, description="Additional search keywords to filter headlines"),
+    page: Optional[int] = Field(default=1, description="Page number for pagination"),
+    fields: Optional[List[str]] = Field(default=None, description=FIELDS_DESCRIPTION),
+    max_content_chars: Optional[int] = Field(default=None, description=MAX_CONTENT_CHARS_DESCRIPTION),
+    compact: Optional[bool] = Field(default=False, description=COMPACT_DESCRIPTION),
+    detail: Optional[Literal["handles", "full"]] = Field(default="handles", description=DETAIL_DESCRIPTION),
+    delta: Optional[bool] = Field(default=False, description=DELTA_DESCRIPTION),
+    cursor: Optional[str] = Field(default=None, description=CURSOR_DESCRIPTION)
+) -> dict:
+    """
+    Get current trending news articles based on Google News ranking.
+    
+    This tool retrieves the top headlines for a specific category. The articles
+    are selected based on Google News ranking algorithm, providing the most
+    relevant and trending news for the chosen category.
+    
+    Available categories:
+    - general: General news (default)
+    - world: International news
+    - nation: National news
+    - business: Business and finance
+    - technology: Technology and innovation
+    - entertainment: Entertainment and celebrity news
+    - sports: Sports news
+    - science: Scientific discoveries and research
+    - health: Health and medical news
+    
+    Returns a structured response with a handle per trending article; read its
+    gnews://article/{id} resource URI, or pass detail="full", for the full article.
+    Pass delta=True, then the returned next_cursor, to get only new headlines.
+    """
+    
+    # Validate parameters
+    if category and category not in CATEGORIES:
+        raise ValueError(f"Unsupported category '{category}'. Supported categories: {', '.join(CATEGORIES)}")
+    
+    if lang and lang not in SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported language '{lang}'. Supported languages: {', '.join(SUPPORTED_LANGUAGES.keys())}")
+    
+    if country and country not in SUPPORTED_COUNTRIES:
+        raise ValueError(f"Unsupported country '{country}'. Supported countries: {', '.join(SUPPORTED_COUNTRIES.keys())}")
+    
+    if max_articles and (max_articles < 1 or max_articles > 100):
+        raise ValueError("Max articles must be between 1 and 100")
+    
+    if page and page < 1:
+        raise ValueError("Page must be 1 or greater")
+    
+    validate_projection(fields, max_content_chars)
+    
+    # Build request parameters
+    params = {}
+    
+    if category:
+        params["category"] = category
+    if lang:
+        params["lang"] = lang
+    if country:
+        params["country"] = country
+    if max_articles:
+        params["max"] = max_articles
+    if nullable:
+        params["nullable"] = nullable
+    if date_from:
+        params["from"] = date_from
+    if date_to:
+        params["to"] = date_to
+    if q:
+        params["q"] = q
+    if page:
+        params["page"] = page
+    
+    tracker = get_delta_tracker()
+    stream = tracker.open("top-headlines", params, cursor) if delta or cursor else None
+    if stream is not None:
+        params = tracker.request_params(stream, params)
+    
+    # Popular combinations are served from the prefetcher, even when stale
+    prefetcher = get_prefetcher()
+    warm = prefetcher.lookup(params) if prefetcher is not None and not cursor else None
+    
+    try:
+        if warm is not None:
+            result, age, stale = warm
+            logger.info("Serving prefetched headlines for category '%s' (age %.0fs)", category, age, extra=PER_REQUEST)
+        else:
+            logger.info("Getting top headlines for category '%s' with params: %s", category, params, extra=PER_REQUEST)
+            # A poll with a cursor asks what is new now, so it must not be answered from the cache
+            result = await make_gnews_request("top-headlines", params, use_cache=not cursor)
+        with span("dedup"):
+            articles, removed = dedupe_articles(result.get("articles", []))
+        response = {
+            "success": True,
+            "category": category or "general",
+            "totalArticles": result.get("totalArticles", 0),
+            "articles": articles,
+            "duplicates_removed": removed,
+            "parameters_used": params
+        }
+        if warm is not None:
+            response["freshness"] = {"age_seconds": round(age, 1), "stale": stale, "source": "prefetch"}
+        elif "freshness" in result:
+            response["freshness"] = result["freshness"]
+        if stream is not None:
+            response = tracker.advance(stream, response)
+        response = with_handles(response, detail, fields, max_content_chars)
+    except Exception as e:
+        response = {
+            "success": False,
+            "error": str(e),
+            "category": category or "general",
+            "parameters_used": params
+        }
+    return shape_response(response, fields, max_content_chars, compact)
+
+
+MAX_FANOUT_REGIONS = 30
+
+
+@mcp.tool()
+@instrument_tool
+@deadline_budget(30.0)
+async def get_global_headlines(
+    countries: Optional[List[str]] = Field(default=None, description=f"Country codes to cover (2 letters). Supported: {', '.join(SUPPORTED_COUNTRIES.keys())}"),
+    languages: Optional[List[str]] = Field(default=None, description=f"Language codes to cover (2 letters), combined with every country. Supported: {', '.join(SUPPORTED_LANGUAGES.keys())}"),
+    category: Optional[Literal["general", "world", "nation", "business", "technology", "entertainment", "sports", "science", "health"]] = Field(
+        default="general",
+        description="News category"
+    ),
+    max_articles: Optional[int] = Field(default=10, description="Headlines fetched per region (1-100)"),
+    max_stories: Optional[int] = Field(default=30, description="Merged stories to return (1-100)"),
+    max_concurrency: Optional[int] = Field(default=10, description="Maximum number of regions fetched at the same time (1-30)"),
+    fields: Optional[List[str]] = Field(default=None, description=FIELDS_DESCRIPTION),
+    max_content_chars: Optional[int] = Field(default=None, description=MAX_CONTENT_CHARS_DESCRIPTION),
+    compact: Optional[bool] = Field(default=False, description=COMPACT_DESCRIPTION),
+    detail: Optional[Literal["handles", "full"]] = Field(default="handles", description=DETAIL_DESCRIPTION)
+) -> dict:
+    """
+    Get a global picture of the top headlines in one call.
+    
+    Fetches the top headlines of a category for every combination of the
+    given countries and languages (up to 30 regions) concurrently, then
+    merges them into one list. Copies of the same story are collapsed, and
+    stories are ranked by recency and by how many regions carry them.
+    
+    Use this instead of calling get_top_headlines once per country or
+    language. Each story lists the regions it appeared in (region_count and
+    score explain its rank). Regions that fail are reported in failed_regions
+    without failing the whole call.
+    """
+    
+    # Validate parameters
+    countries = list(dict.fromkeys(countries or []))
+    languages = list(dict.fromkeys(languages or []))
+    unsupported = [country for country in countries if country not in SUPPORTED_COUNTRIES]
+    if unsupported:
+        raise ValueError(f"Unsupported countries {', '.join(unsupported)}. Supported countries: {', '.join(SUPPORTED_COUNTRIES.keys())}")
+    
+    unsupported = [lang for lang in languages if lang not in SUPPORTED_LANGUAGES]
+    if unsupported:
+        raise ValueError(f"Unsupported languages {', '.join(unsupported)}. Supported languages: {', '.join(SUPPORTED_LANGUAGES.keys())}")
+    
+    regions = [(country, lang) for country in countries or [None] for lang in languages or [None]]
+    if not (countries or languages) or len(regions) > MAX_FANOUT_REGIONS:
+        raise ValueError(f"Countries times languages must give between 1 and {MAX_FANOUT_REGIONS} regions")
+    
+    if category and category not in CATEGORIES:
+        raise ValueError(f"Unsupported category '{category}'. Supported categories: {', '.join(CATEGORIES)}")
+    
+    if max_articles and (max_articles < 1 or max_articles > 100):
+        raise ValueError("Max articles must be between 1 and 100")
+    
+    if max_stories and (max_stories < 1 or max_stories > 100):
+        raise ValueError("Max stories must be between 1 and 100")
+    
+    if max_concurrency and (max_concurrency < 1 or max_concurrency > MAX_FANOUT_REGIONS):
+        raise ValueError(f"Max concurrency must be between 1 and {MAX_FANOUT_REGIONS}")
+    
+    validate_projection(fields, max_content_chars)
+    
+    semaphore = asyncio.Semaphore(max_concurrency or 10)
+    prefetcher = get_prefetcher()
+    
+    async def fetch_region(country: Optional[str], lang: Optional[str]) -> dict:
+        params = {"category": category or "general", "max": max_articles or 10}
+        if lang:
+            params["lang"] = lang
+        if country:
+            params["country"] = country
+        # Popular combinations are served from the prefetcher, even when stale
+        warm = prefetcher.lookup(params) if prefetcher is not None else None
+        if warm is not None:
+            return warm[0]
+        async with semaphore:
+            return await make_gnews_request("top-headlines", params)
+    
+    logger.info("Fetching %s headlines for %d regions", category, len(regions), extra=PER_REQUEST)
+    results = await asyncio.gather(*(fetch_region(country, lang) for country, lang in regions), return_exceptions=True)
+    
+    fetched = []
+    failed = []
+    for (country, lang), result in zip(regions, results):
+        label = region_label(country, lang)
+        if isinstance(result, BaseException):
+            failed.append({"region": label, "error": str(result)})
+        else:
+            fetched.append((label, result.get("articles", [])))
+    
+    with span("merge"):
+        stories, collapsed = merge_headlines(fetched, new_deduplicator())
+    top = stories[:max_stories or 30]
+    response = {
+        "success": bool(fetched),
+        "category": category or "general",
+        "regions_requested": len(regions),
+        "regions_succeeded": len(fetched),
+        "totalStories": len(stories),
+        "duplicates_collapsed": collapsed,
+        "articles": [story.article for story in top],
+        "parameters_used": {"countries": countries, "languages": languages, "category": category or "general", "max": max_articles or 10}
+    }
+    if failed:
+        response["failed_regions"] = failed
+        if not fetched:
+            response["error"] = failed[0]["error"]
+    response = with_handles(response, detail, fields, max_content_chars)
+    response["articles"] = [{**article, **story.ranking()} for article, story in zip(response["articles"], top)]
+    return shape_response(response, fields and [*fields, *RANKING_FIELDS], max_content_chars, compact)
+
+
+@mcp.tool()
+@instrument_tool
+async def local_search(
+    q: Optional[str] = Field(default=None, description="Keywords to match in title, description and content. Supports AND, OR, NOT and quoted phrases"),
+    date_from: Optional[str] = Field(default=None, description="Only articles published at or after this date (ISO 8601 format: YYYY-MM-DDTHH:MM:SS.sssZ)"),
+    date_to: Optional[str] = Field(default=None, description="Only articles published at or before this date (ISO 8601 format: YYYY-MM-DDTHH:MM:SS.sssZ)"),
+    source: Optional[str] = Field(default=None, description="Source name, e.g. 'Reuters' (case-insensitive)"),
+    lang: Optional[str] = Field(default=None, description=f"Language code (2 letters). Supported: {', '.join(SUPPORTED_LANGUAGES.keys())}"),
+    country: Optional[str] = Field(default=None, description=f"Country code (2 letters). Supported: {', '.join(SUPPORTED_COUNTRIES.keys())}"),
+    max_articles: Optional[int] = Field(default=10, description="Number of articles to return (1-100)"),
+    sortby: Optional[Literal["publishedAt", "relevance"]] = Field(default="publishedAt", description="Sort by publication date or relevance"),
+    fields: Optional[List[str]] = Field(default=None, description=FIELDS_DESCRIPTION),
+    max_content_chars: Optional[int] = Field(default=None, description=MAX_CONTENT_CHARS_DESCRIPTION),
+    compact: Optional[bool] = Field(default=False, description=COMPACT_DESCRIPTION)
+) -> dict:
+    """
+    Search articles this server has already fetched, without calling GNews.
+    
+    Every article returned by search_news and get_top_headlines is kept in a
+    local full-text index. Use this tool first for follow-up or repeat
+    questions: it answers in milliseconds and uses no API quota, but only
+    knows about articles that earlier searches returned.
+    """
+    
+    # Validate parameters
+    if lang and lang not in SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported language '{lang}'. Supported languages: {', '.join(SUPPORTED_LANGUAGES.keys())}")
+    
+    if country and country not in SUPPORTED_COUNTRIES:
+        raise ValueError(f"Unsupported country '{country}'. Supported countries: {', '.join(SUPPORTED_COUNTRIES.keys())}")
+    
+    if max_articles and (max_articles < 1 or max_articles > 100):
+        raise ValueError("Max articles must be between 1 and 100")
+    
+    validate_projection(fields, max_content_chars)
+    
+    store = get_article_store()
+    if store is None:
+        return {"success": False, "error": "The local article store is disabled", "query": q}
+    
+    articles = await store.search(
+        q=q, date_from=date_from, date_to=date_to, source=source, lang=lang,
+        country=country, limit=max_articles or 10, sortby=sortby or "publishedAt"
+    )
+    return shape_response({
+        "success": True,
+        "query": q,
+        "totalArticles": len(articles),
+        "articles": articles,
+        "source": "local"
+    }, fields, max_content_chars, compact)
+
+
+@mcp.tool()
+@instrument_tool
+async def get_trending_terms(
+    lang: Optional[str] = Field(default=None, description=f"Only articles fetched for this language. Supported: {', '.join(SUPPORTED_LANGUAGES.keys())}"),
+    country: Optional[str] = Field(default=None, description=f"Only articles fetched for this country. Supported: {', '.join(SUPPORTED_COUNTRIES.keys())}"),
+    category: Optional[str] = Field(default=None, description=f"Only headlines fetched for this category. Supported: {', '.join(CATEGORIES)}"),
+    window_hours: Optional[float] = Field(default=None, description="Hours in the current window (default 6)"),
+    baseline_hours: Optional[float] = Field(default=None, description="Hours before the window to compare against (default 24)"),
+    top_k: Optional[int] = Field(default=20, description="Number of terms to return (1-100)"),
+    min_count: Optional[int] = Field(default=3, description="Articles in the window that must mention a term"),
+    include_bigrams: Optional[bool] = Field(default=True, description="Also rank two-word phrases")
+) -> dict:
+    """
+    Find the terms spiking in the news, without calling GNews.
+
+    Counts terms and two-word phrases in the titles and descriptions of
+    articles this server fetched recently, and returns those whose count in
+    the window rose most against the baseline before it. Only articles that
+    earlier searches and headline fetches returned are analysed, so no API
+    quota is spent.
+    """
+
+    # Validate parameters
+    if lang and lang not in SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported language '{lang}'. Supported languages: {', '.join(SUPPORTED_LANGUAGES.keys())}")
+
+    if country and country not in SUPPORTED_COUNTRIES:
+        raise ValueError(f"Unsupported country '{country}'. Supported countries: {', '.join(SUPPORTED_COUNTRIES.keys())}")
+
+    if category and category not in CATEGORIES:
+        raise ValueError(f"Unsupported category '{category}'. Supported categories: {', '.join(CATEGORIES)}")
+
+    if top_k is not None and (top_k < 1 or top_k > 100):
+        raise ValueError("Top k must be between 1 and 100")
+
+    if any(hours is not None and hours <= 0 for hours in (window_hours, baseline_hours)):
+        raise ValueError("Window and baseline hours must be greater than 0")
+
+    trends = get_trend_tracker()
+    if trends is None:
+        return {"success": False, "error": "Trending terms are disabled"}
+
+    with span("trending"):
+        result = await trends.top_terms(
+            window=None if window_hours is None else window_hours * 3600,
+            baseline=None if baseline_hours is None else baseline_hours * 3600,
+            lang=lang, country=country, category=category,
+            top_k=top_k or 20, min_count=max(1, min_count or 1),
+            bigrams=include_bigrams is not False,
+        )
+    return {"success": True, **result, "source": "local"}
+
+
+@mcp.resource(URI_TEMPLATE, name="article", mime_type="application/json",
+              description="Full article (title, description, content, url, image, publishedAt, source) behind a handle")
+async def article_resource(article_id: str) -> str:
+    article = await get_article_resources().read(article_id)
+    if article is None:
+        raise ValueError(f"Article '{article_id}' is not available (expired or not stored); repeat the search to fetch it again")
+    return encode_json(article)
+
+
+@mcp.resource("gnews://supported-languages", mime_type="application/json",
+              description="Language codes accepted by the lang parameter")
+def supported_languages() -> str:
+    return LANGUAGES_RESOURCE
+
+
+@mcp.resource("gnews://supported-countries", mime_type="application/json",
+              description="Country codes accepted by the country parameter")
+def supported_countries() -> str:
+    return COUNTRIES_RESOURCE
+
+
+@mcp.resource("gnews://query-syntax", mime_type="text/markdown",
+              description="Keyword, phrase and AND/OR/NOT operator syntax for the q parameter")
+def query_syntax() -> str:
+    return QUERY_SYNTAX
+
+
+@mcp.prompt()
+def create_news_search_prompt(topic: str, lang: Optional[str] = None, country: Optional[str] = None) -> str:
+    """Research the latest news on a topic with the GNews tools"""
+    filters = ", ".join(f"{name}={value}" for name, value in (("lang", lang), ("country", country)) if value)
+    return (
+        f"Find the most recent news about {topic}{f' ({filters})' if filters else ''}. "
+        f"Use search_news with a precise query (see gnews://query-syntax for AND/OR/NOT and phrases) "
+        f"and get_top_headlines for the relevant category. Read the gnews://article/{{id}} resources "
+        f"only for the articles you need in full, then summarize the key developments with their sources and dates."
+    )
+
+
+@mcp.tool()
+@instrument_tool
+async def get_server_stats() -> dict:
+    """
+    Get operational statistics for this server.
+    
+    Reports response cache hit, miss and eviction counts, how many requests
+    were coalesced into a shared upstream call, the remaining daily quota and
+    rate-limit queue, headline prefetch coverage, the upstream circuit breaker
+    state with retry and hedging counts, articles counted for trending terms,
+    and dropped or sampled-out log records, so operators can see how much
+    upstream traffic and quota is being saved.
+    """
+    cache = get_cache()
+    prefetcher = get_prefetcher()
+    trends = get_trend_tracker()
+    return {
+        "cache": cache.snapshot() if cache is not None else {"enabled": False},
+        "coalescing": inflight.snapshot(),
+        "quota": get_scheduler().snapshot(),
+        "prefetch": prefetcher.snapshot() if prefetcher is not None else {"enabled": False},
+        "article_resources": get_article_resources().snapshot(),
+        "delta": get_delta_tracker().snapshot(),
+        "trending": trends.snapshot() if trends is not None else {"enabled": False},
+        "upstream": resilience_stats(),
+        "logging": logging_stats(),
+    }
+
+
+def _collect_component_metrics() -> list:
+    """Expose the get_server_stats snapshots as gauges at scrape time"""
+    cache = get_cache()
+    prefetcher = get_prefetcher()
+    trends = get_trend_tracker()
+    lines = gauge_lines("gnews_coalescing", "Request coalescing counters", inflight.snapshot())
+    lines += gauge_lines("gnews_quota", "Daily quota and rate-limit queue state", get_scheduler().snapshot())
+    if cache is not None:
+        lines += gauge_lines("gnews_cache", "Response cache counters and sizes", cache.snapshot())
+    if prefetcher is not None:
+        lines += gauge_lines("gnews_prefetch", "Headline prefetch coverage and counters", prefetcher.snapshot())
+    lines += gauge_lines("gnews_article_resources", "Article resource store size and reads",
+                         get_article_resources().snapshot())
+    lines += gauge_lines("gnews_delta", "Delta streams and articles returned or filtered as seen",
+                         get_delta_tracker().snapshot())
+    if trends is not None:
+        lines += gauge_lines("gnews_trending", "Articles counted for trending terms and queries made",
+                             trends.snapshot())
+    lines += gauge_lines("gnews_circuit", "Upstream circuit breaker state and counters",
+                         get_circuit_breaker().snapshot())
+    lines += gauge_lines("gnews_retry", "Upstream retries made and given up", get_retry_policy().snapshot())
+    lines += gauge_lines("gnews_hedge", "Hedged upstream requests and how often the hedge won",
+                         get_hedge_policy().snapshot())
+    lines += gauge_lines("gnews_logging", "Log queue depth and dropped or sampled-out records", logging_stats())
+    return lines
+
+
+REGISTRY.add_collector(_collect_component_metrics)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@contextlib.asynccontextmanager
+async def server_lifespan():
+    """
+    Own the resources that live as long as the server process.
+
+    FastMCP's own lifespan hook runs once per client session under the
+    streamable-http transport, so process-wide state is managed here instead.
+    """
+    # Also when mounted in another app, whose log handlers would not redact API keys
+    redact_library_logs()
+    await http_client.open_client()
+    cache = get_cache()
+    if cache is not None and cache.disk is not None:
+        purged = await cache.disk.purge_expired()
+        logger.info(f"Purged {purged} expired entries from the disk cache")
+    start_prefetcher(
+        fetch=lambda params: make_gnews_request(
+            "top-headlines", params, priority=PRIORITY_BACKGROUND, use_cache=False
+        ),
+        quota_remaining=lambda: get_scheduler().quota_remaining(),
+        categories=CATEGORIES,
+    )
+    try:
+        yield
+    finally:
+        await stop_prefetcher()
+        await close_scheduler()
+        await http_client.close_client()
+        close_cache()
+        await close_article_store()
+        await close_trend_tracker()
+
+
+async def serve(transport: str = "streamable-http"):
+    """Run the MCP server inside the server lifespan"""
+    async with server_lifespan():
+        if transport == "stdio":
+            await mcp.run_stdio_async()
+        else:
+            await mcp.run_streamable_http_async()
+
+
+def main():
+    """Run the GNews MCP server"""
+    # Queued, redacted logging to stderr; only when gnews is the process, not a module mounted in another app
+    configure_logging()
+    logger.info("Starting GNews MCP Server...")
+    
+    # Check if API key is available
+    try:
+        get_api_key()
+        logger.info("GNews API key found")
+    except ValueError as e:
+        logger.error(f"Configuration error: {e}")
+        print(f"Error: {e}", file=os.sys.stderr)
+        return
+    
+    # Run the server using streamable-http transport
+    anyio.run(serve, "streamable-http") #Use 'stdio' for local testing
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+Concurrent callers asking for the same key share one underlying call and
+all receive its result or its error. The shared call runs as its own task,
+so cancelling one waiter never cancels the work the others are waiting on.
+Once every waiter has been cancelled (the MCP client cancelled the tool
+call, or its deadline passed), the shared call is cancelled as well.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Waiter counts per task; a list so the callbacks can update them in place
+        self._waiters: Dict[str, List[int]] = {}
+        self.calls = 0
+        self.shared = 0
+        self.abandoned = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once per key at a time and return its result to every caller"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            self._waiters[key] = [0]
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.shared += 1
+            logger.debug(f"Joining in-flight request for {key}")
+        waiters = self._waiters[key]
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                # Nobody is left to use the result. Forget the task now, not when it
+                # finishes, so a new caller starts a fresh call instead of joining this one
+                self.abandoned += 1
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+                    del self._waiters[key]
+                task.cancel()
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        # Mark the error as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> dict:
+        """Return counters for operators"""
+        return {
+            "upstream_calls": self.calls,
+            "coalesced_calls": self.shared,
+            "abandoned_calls": self.abandoned,
+            "in_flight": len(self._inflight),
+        }
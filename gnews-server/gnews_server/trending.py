@@ -0,0 +1,305 @@
+"""
+Trending terms over recently fetched articles.
+
+Titles and descriptions of every article fetched from GNews are kept in a
+sliding time window. Counts are grouped in time buckets per
+lang/country/category. For each term and bigram they record how many
+articles mentioned it. A term counts once per article, and an article
+fetched again (same URL) is not counted twice. Whole buckets drop off as they
+age out, so the counts are kept up to date without rescanning old articles.
+
+get_trending_terms compares the current window against the baseline window
+just before it. A term's expected count is its baseline count scaled by
+the ratio of article volumes. Terms are ranked by how far their count rose
+above that expectation, relative to its square root (a Poisson z-score), so
+both sudden new terms and large rises of common ones surface. Only articles
+the server has already fetched are analysed; no quota is spent.
+
+Tokenizing and scoring run in a single worker process. The window lives
+in that process, so the event loop only hands over article text and
+receives ranked terms. If the worker dies, a new one starts with an empty
+window.
+
+Configuration (environment variables):
+- GNEWS_TRENDING_ENABLED: set to "0" to stop collecting terms (default enabled)
+- GNEWS_TRENDING_WINDOW: seconds in the current window (default 21600)
+- GNEWS_TRENDING_BASELINE: seconds in the baseline window before it (default 86400)
+- GNEWS_TRENDING_BUCKET: seconds per time bucket (default 600)
+- GNEWS_TRENDING_EXECUTOR: "process" (default) or "thread" to keep the
+  window in a background thread instead of a worker process
+"""
+
+import os
+import re
+import math
+import time
+import heapq
+import asyncio
+import logging
+import multiprocessing
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Words too common to trend; tokens shorter than three characters are dropped as well
+STOPWORDS = frozenset("""
+about above after again against all also and any are around because been before being below between
+both but can could did does doing down during each few for from further had has have having her here
+hers him his how into its just more most new news not now off once only other our out over own per
+said same says she should since some such than that the their them then there these they this those
+through too under until very via was were what when where which while who whom why will with would
+year years you your
+""".split())
+
+_TOKEN = re.compile(r"[^\W_]+(?:['’-][^\W_]+)*")
+
+Labels = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def extract_terms(text: str, bigrams: bool = True) -> Set[str]:
+    """Distinct terms, and bigrams of adjacent terms, in `text`"""
+    terms: Set[str] = set()
+    previous: Optional[str] = None
+    for token in _TOKEN.findall(text.lower()):
+        if len(token) < 3 or token in STOPWORDS or token.isdigit():
+            previous = None
+            continue
+        terms.add(token)
+        if bigrams and previous is not None:
+            terms.add(f"{previous} {token}")
+        previous = token
+    return terms
+
+
+def _matches(labels: Labels, lang: Optional[str], country: Optional[str], category: Optional[str]) -> bool:
+    return all(wanted is None or wanted == actual for wanted, actual in zip((lang, country, category), labels))
+
+
+class TermWindow:
+    """Per-bucket, per-label article counts of terms and bigrams"""
+
+    def __init__(self, bucket_seconds: float = 600.0, retention: float = 108000.0):
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        # bucket start -> labels -> [articles, Counter of terms]
+        self.buckets: Dict[float, Dict[Labels, list]] = {}
+        self.seen: Dict[str, float] = {}
+
+    def add(self, now: float, labels: Labels, items: Iterable[Tuple[str, str]]) -> int:
+        """Count (url, text) items not seen before; returns how many were counted"""
+        self.expire(now)
+        start = now - now % self.bucket_seconds
+        group = self.buckets.setdefault(start, {}).setdefault(tuple(labels), [0, Counter()])
+        counted = 0
+        for url, text in items:
+            if url:
+                if url in self.seen:
+                    continue
+                self.seen[url] = start
+            group[0] += 1
+            group[1].update(extract_terms(text))
+            counted += 1
+        return counted
+
+    def expire(self, now: float) -> None:
+        """Drop buckets older than the retention, and the URLs counted in them"""
+        cutoff = now - self.retention
+        expired = [start for start in self.buckets if start + self.bucket_seconds <= cutoff]
+        if not expired:
+            return
+        for start in expired:
+            del self.buckets[start]
+        self.seen = {url: start for url, start in self.seen.items() if start + self.bucket_seconds > cutoff}
+
+    def _total(self, since: float, until: float, lang, country, category) -> Tuple[int, Counter]:
+        articles, counts = 0, Counter()
+        for start, groups in self.buckets.items():
+            if since <= start < until:
+                for labels, (group_articles, group_counts) in groups.items():
+                    if _matches(labels, lang, country, category):
+                        articles += group_articles
+                        counts.update(group_counts)
+        return articles, counts
+
+    def top(self, now: float, window: float, baseline: float, lang: Optional[str] = None,
+            country: Optional[str] = None, category: Optional[str] = None, top_k: int = 20,
+            min_count: int = 3, bigrams: bool = True) -> dict:
+        """Terms whose count in the last `window` seconds rose most against the `baseline` before it"""
+        self.expire(now)
+        # Align to buckets so the windows hold whole buckets
+        split = now - now % self.bucket_seconds - window + self.bucket_seconds
+        articles, counts = self._total(split, math.inf, lang, country, category)
+        baseline_articles, baseline_counts = self._total(split - baseline, split, lang, country, category)
+        scale = articles / baseline_articles if baseline_articles else 0.0
+
+        scored = []
+        for term, count in counts.items():
+            if count < min_count or (not bigrams and " " in term):
+                continue
+            expected = baseline_counts.get(term, 0) * scale
+            if count <= expected:
+                continue
+            scored.append(((count - expected) / math.sqrt(expected + 1), term, count, expected))
+
+        terms = [
+            {
+                "term": term,
+                "count": count,
+                "baseline_count": baseline_counts.get(term, 0),
+                "expected": round(expected, 2),
+                "score": round(score, 3),
+            }
+            for score, term, count, expected in heapq.nlargest(top_k, scored)
+        ]
+        return {"articles": articles, "baseline_articles": baseline_articles, "terms": terms}
+
+
+# The window, in the worker process (or executor thread) that owns it
+_window: Optional[TermWindow] = None
+
+
+def _init_worker(bucket_seconds: float, retention: float) -> None:
+    global _window
+    _window = TermWindow(bucket_seconds, retention)
+
+
+def _add(now: float, labels: Labels, items: List[Tuple[str, str]]) -> int:
+    return _window.add(now, labels, items)
+
+
+def _top(now: float, *query) -> dict:
+    return _window.top(now, *query)
+
+
+class TrendTracker:
+    """Feeds fetched articles to the window's executor and queries it"""
+
+    def __init__(self, window: float = 21600.0, baseline: float = 86400.0, bucket_seconds: float = 600.0,
+                 executor: str = "process"):
+        self.window = window
+        self.baseline = baseline
+        self.bucket_seconds = bucket_seconds
+        self.executor = executor
+        self._executor: Optional[Executor] = None
+        self._pending: Set[asyncio.Future] = set()
+        self.observed = 0
+        self.counted = 0
+        self.queries = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            initargs = (self.bucket_seconds, self.window + self.baseline)
+            if self.executor == "thread":
+                self._executor = ThreadPoolExecutor(1, "gnews-trending", _init_worker, initargs)
+            else:
+                self._executor = ProcessPoolExecutor(
+                    1, multiprocessing.get_context("spawn"), _init_worker, initargs
+                )
+        return self._executor
+
+    def _reset_if_broken(self, error: BaseException) -> None:
+        if isinstance(error, BrokenProcessPool) and self._executor is not None:
+            logger.error("Trending-terms worker died; starting over with an empty window")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.restarts += 1
+
+    def observe(self, articles: List[dict], lang: Optional[str] = None, country: Optional[str] = None,
+                category: Optional[str] = None) -> None:
+        """Count the articles of an upstream response in the background"""
+        items = [
+            (article.get("url") or "", " ".join(filter(None, (article.get("title"), article.get("description")))))
+            for article in articles
+        ]
+        if not items:
+            return
+        self.observed += len(items)
+        future = asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), _add, time.time(), (lang, country, category), items
+        )
+        self._pending.add(future)
+        future.add_done_callback(self._observe_done)
+
+    def _observe_done(self, future: asyncio.Future) -> None:
+        self._pending.discard(future)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.error(f"Failed to count trending terms: {future.exception()}")
+            self._reset_if_broken(future.exception())
+            return
+        self.counted += future.result()
+
+    async def top_terms(self, window: Optional[float] = None, baseline: Optional[float] = None,
+                        lang: Optional[str] = None, country: Optional[str] = None,
+                        category: Optional[str] = None, top_k: int = 20, min_count: int = 3,
+                        bigrams: bool = True) -> dict:
+        """Rank terms by their rise in `window` seconds against the `baseline` seconds before it"""
+        window = self.window if window is None else window
+        baseline = self.baseline if baseline is None else baseline
+        if window < self.bucket_seconds or baseline <= 0 or window + baseline > self.window + self.baseline:
+            raise ValueError(
+                f"Window and baseline must span {self.bucket_seconds / 3600:g} to "
+                f"{(self.window + self.baseline) / 3600:g} hours together"
+            )
+        self.queries += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _top, time.time(), window, baseline, lang, country, category,
+                top_k, min_count, bigrams,
+            )
+        except BrokenProcessPool as e:
+            self._reset_if_broken(e)
+            raise
+        return {"window_hours": window / 3600, "baseline_hours": baseline / 3600, **result}
+
+    async def flush(self) -> None:
+        """Wait until articles handed over so far are counted"""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> dict:
+        return {
+            "articles_observed": self.observed,
+            "articles_counted": self.counted,
+            "pending_batches": len(self._pending),
+            "queries": self.queries,
+            "worker_restarts": self.restarts,
+        }
+
+
+_tracker: Optional[TrendTracker] = None
+
+
+def get_trend_tracker() -> Optional[TrendTracker]:
+    """Return the process-wide trend tracker, or None if it is disabled"""
+    global _tracker
+    if os.getenv("GNEWS_TRENDING_ENABLED", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    if _tracker is None:
+        _tracker = TrendTracker(
+            window=float(os.getenv("GNEWS_TRENDING_WINDOW", 21600)),
+            baseline=float(os.getenv("GNEWS_TRENDING_BASELINE", 86400)),
+            bucket_seconds=float(os.getenv("GNEWS_TRENDING_BUCKET", 600)),
+            executor=os.getenv("GNEWS_TRENDING_EXECUTOR", "process").strip().lower(),
+        )
+    return _tracker
+
+
+async def close_trend_tracker() -> None:
+    """Finish pending counting and stop the worker at server shutdown"""
+    global _tracker
+    if _tracker is not None:
+        await _tracker.flush()
+        _tracker.close()
+        _tracker = None
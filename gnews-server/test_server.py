@@ -13,7 +13,7 @@ from pathlib import Path
 # Add the current directory to the path to import main
 sys.path.insert(0, str(Path(__file__).parent))
 
-from main import mcp, get_api_key
+from gnews_server.server import mcp, get_api_key
 
 
 async def test_server():
@@ -35,7 +35,7 @@ async def test_server():
     print("\n2. Testing tool registration...")
     tools = await mcp.list_tools()
     tool_names = [tool.name for tool in tools]
-    expected_tools = ["search_news", "get_top_headlines"]
+    expected_tools = ["search_news", "get_top_headlines", "search_news_batch", "search_news_paginated", "local_search", "get_global_headlines", "get_trending_terms"]
     
     for tool_name in expected_tools:
         if tool_name in tool_names:
@@ -47,7 +47,7 @@ async def test_server():
     # Test 3: Test resources are registered
     print("\n3. Testing resource registration...")
     resources = await mcp.list_resources()
-    resource_uris = [resource.uri for resource in resources]
+    resource_uris = [str(resource.uri) for resource in resources]
     expected_resources = [
         "gnews://supported-languages",
         "gnews://supported-countries", 
@@ -66,7 +66,7 @@ async def test_server():
     try:
         # Test supported languages resource
         result = await mcp.read_resource("gnews://supported-languages")
-        content = result.contents[0].text if result.contents else ""
+        content = result[0].content if result else ""
         if "English" in content and "Spanish" in content:
             print("✅ Supported languages resource working")
         else:
@@ -74,7 +74,7 @@ async def test_server():
             
         # Test query syntax resource  
         result = await mcp.read_resource("gnews://query-syntax")
-        content = result.contents[0].text if result.contents else ""
+        content = result[0].content if result else ""
         if "AND" in content and "OR" in content:
             print("✅ Query syntax resource working")
         else:
@@ -115,6 +115,1216 @@ async def test_server():
     return True
 
 
+async def test_response_cache():
+    """Test the tiered response cache without touching the network"""
+    import tempfile
+    from gnews_server.cache import ResponseCache, cache_key
+
+    print("\n🗄️  Testing response cache...")
+
+    key_a = cache_key("search", {"q": "AI", "lang": "en", "apikey": "secret"})
+    key_b = cache_key("search", {"lang": "en", "q": " AI ", "apikey": "other"})
+    if key_a != key_b or "secret" in key_a:
+        print("❌ Cache key is not normalized or leaks the API key")
+        return False
+    print("✅ Cache keys are normalized and exclude the API key")
+
+    cache = ResponseCache(max_entries=2)
+    for i in range(3):
+        await cache.set("top-headlines", {"page": i}, {"totalArticles": i, "articles": []})
+    if await cache.get("top-headlines", {"page": 0}) is not None or cache.stats.evictions != 1:
+        print("❌ LRU eviction not working")
+        return False
+    print("✅ In-memory LRU evicts the oldest entry")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "cache.db")
+        cache = ResponseCache(db_path=db_path)
+        await cache.set("search", {"q": "AI"}, {"totalArticles": 1, "articles": [{"title": "x"}]})
+        cache.close()
+
+        restarted = ResponseCache(db_path=db_path)
+        cached = await restarted.get("search", {"q": "AI"})
+        restarted.close()
+        if not cached or restarted.stats.disk_hits != 1:
+            print("❌ Disk tier did not survive a restart")
+            return False
+    print("✅ Disk tier survives restarts")
+
+    return True
+
+
+async def test_single_flight():
+    """Test that identical concurrent calls share one upstream call"""
+    from gnews_server.singleflight import SingleFlight
+
+    print("\n🔀 Testing single-flight coalescing...")
+    flight = SingleFlight()
+    upstream_calls = 0
+
+    async def fetch():
+        nonlocal upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(0.05)
+        return {"totalArticles": 1}
+
+    waiters = [asyncio.create_task(flight.do("key", fetch)) for _ in range(20)]
+    await asyncio.sleep(0.01)
+    waiters[0].cancel()
+    results = await asyncio.gather(*waiters[1:])
+    if upstream_calls != 1 or any(r != {"totalArticles": 1} for r in results):
+        print(f"❌ Expected one shared upstream call, got {upstream_calls}")
+        return False
+    print("✅ 20 concurrent callers shared one upstream call")
+    print("✅ Cancelling one waiter did not cancel the shared call")
+
+    async def failing():
+        raise Exception("GNews API error: 500")
+
+    outcomes = await asyncio.gather(*(flight.do("bad", failing) for _ in range(3)), return_exceptions=True)
+    if not all(isinstance(o, Exception) for o in outcomes):
+        print("❌ Errors were not delivered to every waiter")
+        return False
+    print("✅ Errors are delivered to every waiter")
+
+    async def slow_to_stop():
+        try:
+            await asyncio.sleep(0.05)
+            return "fresh"
+        except asyncio.CancelledError:
+            # Cleanup keeps the cancelled call alive for a moment
+            await asyncio.sleep(0.05)
+            raise
+
+    abandoned = asyncio.create_task(flight.do("rejoin", slow_to_stop))
+    await asyncio.sleep(0.01)
+    abandoned.cancel()
+    await asyncio.gather(abandoned, return_exceptions=True)
+    try:
+        rejoined = await flight.do("rejoin", slow_to_stop)
+    except asyncio.CancelledError:
+        rejoined = None
+    if rejoined != "fresh":
+        print("❌ A caller arriving after the last waiter left joined the cancelled call")
+        return False
+    print("✅ A caller arriving after the last waiter left starts a fresh call")
+
+    return True
+
+
+async def test_scheduler():
+    """Test rate limiting, priority ordering and quota handling"""
+    from gnews_server.scheduler import UpstreamScheduler, QuotaExceededError, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+    print("\n🚦 Testing upstream scheduler...")
+    scheduler = UpstreamScheduler(rate=50, burst=1, daily_quota=5, max_wait=5)
+    order = []
+
+    async def call(name, priority):
+        await scheduler.acquire(priority)
+        order.append(name)
+
+    tasks = [asyncio.create_task(call(f"background-{i}", PRIORITY_BACKGROUND)) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("interactive", PRIORITY_INTERACTIVE)))
+    await asyncio.gather(*tasks)
+    if order.index("interactive") > 1:
+        print(f"❌ Interactive call was not prioritized: {order}")
+        return False
+    print("✅ Interactive calls are served ahead of background work")
+
+    await scheduler.acquire()
+    try:
+        await scheduler.acquire()
+        print("❌ Daily quota was not enforced")
+        return False
+    except QuotaExceededError:
+        pass
+    if scheduler.snapshot()["quota_remaining"] != 0:
+        print("❌ Remaining quota not reported")
+        return False
+    print("✅ Daily quota fails fast once spent and reports remaining quota")
+    await scheduler.close()
+
+    return True
+
+
+async def test_key_pool():
+    """Test load balancing, sidelining and persisted usage across API keys"""
+    import time
+    import tempfile
+    import httpx
+    from gnews_server import http_client
+    from gnews_server import scheduler as scheduler_module
+    from gnews_server.key_pool import KeyUsageStore
+    from gnews_server.scheduler import UpstreamScheduler, QuotaExceededError
+    from gnews_server.server import make_gnews_request
+
+    print("\n🔑 Testing API key pool...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+
+    async def drain(scheduler, calls):
+        start = time.perf_counter()
+        keys = [await scheduler.acquire() for _ in range(calls)]
+        await scheduler.close()
+        return time.perf_counter() - start, keys
+
+    single, _ = await drain(UpstreamScheduler(rate=40, burst=1, daily_quota=0, max_wait=5, keys=["key-1"]), 40)
+    pooled, keys = await drain(
+        UpstreamScheduler(rate=40, burst=1, daily_quota=0, max_wait=5, keys=[f"key-{i}" for i in range(4)]), 40
+    )
+    if pooled > single / 2.5 or {keys.count(f"key-{i}") for i in range(4)} != {10}:
+        print(f"❌ Four keys did not share the load: {single:.2f}s vs {pooled:.2f}s")
+        return False
+    print(f"✅ 40 calls took {single:.2f}s on one key and {pooled:.2f}s spread evenly over four")
+
+    scheduler = UpstreamScheduler(rate=0, burst=1, daily_quota=10, max_wait=5, keys=["key-a", "key-b", "key-c"])
+    scheduler.slots[2].quota.used = 8
+    scheduler.pause(60, key="key-a")
+    picked = {await scheduler.acquire() for _ in range(5)}
+    scheduler.mark_quota_exhausted("key-b")
+    picked_after = await scheduler.acquire()
+    scheduler.mark_quota_exhausted("key-c")
+    scheduler.mark_quota_exhausted("key-a")
+    try:
+        await scheduler.acquire()
+        exhausted_rejected = False
+    except QuotaExceededError:
+        exhausted_rejected = True
+    await scheduler.close()
+    if picked != {"key-b"} or picked_after != "key-c" or not exhausted_rejected:
+        print(f"❌ Keys were not chosen by remaining budget: {picked}, then {picked_after}")
+        return False
+    print("✅ Calls go to the key with most quota left; sidelined and spent keys are skipped")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "key_usage.db")
+        scheduler = UpstreamScheduler(rate=0, burst=1, daily_quota=5, max_wait=5, keys=["key-a", "key-b"],
+                                      usage=KeyUsageStore(path))
+        for _ in range(3):
+            await scheduler.acquire()
+        scheduler.mark_quota_exhausted("key-b")
+        await scheduler.close()
+        restarted = UpstreamScheduler(rate=0, burst=1, daily_quota=5, max_wait=5, keys=["key-a", "key-b"],
+                                      usage=KeyUsageStore(path))
+        remaining = restarted.quota_remaining()
+        await restarted.close()
+    if remaining != 3:
+        print(f"❌ Key usage was not persisted across a restart: {remaining} requests left")
+        return False
+    print("✅ Per-key usage survives a restart")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = KeyUsageStore(str(Path(tmp) / "key_usage.db"))
+        scheduler = UpstreamScheduler(rate=0, burst=1, daily_quota=5, max_wait=5, keys=["key-a"], usage=store)
+        scheduler.usage_save_interval = 0.05
+        for _ in range(3):
+            await scheduler.acquire()
+        await asyncio.sleep(0.2)
+        saved = sum(used for used, _ in store.load(scheduler.slots[0].day).values())
+        await scheduler.close()
+    if saved != 3:
+        print(f"❌ A burst of usage was not saved before shutdown: {saved} of 3 calls on disk")
+        return False
+    print("✅ Usage marked dirty between saves is flushed after the save interval")
+
+    used_keys = []
+
+    def handler(request):
+        used_keys.append(request.url.params["apikey"])
+        if request.url.params["apikey"] == "key-aaaaaaaa":
+            return httpx.Response(429, headers={"Retry-After": "60"})
+        return httpx.Response(200, json={"totalArticles": 0, "articles": []})
+
+    scheduler_module._scheduler = UpstreamScheduler(
+        rate=0, burst=1, daily_quota=0, max_wait=5, keys=["key-aaaaaaaa", "key-bbbbbbbb"]
+    )
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        await make_gnews_request("search", {"q": "key failover"})
+    finally:
+        await scheduler_module.close_scheduler()
+        await http_client.close_client()
+    if used_keys != ["key-aaaaaaaa", "key-bbbbbbbb"]:
+        print(f"❌ A rate-limited key was not swapped for another: {len(used_keys)} requests")
+        return False
+    print("✅ A 429 sidelines the key and the call moves to another key")
+
+    return True
+
+
+async def test_worker_share():
+    """Test that workers split the key limits, add up their usage and follow the deployment mode"""
+    import subprocess
+    import tempfile
+    from gnews_server.key_pool import KeyUsageStore
+    from gnews_server.scheduler import UpstreamScheduler, QuotaExceededError
+
+    print("\n👷 Testing quota sharing across workers...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "key_usage.db")
+        workers = [
+            UpstreamScheduler(rate=10, burst=2, daily_quota=6, max_wait=5, keys=["key-a"],
+                              usage=KeyUsageStore(path), workers=2)
+            for _ in range(2)
+        ]
+        slot = workers[0].slots[0]
+        if slot.bucket.rate != 5 or slot.quota.limit != 3:
+            print(f"❌ Worker share is {slot.bucket.rate} rps and {slot.quota.limit} requests a day")
+            return False
+        for worker in workers:
+            for _ in range(3):
+                await worker.acquire()
+        try:
+            await workers[0].acquire()
+            over_share = True
+        except QuotaExceededError:
+            over_share = False
+        for worker in workers:
+            await worker.close()
+        store = KeyUsageStore(path)
+        saved = store.load(slot.day)
+        store.close()
+        if over_share or list(saved.values()) != [(6, False)]:
+            print(f"❌ Workers went over their share or overwrote each other's usage: {saved}")
+            return False
+        print("✅ Each of two workers gets half the rate and quota, and both workers' usage is stored")
+
+        restarted = UpstreamScheduler(rate=10, burst=2, daily_quota=6, max_wait=5, keys=["key-a"],
+                                      usage=KeyUsageStore(path), workers=2)
+        remaining = restarted.quota_remaining()
+        await restarted.close()
+        if remaining != 0:
+            print(f"❌ A restarted worker has {remaining} requests left of a spent quota")
+            return False
+        print("✅ A restarted worker takes its share of the stored usage")
+
+    env = {**os.environ, "MCP_STATELESS": "1"}
+    probe = subprocess.run(
+        [sys.executable, "-c", "from gnews_server.server import mcp; print(mcp.settings.stateless_http)"],
+        capture_output=True, text=True, env=env, cwd=Path(__file__).parent, timeout=60,
+    )
+    if probe.stdout.strip() != "True":
+        print(f"❌ MCP_STATELESS=1 not applied to the server: {probe.stdout!r} {probe.stderr[-500:]}")
+        return False
+    print("✅ The server follows MCP_STATELESS from the deployment")
+
+    return True
+
+
+async def test_search_batch():
+    """Test that a batch keeps input order, isolates failures and respects its concurrency cap"""
+    import httpx
+    from gnews_server import http_client
+    print("\n🧺 Testing batch search...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    topics = [f"topic{i}" for i in range(8)]
+    in_flight = 0
+    peak = 0
+
+    async def fake_gnews(request):
+        nonlocal in_flight, peak
+        q = request.url.params["q"]
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later queries answer first, so completion order differs from input order
+        await asyncio.sleep(0.01 * (len(topics) - int(q.removeprefix("topic"))))
+        in_flight -= 1
+        if q == "topic3":
+            return httpx.Response(400, json={"errors": ["Invalid query"]})
+        articles = [{"title": f"{q} story {i}", "description": f"Only about {q} ({i})", "url": f"https://example.com/{q}/{i}"}
+                    for i in range(2)]
+        return httpx.Response(200, json={"totalArticles": 2, "articles": articles})
+
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(fake_gnews))
+    try:
+        result = await mcp.call_tool("search_news_batch", {
+            "queries": [{"q": topic} for topic in topics], "max_concurrency": 3,
+        })
+    finally:
+        await http_client.close_client()
+    response = json.loads(result[0].text)
+
+    if [item["query"] for item in response["results"]] != topics:
+        print(f"❌ Results did not keep the input order: {[item['query'] for item in response['results']]}")
+        return False
+    failed = [item["query"] for item in response["results"] if not item["success"]]
+    if failed != ["topic3"] or response["succeeded"] != 7 or response["failed"] != 1:
+        print(f"❌ A failing query affected the rest of the batch: failed {failed}")
+        return False
+    print("✅ 8 queries returned in input order; the failing query is reported on its own")
+    if peak != 3:
+        print(f"❌ Expected at most 3 upstream calls at once (and 3 reached), saw {peak}")
+        return False
+    print(f"✅ At most {peak} queries ran at the same time")
+
+    return True
+
+
+async def test_paginated_search():
+    """Test that paginated search streams every page as progress"""
+    import httpx
+    from gnews_server import http_client
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    print("\n📄 Testing paginated search streaming...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+
+    def fake_gnews(request):
+        page = int(request.url.params["page"])
+        size = int(request.url.params["max"])
+        count = max(0, min(size, 45 - (page - 1) * size))
+        articles = [{"title": f"Story {page * 100 + i}", "url": f"https://example.com/{page}/{i}"} for i in range(count)]
+        return httpx.Response(200, json={"totalArticles": 45, "articles": articles})
+
+    await http_client.close_client()
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(fake_gnews))
+    streamed_pages = []
+
+    async def on_progress(progress, total, message):
+        streamed_pages.append(json.loads(message)["page"])
+
+    try:
+        async with create_connected_server_and_client_session(mcp._mcp_server) as client:
+            result = await client.call_tool(
+                "search_news_paginated",
+                {"q": "AI", "page_size": 20, "max_total_articles": 100},
+                progress_callback=on_progress,
+            )
+    finally:
+        await http_client.close_client()
+
+    data = json.loads(result.content[0].text)
+    if data["articles_collected"] != 45 or data["pages_fetched"] != 3:
+        print(f"❌ Unexpected pagination result: {data['articles_collected']} articles, {data['pages_fetched']} pages")
+        return False
+    if streamed_pages != [1, 2, 3]:
+        print(f"❌ Pages were not streamed in order: {streamed_pages}")
+        return False
+    print("✅ Walked 3 pages and streamed each one as a progress notification")
+
+    return True
+
+
+async def test_article_store():
+    """Test URL deduplication and full-text queries in the local store"""
+    from gnews_server.article_store import ArticleStore
+
+    print("\n🔎 Testing local article store...")
+    store = ArticleStore(":memory:")
+    articles = [
+        {"title": "Fed raises interest rates", "description": "Markets react", "url": "https://a.com/1",
+         "publishedAt": "2025-01-02T10:00:00Z", "source": {"name": "Reuters"}},
+        {"title": "New AI chip announced", "description": "Faster inference", "url": "https://b.com/2",
+         "publishedAt": "2025-01-03T10:00:00Z", "source": {"name": "The Verge"}},
+    ]
+    await store.ingest(articles, lang="en", country="us")
+    await store.ingest(articles[:1], lang="en", category="business")
+
+    if await store.count() != 2:
+        print("❌ Articles were not deduplicated by URL")
+        return False
+    print("✅ Articles are deduplicated by URL")
+
+    found = await store.search(q="interest AND rates", lang="en")
+    if [a["url"] for a in found] != ["https://a.com/1"] or found[0]["category"] != "business":
+        print(f"❌ Full-text query returned {found}")
+        return False
+    if len(await store.search(q="chip (", source="the verge")) != 1:
+        print("❌ Malformed query did not fall back to plain terms")
+        return False
+    if len(await store.search(date_from="2025-01-03")) != 1:
+        print("❌ Date-range filter not applied")
+        return False
+    print("✅ Keyword, source and date-range queries answered locally")
+    store.close()
+
+    return True
+
+
+async def test_deduplication():
+    """Test URL canonicalization and near-duplicate detection"""
+    from gnews_server.dedup import Deduplicator, canonicalize_url
+
+    print("\n🧹 Testing article deduplication...")
+    if canonicalize_url("https://www.example.com/amp/story/?utm_source=rss&id=7#top") != canonicalize_url("http://example.com/story?id=7"):
+        print("❌ Tracking parameters or AMP variants not canonicalized")
+        return False
+    for name in ("cid", "src", "ref"):
+        if canonicalize_url(f"https://example.com/item?{name}=1") == canonicalize_url(f"https://example.com/item?{name}=2"):
+            print(f"❌ Content parameter {name!r} stripped as tracking")
+            return False
+    pages = [{"title": f"Catalog page {n}", "description": "", "url": f"https://example.com/item?cid={n}"} for n in (1, 2)]
+    if len(Deduplicator(threshold=0.7).filter(pages)) != 2:
+        print("❌ Articles differing only by a content parameter were deduplicated")
+        return False
+    print("✅ Tracking parameters and AMP variants canonicalized; content parameters kept")
+
+    story = "Fed raises interest rates by a quarter point as inflation cools"
+    summary = "Markets rallied on Wednesday after the Federal Reserve signalled it may pause further increases"
+    articles = [
+        {"title": story, "description": summary, "url": "https://a.com/fed"},
+        {"title": story, "description": "Different outlet", "url": "https://a.com/fed?utm_campaign=x"},
+        {"title": f"{story} - Reuters", "description": summary, "url": "https://b.com/wire/123"},
+        {"title": "Apple unveils new iPhone", "description": "Faster chip and better camera", "url": "https://c.com/iphone"},
+    ]
+    deduplicator = Deduplicator(threshold=0.7)
+    unique = deduplicator.filter(articles)
+    if [a["url"] for a in unique] != ["https://a.com/fed", "https://c.com/iphone"]:
+        print(f"❌ Unexpected dedup result: {[a['url'] for a in unique]}")
+        return False
+    if deduplicator.filter([{"title": story, "description": summary, "url": "https://d.com/syndicated"}]):
+        print("❌ Duplicate across batches not detected")
+        return False
+    print("✅ URL and near-duplicate stories removed across batches")
+
+    return True
+
+
+async def test_response_projection():
+    """Test field selection and compact output, and measure the savings"""
+    import time
+    import httpx
+    from gnews_server import http_client
+    print("\n📦 Testing response projection and compaction...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    os.environ["GNEWS_DEDUP_ENABLED"] = "0"
+    articles = [
+        {
+            "title": f"Headline {i}", "description": f"Summary of story {i}",
+            "content": "Lorem ipsum dolor sit amet. " * 40, "url": f"https://example.com/{i}",
+            "image": f"https://example.com/{i}.jpg", "publishedAt": "2025-01-01T00:00:00Z",
+            "source": {"name": "Example", "url": "https://example.com"},
+        }
+        for i in range(100)
+    ]
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"totalArticles": 100, "articles": articles})
+    ))
+
+    async def measure(arguments):
+        start = time.perf_counter()
+        content = await mcp.call_tool("search_news", {"q": "AI", "max_articles": 100, **arguments})
+        return time.perf_counter() - start, len(content[0].text.encode("utf-8"))
+
+    try:
+        await measure({"detail": "full"})  # warm up
+        full_time, full_bytes = await measure({"detail": "full"})
+        compact_time, compact_bytes = await measure({"fields": ["title", "url", "publishedAt"], "compact": True})
+        truncated_time, truncated_bytes = await measure({"max_content_chars": 100})
+    finally:
+        await http_client.close_client()
+        os.environ["GNEWS_DEDUP_ENABLED"] = "1"
+
+    print(f"   full: {full_bytes} bytes in {full_time * 1000:.2f}ms")
+    print(f"   truncated content: {truncated_bytes} bytes in {truncated_time * 1000:.2f}ms")
+    print(f"   compact projection: {compact_bytes} bytes in {compact_time * 1000:.2f}ms")
+    if not compact_bytes < truncated_bytes < full_bytes or compact_bytes > full_bytes * 0.2:
+        print("❌ Projection did not shrink the payload")
+        return False
+    print(f"✅ Compact projection cut the payload by {100 - compact_bytes * 100 // full_bytes}%")
+
+    return True
+
+
+async def test_compact_articles():
+    """Test that decoded articles are compact, read like dicts and serialize unchanged"""
+    import httpx
+    from gnews_server import http_client
+    from gnews_server.articles import Article, decode_response, encode_response
+
+    print("\n🧱 Testing compact articles...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    upstream = {
+        "totalArticles": 2,
+        "articles": [
+            {
+                "title": f"Compact story {i}", "description": "Summary", "content": "Text",
+                "url": f"https://example.com/compact/{i}", "image": None, "publishedAt": "2025-01-01T00:00:00Z",
+                "source": {"name": "Example " + "Wire", "url": "https://example.com", "country": "us"},
+                "lang": "en",
+            }
+            for i in range(2)
+        ],
+    }
+    body = json.dumps(upstream).encode("utf-8")
+    decoded = decode_response(body)
+    first, second = decoded["articles"]
+    if not isinstance(first, Article) or first != upstream["articles"][0] or dict(first) != upstream["articles"][0]:
+        print(f"❌ Decoded article does not match the upstream dict: {first!r}")
+        return False
+    if first.source_name is not second.source_name or first.get("lang") != "en" or "missing" in first:
+        print("❌ Source names were not interned or extra keys were lost")
+        return False
+    if json.loads(encode_response(decoded)) != upstream:
+        print("❌ Compact articles did not serialize back to the upstream shape")
+        return False
+    print("✅ Articles decode compactly and round-trip to the upstream dicts")
+
+    os.environ["GNEWS_DEDUP_ENABLED"] = "0"
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=body)
+    ))
+    try:
+        result = await mcp.call_tool("search_news", {"q": "compact", "detail": "full"})
+    finally:
+        await http_client.close_client()
+        os.environ["GNEWS_DEDUP_ENABLED"] = "1"
+    if json.loads(result[0].text)["articles"] != upstream["articles"]:
+        print(f"❌ Tool response did not carry the full articles: {result[0].text[:200]}")
+        return False
+    print("✅ Full-detail tool responses expand compact articles")
+
+    return True
+
+
+async def test_article_resources():
+    """Test that tools return handles and full articles are served as resources"""
+    import httpx
+    from gnews_server import http_client
+    from gnews_server.article_resources import ArticleResources
+
+    print("\n🔗 Testing article handles and resources...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    articles = [
+        {
+            "title": f"Story {i}", "description": f"Summary {i}", "content": "Full text. " * 200,
+            "url": f"https://example.com/story/{i}", "publishedAt": "2025-01-01T00:00:00Z",
+            "source": {"name": "Example", "url": "https://example.com"},
+        }
+        for i in range(20)
+    ]
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"totalArticles": 20, "articles": articles})
+    ))
+    try:
+        handles_result = await mcp.call_tool("search_news", {"q": "handles", "max_articles": 20})
+        full_result = await mcp.call_tool("search_news", {"q": "handles", "max_articles": 20, "detail": "full"})
+    finally:
+        await http_client.close_client()
+
+    handles = json.loads(handles_result[0].text)["articles"]
+    if len(handles) != 20 or "content" in handles[0] or not handles[0]["uri"].startswith("gnews://article/"):
+        print(f"❌ search_news did not return article handles: {handles[:1]}")
+        return False
+    handle_bytes, full_bytes = len(handles_result[0].text), len(full_result[0].text)
+    print(f"✅ Handles: {handle_bytes} bytes instead of {full_bytes} for full articles")
+
+    resource = await mcp.read_resource(handles[3]["uri"])
+    article = json.loads(resource[0].content)
+    if article["title"] != "Story 3" or article["content"] != articles[3]["content"]:
+        print("❌ Article resource did not return the full article")
+        return False
+    print("✅ Full article served from its resource URI")
+
+    resources = ArticleResources(max_entries=2)
+    first = resources.put(articles[0])
+    resources.put(articles[1])
+    resources.put(articles[2])
+    if resources.get(first["id"]) is not None or resources.snapshot()["evictions"] != 1:
+        print("❌ Article resource store did not evict its oldest entry")
+        return False
+    print("✅ Article resource store evicts beyond its bounds")
+
+    import tempfile
+    from gnews_server.article_store import ArticleStore
+    with tempfile.TemporaryDirectory() as tmp:
+        # Two server processes: one returned the handle, the other is asked for the article
+        path = str(Path(tmp) / "articles.db")
+        store, other_store = ArticleStore(path), ArticleStore(path)
+        try:
+            handle = ArticleResources().put(articles[5])
+            await store.ingest(articles[:10])
+            other = ArticleResources(store=lambda: other_store)
+            article = await other.read(handle["id"])
+            missing = await other.read("0" * 16)
+        finally:
+            store.close()
+            other_store.close()
+    if article is None or article["content"] != articles[5]["content"] or missing is not None:
+        print(f"❌ A handle from another process was not resolved from the article store: {article}")
+        return False
+    if other.snapshot()["store_reads"] != 1 or other.get(handle["id"]) is None:
+        print("❌ An article read from the store was not kept in memory")
+        return False
+    print("✅ A handle from another process is resolved from the shared article store")
+
+    return True
+
+
+async def test_delta_mode():
+    """Test that delta calls return only articles not returned before on the stream"""
+    import httpx
+    from gnews_server import http_client
+    print("\n🆕 Testing delta mode...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    published = [
+        {
+            "title": f"Update {i}", "url": f"https://example.com/update/{i}",
+            "publishedAt": f"2025-03-01T10:{i:02d}:00Z", "source": {"name": "Example"},
+        }
+        for i in range(8)
+    ]
+    available = 5
+    requests = []
+
+    def handler(request):
+        requests.append(dict(request.url.params))
+        articles = sorted(published[:available], key=lambda a: a["publishedAt"], reverse=True)
+        return httpx.Response(200, json={"totalArticles": len(articles), "articles": articles})
+
+    async def call(cursor=None):
+        arguments = {"q": "delta topic", "delta": True, "detail": "full"}
+        if cursor:
+            arguments["cursor"] = cursor
+        result = await mcp.call_tool("search_news", arguments)
+        return json.loads(result[0].text)
+
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        first = await call()
+        available = 8
+        second = await call(first["next_cursor"])
+        third = await call(second["next_cursor"])
+        try:
+            await mcp.call_tool("search_news", {"q": "another topic", "cursor": third["next_cursor"]})
+            mismatch_rejected = False
+        except Exception:
+            mismatch_rejected = True
+    finally:
+        await http_client.close_client()
+
+    if len(first["articles"]) != 5 or not first.get("next_cursor"):
+        print(f"❌ First delta call should return everything: {first.get('delta')}")
+        return False
+    titles = [article["title"] for article in second["articles"]]
+    if titles != ["Update 7", "Update 6", "Update 5"] or second["delta"]["since"] != "2025-03-01T10:04:00Z":
+        print(f"❌ Second delta call should return only new articles: {titles}")
+        return False
+    if "from" not in requests[1] or requests[1].get("sortby") != "publishedAt":
+        print(f"❌ Delta call did not narrow the upstream request: {requests[1]}")
+        return False
+    print(f"✅ Only {len(titles)} new articles returned, upstream narrowed to from={requests[1]['from']}")
+
+    if third["articles"] or third["delta"]["already_seen"] == 0:
+        print(f"❌ Repeated delta call returned articles again: {third['delta']}")
+        return False
+    if not mismatch_rejected:
+        print("❌ A cursor from another query was accepted")
+        return False
+    print("✅ Nothing repeated; a cursor from another query is rejected")
+
+    from gnews_server.cache import close_cache
+    os.environ["GNEWS_CACHE_ENABLED"] = "1"
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        quiet = await call(third["next_cursor"])
+        published.append({
+            "title": "Update 8", "url": "https://example.com/update/8",
+            "publishedAt": "2025-03-01T10:08:00Z", "source": {"name": "Example"},
+        })
+        available = 9
+        fresh = await call(quiet["next_cursor"])
+    finally:
+        await http_client.close_client()
+        close_cache()
+        os.environ["GNEWS_CACHE_ENABLED"] = "0"
+    if quiet["articles"] or quiet["next_cursor"] != third["next_cursor"]:
+        print(f"❌ A quiet poll moved the cursor: {quiet['delta']}")
+        return False
+    if [article["title"] for article in fresh["articles"]] != ["Update 8"]:
+        print(f"❌ A poll with the response cache on missed a new article: {fresh['articles']}")
+        return False
+    print("✅ With the response cache on, a repeated cursor still sees newly published articles")
+
+    return True
+
+
+async def test_global_headlines():
+    """Test that regional headlines are fetched concurrently, merged and ranked"""
+    import time
+    import httpx
+    from gnews_server import http_client
+    from gnews_server import resilience
+    print("\n🌍 Testing global headlines fan-out...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    countries = ["us", "gb", "fr", "de", "in", "jp"]
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        country = request.url.params["country"]
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.1)
+        in_flight -= 1
+        if country == "jp":
+            return httpx.Response(500, json={"errors": ["Upstream failure"]})
+        local = {
+            "us": "Senate passes the farm bill", "gb": "Rail strike disrupts commuters in London",
+            "fr": "Paris museum reopens after renovation", "de": "Bundesliga title race tightens",
+            "in": "Monsoon arrives early in Kerala",
+        }[country]
+        articles = [{
+            "title": local, "description": f"{local} (regional report)",
+            "url": f"https://{country}.example.com/local", "publishedAt": "2030-01-01T12:00:00Z",
+        }]
+        if country in ("us", "gb", "fr"):
+            articles.append({
+                "title": "Summit ends with a global climate agreement",
+                "description": "Leaders signed the agreement after two weeks of talks",
+                "url": f"https://wire.example.com/climate-deal?utm_source={country}",
+                "publishedAt": "2030-01-01T09:00:00Z",
+            })
+        return httpx.Response(200, json={"totalArticles": len(articles), "articles": articles})
+
+    resilience._retry_policy = resilience.RetryPolicy(max_retries=0)
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        start = time.perf_counter()
+        result = await mcp.call_tool("get_global_headlines", {"countries": countries, "category": "world"})
+        elapsed = time.perf_counter() - start
+    finally:
+        resilience._retry_policy = None
+        await http_client.close_client()
+    response = json.loads(result[0].text)
+
+    top = response["articles"][0]
+    if top["title"] != "Summit ends with a global climate agreement" or top["region_count"] != 3:
+        print(f"❌ The story carried by most regions was not ranked first: {top}")
+        return False
+    if response["totalStories"] != 6 or response["duplicates_collapsed"] != 2:
+        print(f"❌ Copies of a story were not collapsed: {response['totalStories']} stories")
+        return False
+    print(f"✅ {response['regions_succeeded']} regions merged into {response['totalStories']} stories, shared story first")
+
+    if peak < len(countries) or elapsed > 0.5:
+        print(f"❌ Regions were not fetched concurrently (peak {peak}, {elapsed:.2f}s)")
+        return False
+    if [failure["region"] for failure in response.get("failed_regions", [])] != ["jp"]:
+        print(f"❌ A failing region was not reported: {response.get('failed_regions')}")
+        return False
+    print(f"✅ {len(countries)} regions fetched concurrently in {elapsed:.2f}s; a failing region is reported")
+
+    return True
+
+
+async def test_trending_terms():
+    """Test that rising terms are ranked against a baseline, counted off the event loop"""
+    import time
+    import httpx
+    from gnews_server import http_client
+    from gnews_server import trending
+    from gnews_server.trending import TermWindow
+
+    print("\n💹 Testing trending terms...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    window = TermWindow(bucket_seconds=600, retention=30 * 3600)
+    now = 1_000_000 * 600.0
+    baseline = [(f"https://example.com/b{i}", "Markets steady as central bank holds rates") for i in range(40)]
+    window.add(now - 10 * 3600, ("en", "us", "business"), baseline)
+    spike = [(f"https://example.com/s{i}", f"Central bank surprises markets with emergency rate cut {i}") for i in range(12)]
+    window.add(now - 600, ("en", "us", "business"), spike)
+    window.add(now - 600, ("en", "us", "business"), spike)
+    window.add(now - 600, ("fr", "fr", "business"), [("https://example.fr/1", "Grève nationale des cheminots")] * 5)
+    result = window.top(now, window=6 * 3600, baseline=24 * 3600, lang="en", min_count=3)
+    terms = [term["term"] for term in result["terms"]]
+    rising = {"surprises", "emergency", "rate", "cut", "bank surprises", "surprises markets", "emergency rate", "rate cut"}
+    if result["articles"] != 12 or set(terms) != rising:
+        print(f"❌ Rising terms were not ranked: {result}")
+        return False
+    if "markets" in terms or "central bank" in terms or any("grève" in term for term in terms):
+        print(f"❌ Steady or filtered-out terms were reported as trending: {terms}")
+        return False
+    print(f"✅ Rising terms ranked against the baseline: {', '.join(terms[:4])}")
+
+    topics = ["Volcano erupts near the coast", "Election results delayed again", "Storm hits northern towns"]
+    sightings = ["Eclipse viewers line the beach", "Crowds watch the eclipse", "Eclipse glasses sell out"]
+    articles = [
+        {"title": topics[i % 3], "description": sightings[i % 3] if i % 2 else None, "url": f"https://example.com/trend/{i}"}
+        for i in range(100)
+    ]
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"totalArticles": 100, "articles": articles})
+    ))
+    os.environ["GNEWS_TRENDING_ENABLED"] = "1"
+    trends = trending.get_trend_tracker()
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(ticker())
+    try:
+        await mcp.call_tool("get_top_headlines", {"category": "science", "max_articles": 100})
+        for page in range(20):
+            trends.observe(
+                [{"title": f"Background story {page} {i} about eclipse viewing", "url": f"https://example.com/bg/{page}/{i}"}
+                 for i in range(200)],
+                lang="en", country="us",
+            )
+        await trends.flush()
+        result = await mcp.call_tool("get_trending_terms", {"category": "science", "top_k": 5})
+        try:
+            await trends.top_terms(baseline=0)
+            rejected_zero = False
+        except ValueError:
+            rejected_zero = True
+    finally:
+        watcher.cancel()
+        await http_client.close_client()
+        await trending.close_trend_tracker()
+        os.environ["GNEWS_TRENDING_ENABLED"] = "0"
+    response = json.loads(result[0].text)
+    if not response["success"] or response["articles"] != 100 or response["terms"][0]["term"] != "eclipse":
+        print(f"❌ get_trending_terms did not rank the category's top term: {response}")
+        return False
+    if not rejected_zero:
+        print("❌ An explicit zero baseline was replaced by the default instead of rejected")
+        return False
+    stall = max(b - a for a, b in zip(ticks, ticks[1:]))
+    print(f"✅ get_trending_terms ranked '{response['terms'][0]['term']}' first for science headlines")
+    if stall > 0.25:
+        print(f"❌ Counting stalled the event loop for {stall * 1000:.0f}ms")
+        return False
+    print(f"✅ 4100 articles counted in a worker process; longest event-loop stall {stall * 1000:.0f}ms")
+
+    return True
+
+
+async def test_headline_prefetcher():
+    """Test warm serving and stale-while-revalidate for popular headlines"""
+    from gnews_server.prefetch import HeadlinePrefetcher
+
+    print("\n🔥 Testing headline prefetcher...")
+    fetches = []
+
+    async def fetch(params):
+        fetches.append(params)
+        return {"totalArticles": 2, "articles": [{"title": "A", "url": "a"}, {"title": "B", "url": "b"}]}
+
+    prefetcher = HeadlinePrefetcher(
+        fetch=fetch, quota_remaining=lambda: 50, categories=["general"],
+        countries=["us"], languages=["en"], max_articles=10, interval=60, daily_budget=5,
+    )
+    await prefetcher.refresh(("general", "en", "us"))
+    request = {"category": "general", "lang": "en", "country": "us", "max": 1, "page": 1}
+
+    served = prefetcher.lookup(request)
+    if served is None or served[2] or len(served[0]["articles"]) != 1:
+        print("❌ Warm combination was not served")
+        return False
+    if prefetcher.lookup({**request, "q": "AI"}) is not None:
+        print("❌ Request with extra filters was answered from the prefetcher")
+        return False
+    print("✅ Warm combinations are served without an upstream call")
+
+    prefetcher.entries[("general", "en", "us")].fetched_at -= 120
+    data, age, stale = prefetcher.lookup(request)
+    if not stale or age < 120:
+        print("❌ Stale entry not reported as stale")
+        return False
+    await asyncio.gather(*prefetcher._refreshing.values())
+    if len(fetches) != 2 or prefetcher.entries[("general", "en", "us")].age > 1:
+        print("❌ Stale entry was not revalidated in the background")
+        return False
+    print("✅ Stale entries are served while a background refresh runs")
+
+    prefetcher.quota_remaining = lambda: 10
+    if await prefetcher.refresh(("general", "en", "us")):
+        print("❌ Prefetcher spent quota reserved for interactive calls")
+        return False
+    print("✅ Prefetcher stays within its quota budget")
+
+    return True
+
+
+async def test_metrics():
+    """Test tool and upstream metrics, timing spans and the /metrics route"""
+    import httpx
+    from gnews_server import http_client
+    from mcp import types
+    from mcp_common.metrics import REGISTRY
+
+    print("\n📈 Testing metrics and timing spans...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    os.environ["MCP_TRACE_SPANS"] = "1"
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json={"totalArticles": 1, "articles": [{"title": "A", "url": "https://a.example"}]})
+    ))
+    # Through the low-level tools/call handler, as a client request would go
+    call_tool = mcp._mcp_server.request_handlers[types.CallToolRequest]
+    try:
+        await mcp.call_tool("search_news", {"q": "metrics"})
+        response = await call_tool(types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(name="get_top_headlines", arguments={"category": "science"}),
+        ))
+    finally:
+        await http_client.close_client()
+        os.environ["MCP_TRACE_SPANS"] = "0"
+
+    exposition = REGISTRY.render()
+    expected = [
+        'mcp_tool_duration_seconds_count{tool="search_news",outcome="ok"}',
+        'mcp_tool_response_bytes_count{tool="get_top_headlines"}',
+        'gnews_upstream_responses_total{endpoint="search",status="200"}',
+        'gnews_upstream_duration_seconds_bucket{endpoint="top-headlines",le="+Inf"}',
+        'mcp_span_duration_seconds_count{tool="search_news",span="upstream"}',
+        'mcp_span_duration_seconds_count{tool="search_news",span="validation"}',
+        'mcp_span_duration_seconds_count{tool="get_top_headlines",span="shaping"}',
+        'gnews_quota{field="granted"}',
+    ]
+    missing = [line for line in expected if line not in exposition]
+    if missing:
+        print(f"❌ Missing metrics: {missing}")
+        return False
+    print(f"✅ {len(exposition.splitlines())} exposition lines, including tool, upstream and span metrics")
+
+    sent = sum(len(block.text.encode("utf-8")) for block in response.root.content)
+    recorded = f'mcp_tool_response_bytes_sum{{tool="get_top_headlines"}} {sent}'
+    if recorded not in exposition:
+        print(f"❌ Response size does not match the {sent} bytes sent")
+        return False
+    print(f"✅ Response size matches the {sent} bytes of content sent")
+
+    routes = [route.path for route in mcp.streamable_http_app().routes]
+    if "/metrics" not in routes:
+        print(f"❌ /metrics route not registered: {routes}")
+        return False
+    print("✅ /metrics route registered")
+
+    return True
+
+
+async def test_logging_pipeline():
+    """Test secret redaction, request sampling, JSON output and drop-on-full"""
+    import queue
+    import logging
+    from gnews_server.logging_config import (
+        PER_REQUEST, DroppingQueueHandler, JsonFormatter, RedactingFilter, RequestSampler, logging_stats, redact,
+    )
+
+    print("\n📝 Testing logging pipeline...")
+    if logging_stats()["enabled"] or any(isinstance(h, DroppingQueueHandler) for h in logging.getLogger().handlers):
+        print("❌ Importing the server configured the root logger")
+        return False
+    print("✅ Importing the server leaves the host's logging alone")
+
+    # A host's own handler, as uvicorn installs one, sees httpx's request log
+    from gnews_server import http_client
+    host_lines = []
+    host_handler = logging.Handler()
+    host_handler.emit = lambda entry: host_lines.append(entry.getMessage())
+    httpx_logger = logging.getLogger("httpx")
+    filters = list(httpx_logger.filters)
+    for log_filter in filters:
+        httpx_logger.removeFilter(log_filter)
+    httpx_logger.addHandler(host_handler)
+    try:
+        await http_client.close_client()
+        await http_client.open_client()
+        httpx_logger.info('HTTP Request: GET https://gnews.io/api/v4/search?q=ai&apikey=host-secret "HTTP/1.1 200 OK"')
+    finally:
+        httpx_logger.removeHandler(host_handler)
+        for log_filter in filters:
+            if log_filter not in httpx_logger.filters:
+                httpx_logger.addFilter(log_filter)
+        await http_client.close_client()
+    if not host_lines or "host-secret" in host_lines[0]:
+        print(f"❌ httpx request URLs reach the host's handlers unredacted: {host_lines}")
+        return False
+    print("✅ httpx request URLs are redacted for the host's handlers once the client is opened")
+
+    message = redact(
+        "GET https://gnews.io/api/v4/search?q=ai&apikey=abc123 params={'apikey': 'abc123', 'q': 'ai'} key=sk-live",
+        secrets=("sk-live",),
+    )
+    if "abc123" in message or "sk-live" in message or "q=ai" not in message:
+        print(f"❌ Secrets not redacted: {message}")
+        return False
+    print(f"✅ Redacted: {message}")
+
+    def record(msg, *args, level=logging.INFO, extra=None):
+        entry = logging.LogRecord("main", level, __file__, 0, msg, args, None)
+        entry.__dict__.update(extra or {})
+        return entry
+
+    sampler = RequestSampler(max_per_second=5)
+    kept = sum(sampler.filter(record("hit", extra=PER_REQUEST)) for _ in range(100))
+    always = sum(sampler.filter(record("startup")) for _ in range(100))
+    warnings = sum(sampler.filter(record("slow", level=logging.WARNING, extra=PER_REQUEST)) for _ in range(100))
+    if not kept <= 6 or always != 100 or warnings != 100:
+        print(f"❌ Sampling wrong: kept {kept}, unmarked {always}, warnings {warnings}")
+        return False
+    print(f"✅ Rate limit kept {kept}/100 per-request records, all others passed")
+
+    entry = record("Making request to %s with params: %s", "search", {"q": "ai", "apikey": "abc123"}, extra={"endpoint": "search"})
+    RedactingFilter(("abc123",)).filter(entry)
+    line = json.loads(JsonFormatter().format(entry))
+    if "abc123" in json.dumps(line) or line["endpoint"] != "search" or line["level"] != "INFO":
+        print(f"❌ Unexpected JSON log line: {line}")
+        return False
+    print(f"✅ JSON line: {json.dumps(line)}")
+
+    entry = record("Retrying with key %s", "k3y")
+    RedactingFilter(("k3y",)).filter(entry)
+    if "k3y" in entry.getMessage():
+        print(f"❌ Short key literal not redacted: {entry.getMessage()}")
+        return False
+    print("✅ Key literals are redacted regardless of length")
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(record("burst"))
+    if handler.dropped != 3:
+        print(f"❌ Expected 3 dropped records, got {handler.dropped}")
+        return False
+    print("✅ Full log queue drops records instead of blocking")
+
+    return True
+
+
+async def test_startup_snapshot():
+    """Test that the fast-start snapshot matches the live listings and skips heavy imports"""
+    import subprocess
+    import fast_start
+
+    print("\n🚀 Testing fast-start snapshot...")
+    snapshot = await fast_start.build_snapshot(mcp)
+    live = [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in await mcp.list_tools()]
+    if snapshot["tools"]["tools"] != live:
+        print("❌ Snapshot tool schemas differ from the live server")
+        return False
+    if snapshot["fingerprint"] != fast_start.fingerprint():
+        print("❌ Snapshot fingerprint is not stable")
+        return False
+    print(f"✅ Snapshot holds {len(live)} tool schemas identical to the live server")
+
+    probe = subprocess.run(
+        [sys.executable, "-c", "import sys, fast_start; print(sorted({'mcp', 'gnews_server.server', 'pydantic', 'httpx'} & set(sys.modules)))"],
+        cwd=Path(__file__).parent, capture_output=True, text=True, check=True,
+    )
+    if probe.stdout.strip() != "[]":
+        print(f"❌ fast_start imports heavy modules at import time: {probe.stdout.strip()}")
+        return False
+    print("✅ fast_start imports no MCP, pydantic or httpx modules up front")
+
+    return True
+
+
+async def test_upstream_resilience():
+    """Test retries, deadlines, cancellation, the circuit breaker and hedging"""
+    import time
+    import httpx
+    from gnews_server import cache
+    from gnews_server import http_client
+    from gnews_server import resilience
+    from gnews_server.server import make_gnews_request
+
+    print("\n🛡️ Testing upstream resilience...")
+    os.environ.setdefault("GNEWS_API_KEY", "test-key")
+    resilience._retry_policy = resilience.RetryPolicy(max_retries=1, base_delay=0.01)
+    resilience._breaker = resilience.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    requests = []
+    upstream_cancelled = asyncio.Event()
+
+    async def handler(request):
+        q = request.url.params["q"]
+        requests.append(q)
+        if q == "slow":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                upstream_cancelled.set()
+                raise
+        if q == "down" or (q == "flaky" and requests.count(q) == 1):
+            return httpx.Response(503, json={"errors": ["Service unavailable"]})
+        return httpx.Response(200, json={"totalArticles": 1, "articles": [{"title": q, "url": f"https://example.com/{q}"}]})
+
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        flaky = json.loads((await mcp.call_tool("search_news", {"q": "flaky"}))[0].text)
+        if not flaky["success"] or requests.count("flaky") != 2:
+            print(f"❌ A 503 reply was not retried: {flaky}")
+            return False
+        print("✅ A 503 reply was retried and the call succeeded")
+
+        start = time.perf_counter()
+        try:
+            with resilience.deadline(0.2):
+                await make_gnews_request("search", {"q": "slow"})
+            print("❌ The deadline did not stop a slow upstream call")
+            return False
+        except resilience.DeadlineExceeded:
+            elapsed = time.perf_counter() - start
+        await asyncio.wait_for(upstream_cancelled.wait(), 1)
+        print(f"✅ Deadline returned after {elapsed:.2f}s and cancelled the upstream request")
+
+        for _ in range(2):
+            try:
+                await make_gnews_request("search", {"q": "down"})
+            except resilience.CircuitOpenError:
+                break
+            except Exception:
+                pass
+        before = len(requests)
+        try:
+            await make_gnews_request("search", {"q": "healthy"})
+            print("❌ The circuit breaker did not open after repeated 503 replies")
+            return False
+        except resilience.CircuitOpenError:
+            pass
+        if len(requests) != before:
+            print("❌ An upstream request was made while the circuit was open")
+            return False
+        print("✅ Circuit opened after repeated failures and calls fail fast")
+
+        os.environ["GNEWS_CACHE_ENABLED"] = "1"
+        cache._cache = cache.ResponseCache(stale_grace=3600)
+        key = cache.cache_key("search", {"q": "healthy"})
+        cache._cache.memory.set(key, {"totalArticles": 1, "articles": []}, time.time() - 60)
+        served = await make_gnews_request("search", {"q": "healthy"})
+        if not served.get("freshness", {}).get("stale"):
+            print(f"❌ Expired cached data was not served while the circuit was open: {served}")
+            return False
+        print("✅ Expired cached data is served while the circuit is open")
+    finally:
+        os.environ["GNEWS_CACHE_ENABLED"] = "0"
+        cache._cache = None
+        resilience._retry_policy = None
+        resilience._breaker = None
+        await http_client.close_client()
+
+    hedge = resilience.HedgePolicy(percentile=0.5, min_samples=1)
+    hedge.record(0.05)
+    primary_cancelled = False
+
+    async def slow():
+        nonlocal primary_cancelled
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            primary_cancelled = True
+            raise
+
+    async def fast():
+        return "hedge"
+
+    start = time.perf_counter()
+    result = await hedge.run(slow, fast)
+    await asyncio.sleep(0)
+    if result != "hedge" or hedge.hedge_wins != 1 or not primary_cancelled or time.perf_counter() - start > 1:
+        print("❌ A slow request was not hedged")
+        return False
+    print("✅ A slow request was hedged and the slower one cancelled")
+
+    return True
+
+
 def test_environment():
     """Test environment setup"""
     print("🔧 Testing Environment Setup")
@@ -144,6 +1354,45 @@ def test_environment():
     return True
 
 
+def configure_offline_environment():
+    """Keep offline tests away from persistent state and the rate limiter"""
+    os.environ.update(
+        GNEWS_CACHE_ENABLED="0",
+        GNEWS_ARTICLE_STORE_ENABLED="0",
+        GNEWS_TRENDING_ENABLED="0",
+        GNEWS_RATE_LIMIT_RPS="0",
+        GNEWS_DAILY_QUOTA="0",
+    )
+    # What server_lifespan does in a host; most tests call the tools without it
+    from gnews_server.logging_config import redact_library_logs
+    redact_library_logs()
+
+
+# Tests that run against local components only (no API key or network)
+OFFLINE_TESTS = [
+    test_response_cache,
+    test_single_flight,
+    test_scheduler,
+    test_key_pool,
+    test_worker_share,
+    test_search_batch,
+    test_article_store,
+    test_deduplication,
+    test_response_projection,
+    test_compact_articles,
+    test_article_resources,
+    test_delta_mode,
+    test_global_headlines,
+    test_trending_terms,
+    test_headline_prefetcher,
+    test_paginated_search,
+    test_upstream_resilience,
+    test_metrics,
+    test_logging_pipeline,
+    test_startup_snapshot,
+]
+
+
 if __name__ == "__main__":
     print("🚀 GNews MCP Server Test Suite")
     print("=" * 50)
@@ -155,6 +1404,11 @@ if __name__ == "__main__":
     
     # Test server functionality
     try:
+        configure_offline_environment()
+        for offline_test in OFFLINE_TESTS:
+            if not asyncio.run(offline_test()):
+                print(f"\n❌ {offline_test.__name__} failed")
+                sys.exit(1)
         result = asyncio.run(test_server())
         if result:
             print("\n🎉 All tests completed successfully!")
@@ -0,0 +1 @@
+"""Modules shared by the MCP servers in this repository"""
@@ -0,0 +1,93 @@
+"""
+Bounded async access to an SQLite database, and keyset cursors.
+
+ConnectionPool keeps a fixed number of reader connections and one writer
+connection to a database in WAL mode. Queries run on a dedicated thread
+pool with one thread per connection, so callers never block the event loop
+and never open more connections than configured. Writes are serialized on
+the writer connection, each in its own transaction.
+
+encode_cursor and decode_cursor turn the last id of a page into the opaque
+next_cursor handed to clients, and back.
+"""
+
+import base64
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+
+T = TypeVar("T")
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        kind, _, value = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        if kind != "id":
+            raise ValueError
+        return int(value)
+    except ValueError:
+        raise ValueError("Invalid cursor; pass the next_cursor value from a previous page")
+
+
+class ConnectionPool:
+    """Fixed set of SQLite reader connections plus one writer, used from worker threads"""
+
+    def __init__(self, path: str, size: int = 8, synchronous: str = "NORMAL", name: str = "db"):
+        self.path = path
+        self.size = size
+        self.synchronous = synchronous
+        self._executor = ThreadPoolExecutor(max_workers=size + 1, thread_name_prefix=name)
+        self._readers: asyncio.Queue = asyncio.Queue()
+        for _ in range(size):
+            self._readers.put_nowait(self._connect(readonly=True))
+        self._writer = self._connect(readonly=False)
+        self._write_lock = asyncio.Lock()
+        self.waits = 0
+
+    def _connect(self, readonly: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn(conn) on a pooled reader connection, waiting if all are busy"""
+        if self._readers.empty():
+            self.waits += 1
+        conn = await self._readers.get()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn, conn)
+        try:
+            return await asyncio.shield(future)
+        finally:
+            # A cancelled caller must not hand back a connection still in use
+            if future.done():
+                self._readers.put_nowait(conn)
+            else:
+                future.add_done_callback(lambda _: self._readers.put_nowait(conn))
+
+    async def write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn(conn) in a transaction on the writer connection"""
+        def transaction(conn: sqlite3.Connection) -> T:
+            with conn:
+                return fn(conn)
+
+        async with self._write_lock:
+            return await self._run(transaction, self._writer)
+
+    async def close(self) -> None:
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        self._writer.close()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,60 @@
+"""
+Deployment mode for the mounted MCP servers.
+
+Configuration (environment variables):
+- MCP_STATELESS: set to "1" to handle every streamable-http request
+  independently. No session is kept in memory, so any worker or replica
+  can serve any request. This is what `mcp_in_fastapi/serve.py --workers N` uses.
+- MCP_JSON_RESPONSE: in stateless mode, set to "1" to answer with plain
+  JSON instead of an SSE stream (default 0). Plain JSON cannot carry the
+  progress notifications sent while a tool runs.
+- MCP_EVENT_DB: in stateful mode, keep stream events in this SQLite file so
+  clients can resume with Last-Event-ID on any worker on the host
+- MCP_EVENT_TTL: seconds stream events are kept (default 3600)
+"""
+
+import os
+from typing import Optional
+
+from mcp_common.event_store import SqliteEventStore
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def stateless_enabled() -> bool:
+    return _env_bool("MCP_STATELESS", False)
+
+
+async def report_progress(ctx, progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+    """Send a progress notification on the stream of the request it belongs to
+
+    Context.report_progress leaves the notification unrelated to the request,
+    so streamable-http sends it on the standalone GET stream, which a stateless
+    server does not have. Tagging it with the request id keeps it in the
+    response to the tool call in both modes.
+    """
+    meta = ctx.request_context.meta
+    if meta is None or meta.progressToken is None:
+        return
+    await ctx.request_context.session.send_progress_notification(
+        progress_token=meta.progressToken,
+        progress=progress,
+        total=total,
+        message=message,
+        related_request_id=ctx.request_id,
+    )
+
+
+def server_options() -> dict:
+    """FastMCP keyword arguments for the configured deployment mode"""
+    if stateless_enabled():
+        return {"stateless_http": True, "json_response": _env_bool("MCP_JSON_RESPONSE", False)}
+    event_db = os.getenv("MCP_EVENT_DB")
+    if event_db:
+        return {"event_store": SqliteEventStore(event_db, ttl_seconds=float(os.getenv("MCP_EVENT_TTL", 3600)))}
+    return {}
@@ -0,0 +1,381 @@
+"""
+SQLite documentation store with a bounded async connection pool (see db.py).
+
+Documents live in an SQLite database in WAL mode with an FTS5 index over
+title, body and tags. Readers borrow one of a fixed number of connections.
+Each query runs on a dedicated thread pool of the same size, so concurrent
+sessions never block the event loop and never open more connections than
+configured. Writes go through a single writer connection.
+
+Read results are served through an LRU read-through cache. Concurrent
+misses for the same key share one query. Any write clears the cache.
+Entries also expire after a short TTL, which bounds staleness when other
+worker processes write to the same file.
+
+register_docs_tools() adds the documentation tools to a FastMCP server, so
+every server exposing the store offers the same tools.
+
+Configuration (environment variables):
+- MCP_DOCS_DB: path of the SQLite file (default: the path the server passes
+  to get_docs_store, else data/docs.db under the working directory)
+- MCP_DOCS_POOL_SIZE: reader connections (default 8)
+- MCP_DOCS_CACHE_SIZE: cached read results (default 2048, 0 disables)
+- MCP_DOCS_CACHE_TTL: seconds a cached result is served (default 30)
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from mcp_common.db import ConnectionPool, decode_cursor, encode_cursor
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path("data") / "docs.db"
+
+MAX_PAGE_SIZE = 100
+MAX_SEARCH_RESULTS = 50
+
+# Cache-miss marker, so that a cached None (no such document) is still a hit
+_MISSING = object()
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    source TEXT,
+    tags TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_source ON documents (source, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, body, tags, content='documents', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, title, body, tags) VALUES (new.id, new.title, new.body, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, body, tags)
+    VALUES ('delete', old.id, old.title, old.body, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE OF title, body, tags ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, body, tags)
+    VALUES ('delete', old.id, old.title, old.body, old.tags);
+    INSERT INTO documents_fts (rowid, title, body, tags) VALUES (new.id, new.title, new.body, new.tags);
+END;
+"""
+
+# The entry the server returned before it had a database
+SEED_DOCUMENT = {
+    "title": "How to Use MCP Servers",
+    "body": "This is the documentation database for the project. MCP servers expose tools and resources for AI agents.",
+    "source": "seed",
+    "tags": "mcp servers tools resources",
+}
+
+SUMMARY_COLUMNS = "id, title, source, tags, updated_at"
+
+
+def _fts_literal(query: str) -> str:
+    """Quote every term so arbitrary user input is a valid FTS5 query"""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class ReadCache:
+    """LRU of read results with a TTL, cleared on every write"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Tuple[float, object]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped on every write so reads that raced a write are not cached
+        self.generation = 0
+
+    def get(self, key: tuple, default=None):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: tuple, value, generation: int) -> None:
+        if self.max_entries <= 0 or generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def _summary(row: sqlite3.Row) -> dict:
+    return {"id": row["id"], "title": row["title"], "source": row["source"], "tags": row["tags"],
+            "updated_at": row["updated_at"]}
+
+
+def _document(row: sqlite3.Row) -> dict:
+    return {**_summary(row), "body": row["body"]}
+
+
+class DocsStore:
+    """Documentation queries over the pool, with a read-through cache"""
+
+    def __init__(self, path: str, pool_size: int = 8, cache_size: int = 2048, cache_ttl: float = 30.0):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        setup = sqlite3.connect(path)
+        setup.execute("PRAGMA journal_mode=WAL")
+        setup.executescript(SCHEMA)
+        if setup.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 0:
+            setup.execute(
+                "INSERT INTO documents (title, body, source, tags, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (SEED_DOCUMENT["title"], SEED_DOCUMENT["body"], SEED_DOCUMENT["source"], SEED_DOCUMENT["tags"], time.time()),
+            )
+        setup.commit()
+        setup.close()
+        self.pool = ConnectionPool(path, pool_size, name="docs-db")
+        self.cache = ReadCache(cache_size, cache_ttl)
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def _cached(self, key: tuple, fn: Callable[[sqlite3.Connection], T]) -> T:
+        cached = self.cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        # Only share a query with callers that saw the same generation of data
+        generation = self.cache.generation
+        flight_key = (key, generation)
+        query = self._in_flight.get(flight_key)
+        if query is not None:
+            self.coalesced += 1
+        else:
+            # A task of its own, so one caller being cancelled does not fail the others
+            query = asyncio.ensure_future(self.pool.read(fn))
+            self._in_flight[flight_key] = query
+            query.add_done_callback(lambda done: self._finish(key, generation, done))
+        return await asyncio.shield(query)
+
+    def _finish(self, key: tuple, generation: int, query: asyncio.Future) -> None:
+        del self._in_flight[(key, generation)]
+        if not query.cancelled() and query.exception() is None:
+            self.cache.set(key, query.result(), generation)
+
+    async def get(self, doc_id: int) -> Optional[dict]:
+        def query(conn):
+            row = conn.execute("SELECT * FROM documents WHERE id = ?", (doc_id,)).fetchone()
+            return _document(row) if row is not None else None
+        return await self._cached(("get", doc_id), query)
+
+    async def first(self) -> Optional[dict]:
+        def query(conn):
+            row = conn.execute("SELECT * FROM documents ORDER BY id LIMIT 1").fetchone()
+            return _document(row) if row is not None else None
+        return await self._cached(("first",), query)
+
+    async def list(self, page_size: int = 20, cursor: Optional[str] = None, source: Optional[str] = None) -> dict:
+        """Keyset-paginated summaries in id order; cost does not grow with page depth"""
+        after = decode_cursor(cursor) if cursor else 0
+
+        def query(conn):
+            sql = f"SELECT {SUMMARY_COLUMNS} FROM documents WHERE id > ?"
+            args: list = [after]
+            if source:
+                sql += " AND source = ?"
+                args.append(source)
+            rows = conn.execute(sql + " ORDER BY id LIMIT ?", (*args, page_size + 1)).fetchall()
+            items = [_summary(row) for row in rows[:page_size]]
+            next_cursor = encode_cursor(items[-1]["id"]) if len(rows) > page_size else None
+            return {"documents": items, "next_cursor": next_cursor}
+        return await self._cached(("list", page_size, after, source), query)
+
+    async def search(self, query_text: str, limit: int = 10) -> List[dict]:
+        """Full-text search ranked by bm25, with a highlighted snippet of the body"""
+        def query(conn):
+            sql = f"""
+                SELECT d.id, d.title, d.source, d.tags, d.updated_at,
+                       snippet(documents_fts, 1, '[', ']', '…', 16) AS snippet
+                FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+                WHERE documents_fts MATCH ? ORDER BY bm25(documents_fts) LIMIT ?
+            """
+            try:
+                rows = conn.execute(sql, (query_text, limit)).fetchall()
+            except sqlite3.OperationalError:
+                # Not valid FTS5 syntax: search for the words literally
+                rows = conn.execute(sql, (_fts_literal(query_text), limit)).fetchall()
+            return [{**_summary(row), "snippet": row["snippet"]} for row in rows]
+        return await self._cached(("search", query_text, limit), query)
+
+    async def count(self) -> int:
+        return await self._cached(("count",), lambda conn: conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0])
+
+    async def add_many(self, documents: List[dict]) -> List[int]:
+        """Insert documents and invalidate cached reads"""
+        now = time.time()
+
+        def insert(conn):
+            ids = []
+            for doc in documents:
+                cursor = conn.execute(
+                    "INSERT INTO documents (title, body, source, tags, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (doc["title"], doc["body"], doc.get("source"), doc.get("tags"), now),
+                )
+                ids.append(cursor.lastrowid)
+            return ids
+
+        try:
+            return await self.pool.write(insert)
+        finally:
+            self.cache.clear()
+
+    async def add(self, title: str, body: str, source: Optional[str] = None, tags: Optional[str] = None) -> int:
+        return (await self.add_many([{"title": title, "body": body, "source": source, "tags": tags}]))[0]
+
+    async def update(self, doc_id: int, title: Optional[str] = None, body: Optional[str] = None,
+                     tags: Optional[str] = None) -> bool:
+        """Update the given fields and invalidate cached reads"""
+        def change(conn):
+            cursor = conn.execute(
+                "UPDATE documents SET title = COALESCE(?, title), body = COALESCE(?, body), "
+                "tags = COALESCE(?, tags), updated_at = ? WHERE id = ?",
+                (title, body, tags, time.time(), doc_id),
+            )
+            return cursor.rowcount > 0
+
+        try:
+            return await self.pool.write(change)
+        finally:
+            self.cache.clear()
+
+    def snapshot(self) -> dict:
+        return {"pool_size": self.pool.size, "pool_waits": self.pool.waits, "coalesced": self.coalesced,
+                "cache": self.cache.snapshot()}
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+
+_store: Optional[DocsStore] = None
+
+
+def get_docs_store(default_path: Optional[Path] = None) -> DocsStore:
+    """Return the process-wide store, opening it on first use"""
+    global _store
+    if _store is None:
+        _store = DocsStore(
+            os.getenv("MCP_DOCS_DB") or str(default_path or DEFAULT_DB_PATH),
+            pool_size=int(os.getenv("MCP_DOCS_POOL_SIZE", 8)),
+            cache_size=int(os.getenv("MCP_DOCS_CACHE_SIZE", 2048)),
+            cache_ttl=float(os.getenv("MCP_DOCS_CACHE_TTL", 30)),
+        )
+    return _store
+
+
+async def close_docs_store() -> None:
+    """Close the store at server shutdown"""
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
+        logger.info("Documentation store closed")
+
+
+def register_docs_tools(mcp, db_path: Optional[Path] = None, decorator: Optional[Callable] = None) -> None:
+    """Add the documentation tools to a FastMCP server, reading the store at db_path
+
+    decorator, e.g. mcp_common.metrics.instrument_tool, is applied to every tool
+    before it is registered.
+    """
+
+    def tool(fn: Callable) -> Callable:
+        return mcp.tool()(decorator(fn) if decorator is not None else fn)
+
+    @tool
+    async def get_documentation_from_database() -> dict:
+        """
+        This tool returns the documentation from the database for the project.
+        It is very useful for figuring out what the project is about.
+        """
+        document = await get_docs_store(db_path).first()
+        if document is None:
+            return {"title": None, "body": None, "source": None}
+        return {"title": document["title"], "body": document["body"], "source": document["source"]}
+
+    @tool
+    async def list_documentation(page_size: int = 20, cursor: Optional[str] = None, source: Optional[str] = None) -> dict:
+        """
+        List documentation entries (id, title, source, tags) one page at a time.
+        Pass the returned next_cursor to get the following page; it is null on the last page.
+        """
+        try:
+            if not 1 <= page_size <= MAX_PAGE_SIZE:
+                raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+            page = await get_docs_store(db_path).list(page_size=page_size, cursor=cursor, source=source)
+            return {"success": True, **page}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @tool
+    async def get_documentation(doc_id: int) -> dict:
+        """Get the full documentation entry with the given id"""
+        document = await get_docs_store(db_path).get(doc_id)
+        if document is None:
+            return {"success": False, "error": f"No documentation entry with id {doc_id}"}
+        return {"success": True, "document": document}
+
+    @tool
+    async def search_documentation(query: str, limit: int = 10) -> dict:
+        """
+        Full-text search over documentation titles, bodies and tags, best matches first.
+        Supports FTS5 syntax such as "exact phrase", AND, OR, NOT and prefix*.
+        """
+        try:
+            if not query or not query.strip():
+                raise ValueError("query must not be empty")
+            if not 1 <= limit <= MAX_SEARCH_RESULTS:
+                raise ValueError(f"limit must be between 1 and {MAX_SEARCH_RESULTS}")
+            results = await get_docs_store(db_path).search(query.strip(), limit=limit)
+            return {"success": True, "query": query, "total": len(results), "results": results}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @tool
+    async def add_documentation(title: str, body: str, source: Optional[str] = None, tags: Optional[str] = None) -> dict:
+        """Add a documentation entry and return its id"""
+        try:
+            if not title.strip() or not body.strip():
+                raise ValueError("title and body must not be empty")
+            doc_id = await get_docs_store(db_path).add(title.strip(), body, source=source, tags=tags)
+            return {"success": True, "id": doc_id}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,96 @@
+"""
+SQLite-backed event store for resumable streamable-http sessions.
+
+The SDK's session managers keep stream events in process memory, so a
+client that reconnects with Last-Event-ID can only resume on the worker
+that served it. This store keeps events in a local SQLite database in WAL
+mode. Every worker on the host shares it, and a restarted worker can still
+replay events.
+"""
+
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Optional
+
+from mcp.server.streamable_http import EventCallback, EventId, EventMessage, EventStore, StreamId
+from mcp.types import JSONRPCMessage
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stream_id TEXT NOT NULL,
+    message TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_stream ON events (stream_id, event_id);
+"""
+
+
+class SqliteEventStore(EventStore):
+    """Event store shared by every worker process through one SQLite file"""
+
+    def __init__(self, path: str, ttl_seconds: float = 3600.0, prune_every: int = 1000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.prune_every = prune_every
+        self._stored = 0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _insert(self, stream_id: str, payload: Optional[str]) -> str:
+        conn = self._connect()
+        cursor = conn.execute(
+            "INSERT INTO events (stream_id, message, created_at) VALUES (?, ?, ?)",
+            (stream_id, payload, time.time()),
+        )
+        self._stored += 1
+        if self.ttl_seconds and self._stored % self.prune_every == 0:
+            conn.execute("DELETE FROM events WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        return str(cursor.lastrowid)
+
+    def _events_after(self, last_event_id: str):
+        conn = self._connect()
+        row = conn.execute("SELECT stream_id FROM events WHERE event_id = ?", (last_event_id,)).fetchone()
+        if row is None:
+            return None, []
+        rows = conn.execute(
+            "SELECT event_id, message FROM events WHERE stream_id = ? AND event_id > ? ORDER BY event_id",
+            (row[0], last_event_id),
+        ).fetchall()
+        return row[0], rows
+
+    async def store_event(self, stream_id: StreamId, message: JSONRPCMessage) -> EventId:
+        payload = message.model_dump_json(by_alias=True, exclude_none=True) if message is not None else None
+        return await asyncio.to_thread(self._insert, stream_id, payload)
+
+    async def replay_events_after(self, last_event_id: EventId, send_callback: EventCallback) -> StreamId | None:
+        try:
+            int(last_event_id)
+        except ValueError:
+            logger.warning(f"Ignoring malformed Last-Event-ID: {last_event_id}")
+            return None
+        stream_id, rows = await asyncio.to_thread(self._events_after, last_event_id)
+        if stream_id is None:
+            logger.warning(f"Event {last_event_id} not found in the event store")
+            return None
+        for event_id, payload in rows:
+            if payload is None:
+                continue
+            await send_callback(EventMessage(JSONRPCMessage.model_validate_json(payload), str(event_id)))
+        return stream_id
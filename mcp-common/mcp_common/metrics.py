@@ -0,0 +1,354 @@
+"""
+Prometheus-format metrics and per-request timing spans for MCP servers.
+
+A small dependency-free registry of counters, gauges and histograms that
+renders the Prometheus text exposition format, plus:
+- instrument_tool: a decorator recording latency, outcome and in-flight
+  count for an @mcp.tool() handler
+- instrument_server: records the size of the content a FastMCP server
+  sends back for each tool call
+- span: a context manager timing a named stage of the current tool call
+  (validation, upstream wait, shaping, ...)
+
+Spans are recorded only when MCP_TRACE_SPANS=1. Each traced call then feeds
+mcp_span_duration_seconds and logs a one-line breakdown at INFO level.
+"""
+
+import os
+import time
+import math
+import inspect
+import logging
+import functools
+import threading
+import contextlib
+import contextvars
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution with sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One slot per bucket, then sum and count
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0.0
+            for index, bound in enumerate(self.buckets):
+                cumulative += series[index]
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class Registry:
+    """Holds metrics and collector callbacks and renders them for scraping"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Register a callback that returns extra exposition lines at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def gauge_lines(name: str, documentation: str, values: Dict[str, float], kind: str = "gauge") -> List[str]:
+    """Exposition lines for a snapshot dict, one sample per key (label `field`)"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for field, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        lines.append(f"{name}{_format_labels(('field',), (field,))} {_format_value(value)}")
+    return lines
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = Registry()
+
+TOOL_DURATION = REGISTRY.histogram(
+    "mcp_tool_duration_seconds", "Tool call latency", ("tool", "outcome")
+)
+TOOL_IN_FLIGHT = REGISTRY.gauge(
+    "mcp_tool_in_flight", "Tool calls currently running", ("tool",)
+)
+TOOL_PAYLOAD_BYTES = REGISTRY.histogram(
+    "mcp_tool_response_bytes", "Size of the content sent for a tool call", ("tool",), SIZE_BUCKETS
+)
+SPAN_DURATION = REGISTRY.histogram(
+    "mcp_span_duration_seconds", "Time spent in each stage of a tool call", ("tool", "span")
+)
+
+
+# --- Timing spans ---------------------------------------------------------
+
+_current_trace: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "mcp_current_trace", default=None
+)
+
+
+def spans_enabled() -> bool:
+    return os.getenv("MCP_TRACE_SPANS", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+@contextlib.contextmanager
+def span(name: str):
+    """Time a stage of the current tool call (no-op unless tracing is on)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.append((name, time.perf_counter() - start))
+
+
+# --- Tool instrumentation -------------------------------------------------
+
+def _outcome(result) -> str:
+    if isinstance(result, dict) and result.get("success") is False:
+        return "failed"
+    return "ok"
+
+
+def _finish(tool: str, start: float, trace, result=None, error: bool = False) -> None:
+    elapsed = time.perf_counter() - start
+    TOOL_DURATION.observe(elapsed, tool=tool, outcome="error" if error else _outcome(result))
+    TOOL_IN_FLIGHT.dec(tool=tool)
+
+    if trace is not None:
+        for name, duration in trace:
+            SPAN_DURATION.observe(duration, tool=tool, span=name)
+        breakdown = " ".join(f"{name}={duration * 1000:.2f}ms" for name, duration in trace)
+        logger.info(f"trace tool={tool} total={elapsed * 1000:.2f}ms {breakdown}")
+
+
+def instrument_tool(fn: Callable) -> Callable:
+    """
+    Record latency, outcome and in-flight count for a tool.
+
+    Apply below @mcp.tool() so FastMCP registers the instrumented function;
+    the original signature is preserved for schema generation.
+    """
+    tool = fn.__name__
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            TOOL_IN_FLIGHT.inc(tool=tool)
+            trace = [] if spans_enabled() else None
+            token = _current_trace.set(trace)
+            start = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except BaseException:
+                _finish(tool, start, trace, error=True)
+                raise
+            else:
+                _finish(tool, start, trace, result)
+                return result
+            finally:
+                _current_trace.reset(token)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def sync_wrapper(*args, **kwargs):
+        TOOL_IN_FLIGHT.inc(tool=tool)
+        trace = [] if spans_enabled() else None
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            _finish(tool, start, trace, error=True)
+            raise
+        else:
+            _finish(tool, start, trace, result)
+            return result
+        finally:
+            _current_trace.reset(token)
+    return sync_wrapper
+
+
+def content_size(result) -> int:
+    """Bytes of the text blocks of a CallToolResult"""
+    return sum(len(block.text.encode("utf-8")) for block in result.content if getattr(block, "text", None))
+
+
+def instrument_server(server) -> None:
+    """
+    Record the size of the content a FastMCP server sends for each tool call.
+
+    Wraps the low-level tools/call handler, so the size is measured on the
+    text FastMCP actually emitted (its indented JSON for dict results)
+    instead of encoding the tool result a second time. That handler table is
+    private to the mcp SDK, so a RuntimeError is raised at startup if it has
+    moved rather than losing the metric silently.
+    """
+    from mcp import types
+
+    handlers = getattr(getattr(server, "_mcp_server", None), "request_handlers", None)
+    handler = handlers.get(types.CallToolRequest) if isinstance(handlers, dict) else None
+    if handler is None:
+        raise RuntimeError(
+            f"Cannot instrument {type(server).__name__}: no tools/call handler in _mcp_server.request_handlers; "
+            "the installed mcp SDK is not supported by mcp_common.metrics"
+        )
+
+    @functools.wraps(handler)
+    async def call_tool(request: types.CallToolRequest) -> types.ServerResult:
+        response = await handler(request)
+        if isinstance(response.root, types.CallToolResult):
+            TOOL_PAYLOAD_BYTES.observe(content_size(response.root), tool=request.params.name)
+        return response
+
+    handlers[types.CallToolRequest] = call_tool
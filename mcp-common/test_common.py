@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Test script for the modules shared by the MCP servers
+Run this to verify them without a network or a running server
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the current directory to the path to import mcp_common
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+async def test_docs_pagination():
+    """Test keyset pagination of the documentation store"""
+    from mcp_common.docs_store import DocsStore
+
+    print("\n📚 Testing documentation store pagination...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DocsStore(os.path.join(tmp, "docs.db"), pool_size=2)
+        try:
+            await store.add_many([
+                {"title": f"Page {i}", "body": f"Body {i}", "source": "guide" if i % 2 else "api"}
+                for i in range(25)
+            ])
+            seen, cursor, pages = [], None, 0
+            while True:
+                page = await store.list(page_size=10, cursor=cursor)
+                seen.extend(doc["id"] for doc in page["documents"])
+                pages += 1
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+            if seen != sorted(set(seen)) or len(seen) != 26 or pages != 3:
+                print(f"❌ Paging returned {len(seen)} documents in {pages} pages: {seen}")
+                return False
+            print(f"✅ {len(seen)} documents in {pages} pages, in id order without repeats")
+
+            guides = (await store.list(page_size=100, source="guide"))["documents"]
+            if len(guides) != 12 or any(doc["source"] != "guide" for doc in guides):
+                print(f"❌ Source filter returned {guides}")
+                return False
+            last = (await store.list(page_size=26))["next_cursor"]
+            if last is not None:
+                print("❌ A page holding the last document still has a next cursor")
+                return False
+            print("✅ Source filter applied; the last page has no next cursor")
+
+            for bad in ("not-a-cursor", "eDoxMg==", "aWQ6YWJj"):
+                try:
+                    await store.list(cursor=bad)
+                except ValueError:
+                    continue
+                print(f"❌ Invalid cursor {bad!r} accepted")
+                return False
+            print("✅ Invalid cursors rejected with ValueError")
+        finally:
+            await store.close()
+
+    return True
+
+
+async def test_docs_search():
+    """Test FTS5 ranking, snippets and the fallback for invalid query syntax"""
+    from mcp_common.docs_store import DocsStore
+
+    print("\n🔍 Testing documentation full-text search...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DocsStore(os.path.join(tmp, "docs.db"), pool_size=2)
+        try:
+            await store.add("Streamable HTTP transport", "Sessions over streamable http with resumable streams",
+                            source="guide", tags="transport http")
+            await store.add("Stdio transport", "Run the server as a subprocess over stdio", tags="transport")
+            await store.add("Tool schemas", "Input schemas are generated from type hints")
+
+            found = await store.search("transport")
+            if {doc["title"] for doc in found} != {"Streamable HTTP transport", "Stdio transport"}:
+                print(f"❌ Search returned {found}")
+                return False
+            found = await store.search("streamable http")
+            if not found or found[0]["title"] != "Streamable HTTP transport" or "[" not in found[0]["snippet"]:
+                print(f"❌ Ranked search returned {found}")
+                return False
+            print(f"✅ Ranked matches with highlighted snippets: {found[0]['snippet']}")
+
+            for query in ('schemas (', '"type hints', "schemas AND", "NEAR("):
+                try:
+                    found = await store.search(query)
+                except Exception as e:
+                    print(f"❌ Query {query!r} raised {e!r}")
+                    return False
+            if [doc["title"] for doc in await store.search("type hints (")] != ["Tool schemas"]:
+                print("❌ Invalid FTS5 syntax did not fall back to a literal search")
+                return False
+            print("✅ Invalid FTS5 syntax falls back to searching the words literally")
+        finally:
+            await store.close()
+
+    return True
+
+
+async def test_docs_cache():
+    """Test read-through caching, invalidation on writes and the generation guard"""
+    from mcp_common.docs_store import DocsStore
+
+    print("\n🗃️ Testing documentation read cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DocsStore(os.path.join(tmp, "docs.db"), pool_size=2, cache_ttl=60)
+        try:
+            doc_id = await store.add("Lifespan", "Open resources in the lifespan")
+            before = await store.count()
+            await store.count()
+            if store.cache.hits != 1:
+                print(f"❌ Repeated read not served from the cache: {store.cache.snapshot()}")
+                return False
+            await store.add("Context", "Tools can ask for a context")
+            if await store.count() != before + 1:
+                print("❌ Cached count served after an insert")
+                return False
+            await store.get(doc_id)
+            await store.update(doc_id, title="Lifespans")
+            if (await store.get(doc_id))["title"] != "Lifespans":
+                print("❌ Cached document served after an update")
+                return False
+            print(f"✅ Reads cached and invalidated by inserts and updates: {store.cache.snapshot()}")
+
+            hits = store.cache.hits
+            if await store.get(9999) is not None or await store.get(9999) is not None or store.cache.hits != hits + 1:
+                print("❌ A lookup that found nothing was queried again instead of served from the cache")
+                return False
+            print("✅ A lookup that found nothing is cached too")
+
+            # A read that started before a write must not cache what it read
+            started, release = threading.Event(), threading.Event()
+
+            def slow_title(conn):
+                title = conn.execute("SELECT title FROM documents WHERE id = ?", (doc_id,)).fetchone()[0]
+                started.set()
+                release.wait(5)
+                return title
+
+            read = asyncio.ensure_future(store._cached(("title", doc_id), slow_title))
+            await asyncio.to_thread(started.wait, 5)
+            await store.update(doc_id, title="Lifespan events")
+            release.set()
+            if await read != "Lifespans":
+                print("❌ The racing read did not see the data from before the write")
+                return False
+            if store.cache.get(("title", doc_id)) is not None:
+                print("❌ A read that raced a write was cached")
+                return False
+            print("✅ A read that raced a write is returned but not cached")
+
+            first, second = await asyncio.gather(store.get(doc_id), store.get(doc_id))
+            if first != second or store.coalesced < 1:
+                print("❌ Concurrent misses for one key were not coalesced")
+                return False
+            print("✅ Concurrent misses for one key share one query")
+        finally:
+            await store.close()
+
+    return True
+
+
+async def test_docs_tools():
+    """Test that register_docs_tools gives every server the same documentation tools"""
+    from mcp.server.fastmcp import FastMCP
+    from mcp_common.docs_store import close_docs_store, register_docs_tools
+    from mcp_common.metrics import instrument_tool
+
+    print("\n🧰 Testing shared documentation tools...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "docs.db"
+        plain, instrumented = FastMCP("plain"), FastMCP("instrumented")
+        register_docs_tools(plain, path)
+        register_docs_tools(instrumented, path, decorator=instrument_tool)
+        try:
+            schemas = [{tool.name: tool.inputSchema for tool in await server.list_tools()}
+                       for server in (plain, instrumented)]
+            expected = {"get_documentation_from_database", "list_documentation", "get_documentation",
+                        "search_documentation", "add_documentation"}
+            if set(schemas[0]) != expected or schemas[0] != schemas[1]:
+                print(f"❌ Registered tools differ: {sorted(schemas[0])} vs {sorted(schemas[1])}")
+                return False
+            print(f"✅ {len(expected)} tools with the same schemas, with and without a decorator")
+
+            added = await plain.call_tool("add_documentation", {"title": "Shared tools", "body": "One definition"})
+            doc_id = json.loads(added[0].text)["id"]
+            found = await instrumented.call_tool("get_documentation", {"doc_id": doc_id})
+            if json.loads(found[0].text)["document"]["title"] != "Shared tools" or not path.exists():
+                print(f"❌ Tools did not use the store at the given path: {found[0].text}")
+                return False
+            rejected = await plain.call_tool("list_documentation", {"page_size": 0})
+            if json.loads(rejected[0].text)["success"]:
+                print("❌ An out-of-range page_size was accepted")
+                return False
+            print("✅ Tools read and write the store at the path the server passes")
+        finally:
+            await close_docs_store()
+
+    return True
+
+
+async def test_event_store():
+    """Test event storage and replay across store instances sharing one file"""
+    from mcp.types import JSONRPCMessage, JSONRPCNotification
+    from mcp_common.event_store import SqliteEventStore
+
+    print("\n🧾 Testing SQLite event store...")
+
+    def progress(n: int) -> JSONRPCMessage:
+        return JSONRPCMessage(JSONRPCNotification(
+            jsonrpc="2.0", method="notifications/progress", params={"progressToken": "t", "progress": n},
+        ))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.db")
+        # Two workers on the host, each with its own store over the same file
+        first, second = SqliteEventStore(path), SqliteEventStore(path)
+        ids = [await first.store_event("stream-a", progress(n)) for n in range(3)]
+        await first.store_event("stream-b", progress(99))
+        await first.store_event("stream-a", None)
+        ids.append(await first.store_event("stream-a", progress(3)))
+
+        replayed = []
+
+        async def collect(event):
+            replayed.append((event.event_id, event.message.root.params["progress"]))
+
+        stream = await second.replay_events_after(ids[0], collect)
+        if stream != "stream-a" or replayed != [(ids[1], 1), (ids[2], 2), (ids[3], 3)]:
+            print(f"❌ Replay from another instance returned {stream}: {replayed}")
+            return False
+        print(f"✅ Another instance replays the later events of the stream in order: {replayed}")
+
+        replayed.clear()
+        for last_event_id in ("not-a-number", "999999", ""):
+            if await second.replay_events_after(last_event_id, collect) is not None or replayed:
+                print(f"❌ Last-Event-ID {last_event_id!r} was not ignored")
+                return False
+        print("✅ Malformed and unknown Last-Event-IDs replay nothing")
+
+    return True
+
+
+async def test_deployment_options():
+    """Test that server_options follows MCP_STATELESS and MCP_EVENT_DB"""
+    from mcp.server.fastmcp import FastMCP
+    from mcp_common.deployment import server_options
+    from mcp_common.event_store import SqliteEventStore
+
+    print("\n🚢 Testing deployment options...")
+    names = ("MCP_STATELESS", "MCP_JSON_RESPONSE", "MCP_EVENT_DB", "MCP_EVENT_TTL")
+    saved = {name: os.environ.pop(name, None) for name in names}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            if server_options() != {}:
+                print(f"❌ Default options are {server_options()}")
+                return False
+
+            os.environ["MCP_STATELESS"] = "1"
+            os.environ["MCP_EVENT_DB"] = os.path.join(tmp, "events.db")
+            if server_options() != {"stateless_http": True, "json_response": False}:
+                print(f"❌ Stateless options are {server_options()}")
+                return False
+            server = FastMCP("stateless", **server_options())
+            if not server.settings.stateless_http or server.settings.json_response:
+                print("❌ FastMCP not configured for stateless SSE responses")
+                return False
+            os.environ["MCP_JSON_RESPONSE"] = "1"
+            if not server_options()["json_response"]:
+                print("❌ MCP_JSON_RESPONSE=1 did not select plain JSON responses")
+                return False
+            print("✅ MCP_STATELESS=1 selects stateless SSE sessions and ignores MCP_EVENT_DB")
+
+            os.environ["MCP_STATELESS"] = "off"
+            os.environ["MCP_EVENT_TTL"] = "60"
+            options = server_options()
+            store = options.get("event_store")
+            if set(options) != {"event_store"} or not isinstance(store, SqliteEventStore) or store.ttl_seconds != 60:
+                print(f"❌ Stateful options are {options}")
+                return False
+            if FastMCP("stateful", **options).settings.stateless_http:
+                print("❌ FastMCP configured as stateless with an event store")
+                return False
+            print("✅ MCP_EVENT_DB selects a shared SQLite event store in stateful mode")
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    return True
+
+
+async def test_stateless_progress():
+    """Test that progress notifications still stream to the client in stateless mode"""
+    import httpx
+    from mcp.server.fastmcp import Context, FastMCP
+    from mcp_common.deployment import report_progress, server_options
+
+    print("\n📶 Testing progress in stateless mode...")
+    saved = {name: os.environ.pop(name, None) for name in ("MCP_STATELESS", "MCP_JSON_RESPONSE")}
+    os.environ["MCP_STATELESS"] = "1"
+    try:
+        server = FastMCP("progress", **server_options())
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    @server.tool()
+    async def count(ctx: Context, pages: int) -> str:
+        for page in range(1, pages + 1):
+            await report_progress(ctx, page, pages, f"page {page}")
+        return "done"
+
+    app = server.streamable_http_app()
+    transport = httpx.ASGITransport(app=app)
+    async with server.session_manager.run(), httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/mcp", headers={"Accept": "application/json, text/event-stream"}, json={
+            "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "count", "arguments": {"pages": 3}, "_meta": {"progressToken": "pages"}},
+        })
+    if not response.headers.get("content-type", "").startswith("text/event-stream"):
+        print(f"❌ Stateless response is not a stream: {response.headers.get('content-type')}")
+        return False
+    events = [line for line in response.text.splitlines() if line.startswith("data:")]
+    progress = [event for event in events if "notifications/progress" in event]
+    if len(progress) != 3 or '"done"' not in events[-1]:
+        print(f"❌ Progress not streamed before the result: {events}")
+        return False
+    print(f"✅ {len(progress)} progress notifications streamed ahead of the result")
+
+    return True
+
+
+async def test_instrument_server():
+    """Test that tool payload sizes are recorded and an unknown server layout is rejected"""
+    from mcp import types
+    from mcp.server.fastmcp import FastMCP
+    from mcp_common.metrics import TOOL_PAYLOAD_BYTES, instrument_server
+
+    print("\n📏 Testing tool payload instrumentation...")
+    server = FastMCP("sizes")
+
+    @server.tool()
+    def echo(text: str) -> str:
+        return text
+
+    instrument_server(server)
+    handlers = server._mcp_server.request_handlers
+    request = types.CallToolRequest(method="tools/call", params=types.CallToolRequestParams(name="echo", arguments={"text": "hello"}))
+    await handlers[types.CallToolRequest](request)
+    if not any('tool="echo"' in line for line in TOOL_PAYLOAD_BYTES.collect()):
+        print("❌ Payload size of a tool call not recorded")
+        return False
+    print("✅ Payload size recorded from the tools/call handler")
+
+    del handlers[types.CallToolRequest]
+    try:
+        instrument_server(server)
+    except RuntimeError:
+        pass
+    else:
+        print("❌ A server without a tools/call handler was accepted")
+        return False
+    print("✅ Missing tools/call handler rejected at startup")
+
+    return True
+
+
+# Tests that run against local components only (no network)
+OFFLINE_TESTS = [
+    test_docs_pagination,
+    test_docs_search,
+    test_docs_cache,
+    test_docs_tools,
+    test_event_store,
+    test_deployment_options,
+    test_stateless_progress,
+    test_instrument_server,
+]
+
+
+if __name__ == "__main__":
+    print("🚀 Shared MCP Modules Test Suite")
+    print("=" * 50)
+
+    try:
+        for offline_test in OFFLINE_TESTS:
+            if not asyncio.run(offline_test()):
+                print(f"\n❌ {offline_test.__name__} failed")
+                sys.exit(1)
+        print("\n🎉 All tests completed successfully!")
+        sys.exit(0)
+    except KeyboardInterrupt:
+        print("\n🛑 Tests interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n💥 Test suite error: {e}")
+        sys.exit(1)
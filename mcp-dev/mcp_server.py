@@ -1,22 +1,27 @@
+import contextlib
+from pathlib import Path
+
 from mcp.server.fastmcp import FastMCP
+from mcp_common.docs_store import close_docs_store, register_docs_tools
+
+DOCS_DB = Path(__file__).parent / "data" / "docs.db"
+
+
+@contextlib.asynccontextmanager
+async def store_lifespan(server: FastMCP):
+    """Close the documentation store's connection pool when the server stops"""
+    try:
+        yield
+    finally:
+        await close_docs_store()
+
 
 # Create the FastMCP server instance
-mcp = FastMCP("mcp-documentation-server")
-
-# Register the tool using FastMCP decorator
-@mcp.tool()
-def get_documentation_from_database() -> dict:
-    """
-    This tool returns the documentation from the database for the project. 
-    It is very useful for figuring out what the project is about.
-    """
-    ## actual implementation would query a real database here
-    
-    return {
-        "title": "How to Use MCP Servers",
-        "body": "This is a mocked documentation entry from the database. MCP servers expose tools and resources for AI agents.",
-        "source": "mocked_database"
-    }
+mcp = FastMCP("mcp-documentation-server", lifespan=store_lifespan)
+
+# Register the documentation tools shared with mcp_in_fastapi/docs_mcp.py
+register_docs_tools(mcp, DOCS_DB)
+
 
 if __name__ == "__main__":
     mcp.run("stdio")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Latency of the documentation store under many concurrent sessions.
+
+Seeds a temporary database with a synthetic corpus (100k documents by
+default). Then many concurrent sessions run a mix of lookups by id,
+paginated listing and full-text searches against the docs server tools for
+a fixed duration. This is run with the read cache enabled and disabled. The
+benchmark reports per-tool p50/p99 latency, throughput, pool waits and the
+cache hit ratio.
+
+Usage:
+    python benchmarks/bench_docs.py --documents 100000 --sessions 300 --duration 10
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import itertools
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+APP_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+sys.path.insert(0, str(APP_DIR))
+
+from mcp_common import docs_store
+from mcp_common.docs_store import DocsStore
+
+
+WORDS = ("server tool resource prompt session transport stdio http stream cache index query client agent "
+         "schema token context lifespan mount route worker pool cursor search protocol message error retry").split()
+
+# Body text follows a Zipf distribution over a large vocabulary, as real prose
+# does, so most search terms match a small share of the corpus
+VOCABULARY = WORDS + [f"{word}{n}" for n in range(1, 700) for word in WORDS]
+ZIPF_CUMULATIVE = list(itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+
+# Share of calls per tool; ids and search terms are drawn with a skew so some are hot
+MIX = [("get_documentation", 0.5), ("list_documentation", 0.2), ("search_documentation", 0.3)]
+
+
+def synthetic_document(n: int, rng: random.Random) -> dict:
+    topic = rng.sample(VOCABULARY[:2000], 3)
+    return {
+        "title": f"{' '.join(topic).title()} guide {n}",
+        "body": " ".join(rng.choices(VOCABULARY, cum_weights=ZIPF_CUMULATIVE, k=80)),
+        "source": rng.choice(["handbook", "api-reference", "faq", "changelog"]),
+        "tags": " ".join(topic),
+    }
+
+
+async def seed(store: DocsStore, documents: int, batch: int = 5000) -> float:
+    rng = random.Random(17)
+    start = time.perf_counter()
+    for offset in range(0, documents, batch):
+        await store.add_many([synthetic_document(n, rng) for n in range(offset, min(offset + batch, documents))])
+    return time.perf_counter() - start
+
+
+def arguments(tool: str, rng: random.Random, documents: int) -> dict:
+    if tool == "get_documentation":
+        return {"doc_id": int(rng.paretovariate(1.2)) % documents + 1}
+    if tool == "list_documentation":
+        return {"page_size": 20, "source": rng.choice([None, "faq"])}
+    terms = [VOCABULARY[min(int(rng.paretovariate(0.8)) * 50, len(VOCABULARY) - 1)] for _ in range(rng.choice([1, 2]))]
+    return {"query": " ".join(terms), "limit": 10}
+
+
+async def drive(sessions: int, duration: float, documents: int) -> Dict[str, List[float]]:
+    import docs_mcp
+
+    latencies: Dict[str, List[float]] = {tool: [] for tool, _ in MIX}
+    errors = 0
+    deadline = time.monotonic() + duration
+    tools, weights = zip(*MIX)
+
+    async def session(n: int):
+        nonlocal errors
+        rng = random.Random(n)
+        while time.monotonic() < deadline:
+            tool = rng.choices(tools, weights)[0]
+            start = time.perf_counter()
+            result = await docs_mcp.mcp.call_tool(tool, arguments(tool, rng, documents))
+            latencies[tool].append(time.perf_counter() - start)
+            if json.loads(result[0].text).get("success") is False:
+                errors += 1
+
+    await asyncio.gather(*(session(n) for n in range(sessions)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def percentile(values: List[float], share: float) -> float:
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * share))] * 1000, 2) if values else None
+
+
+async def measure(path: str, cache_size: int, args) -> dict:
+    docs_store._store = DocsStore(path, pool_size=args.pool_size, cache_size=cache_size, cache_ttl=30.0)
+    try:
+        result = await drive(args.sessions, args.duration, args.documents)
+        snapshot = docs_store._store.snapshot()
+    finally:
+        await docs_store.close_docs_store()
+
+    calls = sum(len(values) for values in result["latencies"].values())
+    return {
+        "cache_size": cache_size,
+        "calls": calls,
+        "errors": result["errors"],
+        "throughput_per_s": round(calls / args.duration, 1),
+        "tools": {
+            tool: {"calls": len(values), "p50_ms": percentile(values, 0.5), "p99_ms": percentile(values, 0.99)}
+            for tool, values in result["latencies"].items()
+        },
+        "pool_waits": snapshot["pool_waits"],
+        "coalesced": snapshot["coalesced"],
+        "cache": snapshot["cache"],
+    }
+
+
+async def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "docs.db")
+        store = DocsStore(path, pool_size=1, cache_size=0)
+        seconds = await seed(store, args.documents)
+        await store.close()
+        print(f"🌱 Seeded {args.documents} documents in {seconds:.1f}s")
+
+        rows = []
+        for cache_size in (args.cache_size, 0):
+            row = await measure(path, cache_size, args)
+            rows.append(row)
+            print(f"   cache={cache_size:<6} {row['throughput_per_s']:>9} calls/s  errors {row['errors']}  "
+                  f"pool waits {row['pool_waits']}  coalesced {row['coalesced']}  hit ratio {row['cache']['hit_ratio']}")
+            for tool, stats in row["tools"].items():
+                print(f"      {tool:<22} p50 {stats['p50_ms']}ms  p99 {stats['p99_ms']}ms  ({stats['calls']} calls)")
+        return {"seed_seconds": round(seconds, 1), "runs": rows}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure documentation store latency under concurrent sessions")
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, default=300, help="Concurrent sessions issuing tool calls")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per configuration")
+    parser.add_argument("--pool-size", type=int, default=int(os.getenv("MCP_DOCS_POOL_SIZE", 8)))
+    parser.add_argument("--cache-size", type=int, default=2048)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    print(f"📊 {args.sessions} sessions, pool of {args.pool_size}, {args.duration}s per configuration")
+    results = asyncio.run(run(args))
+
+    output = args.output or RESULTS_DIR / f"docs-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"config": vars(args) | {"output": str(output)}, **results}, indent=2))
+    print(f"💾 Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
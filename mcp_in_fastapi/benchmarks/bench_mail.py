@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Mailbox listing and outbox delivery benchmarks for the email server.
+
+Mailbox: fills a temporary Maildir with synthetic messages, then measures
+the first index build, the no-change check before each listing, and page
+latency on the first and on deep pages. It also reports how much resident
+memory the process gained.
+
+Outbox: concurrent writers enqueue messages through write_email while the
+drainer delivers them to the local SMTP stand-in. This is done for each
+SMTP pool size. The benchmark reports enqueue latency, time until the
+outbox is empty, and SMTP connections opened.
+
+Usage:
+    python benchmarks/bench_mail.py --messages 50000 --emails 2000 --pool-sizes 1 4
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from email.message import EmailMessage
+from email.utils import formatdate
+from pathlib import Path
+from typing import List
+
+APP_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_smtp import FakeSMTPServer
+from mail_store import MailStore
+from registry import _rss_mb
+
+
+def percentile(values: List[float], share: float) -> float:
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * share))] * 1000, 2) if values else None
+
+
+def fill_maildir(path: Path, count: int) -> None:
+    new = path / "new"
+    for sub in ("new", "cur", "tmp"):
+        (path / sub).mkdir(parents=True, exist_ok=True)
+    start = time.time() - count * 60
+    for n in range(count):
+        message = EmailMessage()
+        message["From"] = f"sender{n % 500}@example.com"
+        message["To"] = "me@example.com"
+        message["Subject"] = f"Message {n}"
+        message["Date"] = formatdate(start + n * 60)
+        message.set_content(f"Body of message {n}\n" * 40)
+        (new / f"{1700000000 + n}.M{n}P1.bench").write_bytes(bytes(message))
+
+
+async def bench_mailbox(tmp: Path, args) -> dict:
+    maildir = tmp / "maildir"
+    fill_maildir(maildir, args.messages)
+    memory_before = _rss_mb()
+    store = MailStore(str(maildir), str(tmp / "index.db"))
+    try:
+        start = time.perf_counter()
+        await store.sync()
+        index_seconds = time.perf_counter() - start
+
+        checks = []
+        for _ in range(200):
+            start = time.perf_counter()
+            await store.sync()
+            checks.append(time.perf_counter() - start)
+
+        first_pages, deep_pages = [], []
+        cursor = None
+        for page in range(args.pages):
+            start = time.perf_counter()
+            result = await store.list(page_size=20, cursor=cursor)
+            (first_pages if page < 5 else deep_pages).append(time.perf_counter() - start)
+            cursor = result["next_cursor"]
+    finally:
+        await store.close()
+    memory_after = _rss_mb()
+
+    return {
+        "messages": args.messages,
+        "index_build_s": round(index_seconds, 2),
+        "unchanged_check_p50_ms": percentile(checks, 0.5),
+        "first_pages_p50_ms": percentile(first_pages, 0.5),
+        "deep_pages_p50_ms": percentile(deep_pages, 0.5),
+        "deep_pages_p99_ms": percentile(deep_pages, 0.99),
+        "rss_growth_mb": round(memory_after - memory_before, 1) if memory_before and memory_after else None,
+    }
+
+
+async def bench_outbox(tmp: Path, pool_size: int, args) -> dict:
+    import outbox
+    import email_mcp
+
+    with FakeSMTPServer(latency_ms=args.smtp_latency_ms) as smtp:
+        os.environ.update({
+            "MCP_OUTBOX_DB": str(tmp / f"outbox-{pool_size}.db"),
+            "MCP_SMTP_HOST": "127.0.0.1",
+            "MCP_SMTP_PORT": str(smtp.port),
+            "MCP_SMTP_POOL_SIZE": str(pool_size),
+        })
+        latencies: List[float] = []
+        async with email_mcp.mail_lifespan():
+            start = time.perf_counter()
+
+            async def writer(n: int):
+                for i in range(n, args.emails, args.writers):
+                    begin = time.perf_counter()
+                    await email_mcp.mcp.call_tool("write_email", {
+                        "recipient": f"user{i}@example.com", "subject": f"Bench {i}", "body": "Hello\n" * 20,
+                    })
+                    latencies.append(time.perf_counter() - begin)
+
+            await asyncio.gather(*(writer(n) for n in range(args.writers)))
+            enqueued = time.perf_counter() - start
+            while smtp.stats["messages"] < args.emails:
+                await asyncio.sleep(0.05)
+            delivered = time.perf_counter() - start
+            connects = outbox.get_outbox().smtp.connects
+
+    return {
+        "smtp_pool_size": pool_size,
+        "emails": args.emails,
+        "enqueue_p50_ms": percentile(latencies, 0.5),
+        "enqueue_p99_ms": percentile(latencies, 0.99),
+        "all_enqueued_s": round(enqueued, 2),
+        "all_delivered_s": round(delivered, 2),
+        "delivered_per_s": round(args.emails / delivered, 1),
+        "smtp_connections": connects,
+    }
+
+
+async def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MCP_MAILDIR"] = str(Path(tmp) / "inbox")
+        os.environ["MCP_MAIL_INDEX_DB"] = str(Path(tmp) / "inbox.db")
+        mailbox_result = await bench_mailbox(Path(tmp), args)
+        print(f"📬 {mailbox_result}")
+        outbox_results = []
+        for pool_size in args.pool_sizes:
+            result = await bench_outbox(Path(tmp), pool_size, args)
+            outbox_results.append(result)
+            print(f"📤 {result}")
+    return {"mailbox": mailbox_result, "outbox": outbox_results}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure mailbox listing and outbox delivery")
+    parser.add_argument("--messages", type=int, default=50_000, help="Messages in the synthetic mailbox")
+    parser.add_argument("--pages", type=int, default=200, help="Pages to walk through the mailbox")
+    parser.add_argument("--emails", type=int, default=2000, help="Emails written through the outbox")
+    parser.add_argument("--writers", type=int, default=50, help="Concurrent write_email callers")
+    parser.add_argument("--smtp-latency-ms", type=float, default=2.0, help="Stand-in SMTP time per message")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    output = args.output or RESULTS_DIR / f"mail-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"config": vars(args) | {"output": str(output)}, **results}, indent=2))
+    print(f"💾 Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Throughput scaling of the FastAPI composite app across uvicorn workers.
+
+For each worker count the app is started with serve.py in stateless mode.
+Several client processes then send tools/call requests to the mounted docs
+server for a fixed duration. The benchmark reports throughput, latency and
+speedup over a single worker. Scaling is bounded by the cores on the
+machine: the client processes compete with the workers for CPU.
+
+Usage:
+    python benchmarks/bench_workers.py --workers 1 2 4 --duration 10
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import multiprocessing
+from pathlib import Path
+from typing import List
+
+import httpx
+
+
+APP_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+
+HEADERS = {
+    "Accept": "application/json, text/event-stream",
+    "Content-Type": "application/json",
+    "MCP-Protocol-Version": "2025-06-18",
+}
+CALL = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "tools/call",
+    "params": {"name": "get_documentation_from_database", "arguments": {}},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"App did not start listening on port {port}")
+
+
+async def drive(url: str, concurrency: int, duration: float) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=CALL, headers=HEADERS)
+                if response.status_code != 200 or '"isError":true' in response.text:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def client_process(url: str, concurrency: int, duration: float, results) -> None:
+    results.put(asyncio.run(drive(url, concurrency, duration)))
+
+
+def measure(workers: int, args) -> dict:
+    port = free_port()
+    env = {**os.environ, "MCP_STATELESS": "1"}
+    server = subprocess.Popen(
+        [sys.executable, str(APP_DIR / "serve.py"), "--workers", str(workers), "--port", str(port), "--host", "127.0.0.1"],
+        env=env, cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/docs/mcp"
+        # Warm up every worker before measuring
+        asyncio.run(drive(url, args.concurrency, 1.0))
+
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_process, args=(url, args.concurrency, args.duration, results))
+            for _ in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        collected = [results.get() for _ in clients]
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = sorted(latency for result in collected for latency in result["latencies"])
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(result["errors"] for result in collected),
+        "throughput_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure throughput scaling across uvicorn workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="Client processes generating load")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests per client process")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    print(f"📊 {os.cpu_count()} CPUs, {args.clients} clients x {args.concurrency} concurrent requests, {args.duration}s each")
+    rows = []
+    for workers in args.workers:
+        row = measure(workers, args)
+        row["speedup"] = round(row["throughput_per_s"] / rows[0]["throughput_per_s"], 2) if rows else 1.0
+        rows.append(row)
+        print(f"   workers={workers:<3} {row['throughput_per_s']:>9} req/s  p50 {row['p50_ms']}ms  "
+              f"p99 {row['p99_ms']}ms  x{row['speedup']}  errors {row['errors']}")
+
+    output = args.output or RESULTS_DIR / f"workers-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"cpus": os.cpu_count(), "config": vars(args) | {"output": str(output)}, "results": rows}, indent=2))
+    print(f"💾 Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Local stand-in SMTP server for the email server's outbox.
+
+Speaks enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP,
+QUIT). Accepted messages are delivered into a Maildir when one is given, so
+they show up in get_emails. Recipients containing "reject" are refused with
+550. A share of messages can be deferred with 451 to exercise retries. The
+per-message latency is configurable. aiosmtpd can be used instead
+(`python -m aiosmtpd -n -l localhost:8025`).
+
+Usage: python benchmarks/fake_smtp.py [--port 8025] [--maildir data/maildir] [--latency-ms 5]
+"""
+
+import random
+import socket
+import asyncio
+import argparse
+import mailbox
+import threading
+from collections import Counter
+from typing import Optional
+
+
+class FakeSMTPHandler:
+    """Protocol state shared by all connections to one server"""
+
+    def __init__(self, maildir: Optional[str] = None, latency_ms: float = 0.0, defer_rate: float = 0.0):
+        self.maildir = mailbox.Maildir(maildir, create=True) if maildir else None
+        self.latency_ms = latency_ms
+        self.defer_rate = defer_rate
+        self.stats = Counter()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 fake-smtp ESMTP ready")
+        recipients = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode("utf-8", "replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    await reply("250-fake-smtp\r\n250-8BITMIME\r\n250 SMTPUTF8")
+                elif verb == "HELO":
+                    await reply("250 fake-smtp")
+                elif verb == "MAIL":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    if "reject" in command.lower():
+                        self.stats["refused"] += 1
+                        await reply("550 Mailbox unavailable")
+                    else:
+                        recipients.append(command)
+                        await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        data = await reader.readline()
+                        if not data or data in (b".\r\n", b".\n"):
+                            break
+                        lines.append(data[1:] if data.startswith(b"..") else data)
+                    if self.latency_ms:
+                        await asyncio.sleep(self.latency_ms / 1000)
+                    if self.defer_rate and random.random() < self.defer_rate:
+                        self.stats["deferred"] += 1
+                        await reply("451 Try again later")
+                    else:
+                        if self.maildir is not None:
+                            await asyncio.to_thread(self.maildir.add, b"".join(lines))
+                        self.stats["messages"] += 1
+                        await reply("250 OK queued")
+                elif verb in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    return
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeSMTPServer:
+    """Run the stand-in server on its own event loop in a background thread"""
+
+    def __init__(self, port: Optional[int] = None, **options):
+        self.port = port or _free_port()
+        self.handler = FakeSMTPHandler(**options)
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def stats(self) -> Counter:
+        return self.handler.stats
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self.handler.handle, "127.0.0.1", self.port))
+        self._started.set()
+        self._loop.run_forever()
+        server.close()
+        self._loop.run_until_complete(server.wait_closed())
+
+    def __enter__(self) -> "FakeSMTPServer":
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+async def serve(port: int, handler: FakeSMTPHandler) -> None:
+    server = await asyncio.start_server(handler.handle, "127.0.0.1", port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--maildir", help="Deliver accepted messages into this Maildir")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--defer-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"📮 Fake SMTP server on 127.0.0.1:{args.port}")
+    asyncio.run(serve(args.port, FakeSMTPHandler(args.maildir, args.latency_ms, args.defer_rate)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,26 @@
+import contextlib
+from pathlib import Path
+
 from mcp.server.fastmcp import FastMCP
+from mcp_common.metrics import instrument_server, instrument_tool
+from mcp_common.deployment import server_options
+from mcp_common.docs_store import close_docs_store, register_docs_tools
+
+DOCS_DB = Path(__file__).parent / "data" / "docs.db"
+
+# Create the FastMCP server instance (stateless or with a shared event store, see mcp_common.deployment)
+mcp = FastMCP("mcp-documentation-server", **server_options())
+instrument_server(mcp)
+
 
-# Create the FastMCP server instance
-mcp = FastMCP("mcp-documentation-server")
+@contextlib.asynccontextmanager
+async def store_lifespan():
+    """Close the documentation store's connection pool when the server stops"""
+    try:
+        yield
+    finally:
+        await close_docs_store()
 
-# Register the tool using FastMCP decorator
-@mcp.tool()
-def get_documentation_from_database() -> dict:
-    """
-    This tool returns the documentation from the database for the project. 
-    It is very useful for figuring out what the project is about.
-    """
-    ## actual implementation would query a real database here
 
-    return {
-        "title": "How to Use MCP Servers",
-        "body": "This is a mocked documentation entry from the database. MCP servers expose tools and resources for AI agents.",
-        "source": "mocked_database"
-    }
-  
\ No newline at end of file
+# Register the documentation tools shared with mcp-dev/mcp_server.py
+register_docs_tools(mcp, DOCS_DB, decorator=instrument_tool)
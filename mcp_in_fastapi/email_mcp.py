@@ -1,31 +1,89 @@
+import contextlib
+from email.utils import parseaddr
+from typing import Optional
+
 from mcp.server.fastmcp import FastMCP
+from mcp_common.metrics import instrument_server, instrument_tool
+from mcp_common.deployment import server_options
+from mail_store import INBOX, close_mail_store, get_mail_store
+from outbox import close_outbox, get_outbox
+
+MAX_PAGE_SIZE = 100
+
+# Create the FastMCP server instance (stateless or with a shared event store, see mcp_common.deployment)
+mcp = FastMCP("mcp-documentation-server", **server_options())
+instrument_server(mcp)
+
+
+@contextlib.asynccontextmanager
+async def mail_lifespan():
+    """Drain the outbox while the server runs, and close the stores when it stops"""
+    get_outbox().start()
+    try:
+        yield
+    finally:
+        await close_outbox()
+        await close_mail_store()
 
-# Create the FastMCP server instance
-mcp = FastMCP("mcp-documentation-server")
 
 # Register the tool using FastMCP decorator
 @mcp.tool()
-def get_emails() -> dict:
+@instrument_tool
+async def get_emails(page_size: int = 20, cursor: Optional[str] = None, folder: str = INBOX) -> dict:
     """
-    This tool returns the emails from the database for the project. 
-    It is very useful for figuring out what the project is about.
+    This tool lists the emails in the mailbox, newest first, with headers only (from, to, subject, date).
+    Pass the returned next_cursor to get the following page, and read_email for a message body.
     """
-    ## actual implementation would query a real database here
+    try:
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+        page = await get_mail_store().list(page_size=page_size, cursor=cursor, folder=folder)
+        return {"success": True, **page}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 
-    return {
-        "title": "How to Use MCP Servers",
-        "body": "This is a mocked email entry from the database. MCP servers expose tools and resources for AI agents.",
-        "source": "mocked_database"
-    }
+@mcp.tool()
+@instrument_tool
+async def read_email(email_id: int) -> dict:
+    """
+    This tool returns one email with its full text body.
+    """
+    email = await get_mail_store().read(email_id)
+    if email is None:
+        return {"success": False, "error": f"No email with id {email_id}"}
+    return {"success": True, "email": email}
 
 
 @mcp.tool()
-def write_email(recipient: str, subject: str, body: str) -> dict:
+@instrument_tool
+async def write_email(recipient: str, subject: str, body: str) -> dict:
     """
     This tool allows you to write an email to a recipient.
+    The email is queued and delivered in the background; check it with get_outbox_status.
+    """
+    try:
+        if "@" not in parseaddr(recipient)[1]:
+            raise ValueError(f"Invalid recipient address: {recipient!r}")
+        queued = await get_outbox().enqueue(recipient, subject, body)
+        return {
+            "status": "queued",
+            "id": queued["id"],
+            "message_id": queued["message_id"],
+            "message": f"Email to {recipient} with subject '{subject}' queued for delivery.",
+        }
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+@mcp.tool()
+@instrument_tool
+async def get_outbox_status(outbox_id: Optional[int] = None) -> dict:
+    """
+    This tool reports the delivery state of a queued email (queued, sending, sent or failed),
+    or the number of emails in each state when no id is given.
     """
-    # Here we would normally save the email to a database or send it
-    return {
-        "status": "success",
-        "message": f"Email sent to {recipient} with subject '{subject}' and body '{body}'."
-    }
\ No newline at end of file
+    status = await get_outbox().status(outbox_id)
+    if status is None:
+        return {"success": False, "error": f"No queued email with id {outbox_id}"}
+    return {"success": True, **status}
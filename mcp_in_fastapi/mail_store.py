@@ -0,0 +1,283 @@
+"""
+Maildir mailbox with an on-disk SQLite index of message headers.
+
+Messages stay as one file each in a Maildir (new/ and cur/, plus any
+subfolders such as .Sent). The index holds only what a listing needs:
+sender, recipient, subject, date, size and the file's path. Listing pages
+come from the index by keyset cursor on (date, id), so a page costs the
+same however large the mailbox is. Only the message being read is parsed
+from disk.
+
+The index is brought up to date lazily. Before a listing, the mtimes of the
+Maildir directories are compared with those seen at the last sync, and only
+the folders whose new/ or cur/ changed are rescanned. Only the headers of
+new files are parsed.
+
+Configuration (environment variables):
+- MCP_MAILDIR: Maildir to serve (default data/maildir next to this module)
+- MCP_MAIL_INDEX_DB: SQLite index file (default data/mail_index.db)
+- MCP_MAIL_POOL_SIZE: reader connections to the index (default 4)
+"""
+
+import os
+import time
+import base64
+import asyncio
+import sqlite3
+import logging
+from email import policy
+from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser, BytesParser
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mcp_common.db import ConnectionPool
+
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent / "data"
+
+# Root of the Maildir; subfolders are listed under their name without the leading dot
+INBOX = "INBOX"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    key TEXT NOT NULL,
+    path TEXT NOT NULL,
+    sender TEXT,
+    recipient TEXT,
+    subject TEXT,
+    date REAL,
+    size INTEGER,
+    UNIQUE (folder, key)
+);
+DROP INDEX IF EXISTS messages_folder;
+CREATE INDEX IF NOT EXISTS messages_folder_date ON messages (folder, date, id);
+"""
+
+HEADER_COLUMNS = "id, folder, sender, recipient, subject, date, size"
+
+# Headers are read in chunks of this size until the blank line that ends them
+HEADER_CHUNK = 4096
+
+
+def _decode(value) -> str:
+    if value is None:
+        return ""
+    # Unfold continuation lines
+    value = "".join(str(value).splitlines())
+    if "=?" not in value:
+        return value
+    try:
+        return str(make_header(decode_header(value)))
+    except (LookupError, ValueError):
+        return str(value)
+
+
+def _read_headers(path: Path) -> Tuple[dict, int]:
+    """Parse only the header block of a message file"""
+    data = b""
+    with open(path, "rb") as message:
+        while True:
+            chunk = message.read(HEADER_CHUNK)
+            data += chunk
+            if not chunk or b"\n\n" in data or b"\r\n\r\n" in data:
+                break
+        size = os.fstat(message.fileno()).st_size
+    end = min((i for i in (data.find(b"\n\n"), data.find(b"\r\n\r\n")) if i >= 0), default=len(data))
+    data = data[:end + 1]
+    # compat32 parses about three times faster than the default policy; decode encoded words ourselves
+    headers = BytesHeaderParser(policy=policy.compat32).parsebytes(data)
+    try:
+        date = parsedate_to_datetime(headers["Date"]).timestamp() if headers["Date"] else None
+    except (TypeError, ValueError):
+        date = None
+    return {
+        "sender": _decode(headers["From"]),
+        "recipient": _decode(headers["To"]),
+        "subject": _decode(headers["Subject"]),
+        "date": date if date is not None else os.path.getmtime(path),
+    }, size
+
+
+def _encode_position(date: float, email_id: int) -> str:
+    return base64.urlsafe_b64encode(f"date:{date!r}:{email_id}".encode()).decode()
+
+
+def _decode_position(cursor: str) -> Tuple[float, int]:
+    """The (date, id) a listing page ended at"""
+    try:
+        kind, date, email_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        if kind != "date":
+            raise ValueError
+        return float(date), int(email_id)
+    except ValueError:
+        raise ValueError("Invalid cursor; pass the next_cursor value from a previous page")
+
+
+def _summary(row) -> dict:
+    return {
+        "id": row["id"],
+        "folder": row["folder"],
+        "from": row["sender"],
+        "to": row["recipient"],
+        "subject": row["subject"],
+        "date": row["date"],
+        "size": row["size"],
+    }
+
+
+class MailStore:
+    """Header index over a Maildir, queried through a connection pool"""
+
+    def __init__(self, maildir: str, index_path: str, pool_size: int = 4):
+        self.maildir = Path(maildir)
+        for sub in ("new", "cur", "tmp"):
+            (self.maildir / sub).mkdir(parents=True, exist_ok=True)
+        Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        setup = sqlite3.connect(index_path)
+        setup.execute("PRAGMA journal_mode=WAL")
+        setup.executescript(SCHEMA)
+        setup.close()
+        self.pool = ConnectionPool(index_path, pool_size, name="mail-db")
+        self._seen_mtimes: Dict[str, int] = {}
+        self.syncs = 0
+
+    def _folders(self) -> Dict[str, Path]:
+        folders = {INBOX: self.maildir}
+        for entry in os.scandir(self.maildir):
+            if entry.name.startswith(".") and entry.is_dir() and (Path(entry.path) / "cur").is_dir():
+                folders[entry.name[1:]] = Path(entry.path)
+        return folders
+
+    def _mtimes(self) -> Dict[str, int]:
+        mtimes = {"": os.stat(self.maildir).st_mtime_ns}
+        for name, folder in self._folders().items():
+            for sub in ("new", "cur"):
+                mtimes[f"{name}/{sub}"] = os.stat(folder / sub).st_mtime_ns
+        return mtimes
+
+    def _sync(self, conn, names: Iterable[str]) -> int:
+        """Index new files, follow renames (new/ to cur/) and drop deleted ones in the given folders"""
+        changes = 0
+        folders = self._folders()
+        for name in names:
+            folder = folders[name]
+            on_disk: Dict[str, str] = {}
+            for sub in ("new", "cur"):
+                for entry in os.scandir(folder / sub):
+                    if not entry.name.startswith("."):
+                        on_disk[entry.name.split(":", 1)[0]] = os.path.relpath(entry.path, self.maildir)
+            indexed = dict(conn.execute("SELECT key, path FROM messages WHERE folder = ?", (name,)).fetchall())
+
+            added = []
+            for key, path in on_disk.items():
+                if key not in indexed:
+                    try:
+                        headers, size = _read_headers(self.maildir / path)
+                    except FileNotFoundError:
+                        continue
+                    added.append((name, key, path, headers["sender"], headers["recipient"], headers["subject"],
+                                  headers["date"], size))
+                elif indexed[key] != path:
+                    conn.execute("UPDATE messages SET path = ? WHERE folder = ? AND key = ?", (path, name, key))
+            conn.executemany(
+                "INSERT INTO messages (folder, key, path, sender, recipient, subject, date, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                added,
+            )
+            changes += len(added)
+            removed = [(name, key) for key in indexed.keys() - on_disk.keys()]
+            conn.executemany("DELETE FROM messages WHERE folder = ? AND key = ?", removed)
+            changes += len(removed)
+        return changes
+
+    async def sync(self, force: bool = False) -> int:
+        """Rescan the folders whose directories changed since the last sync"""
+        mtimes = self._mtimes()
+        if not force and mtimes == self._seen_mtimes:
+            return 0
+        names = {key.split("/", 1)[0] for key, mtime in mtimes.items()
+                 if key and (force or self._seen_mtimes.get(key) != mtime)}
+        start = time.perf_counter()
+        changes = await self.pool.write(lambda conn: self._sync(conn, names))
+        self._seen_mtimes = mtimes
+        self.syncs += 1
+        if changes:
+            logger.info(f"Mail index synced: {changes} changes in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return changes
+
+    async def list(self, page_size: int = 20, cursor: Optional[str] = None, folder: str = INBOX) -> dict:
+        """Header-only summaries, newest first by message date, one keyset page at a time"""
+        await self.sync()
+        before = _decode_position(cursor) if cursor else None
+
+        def query(conn):
+            sql = f"SELECT {HEADER_COLUMNS} FROM messages WHERE folder = ?"
+            args: list = [folder]
+            if before is not None:
+                # Messages sharing a date are ordered by id
+                sql += " AND (date, id) < (?, ?)"
+                args.extend(before)
+            rows = conn.execute(sql + " ORDER BY date DESC, id DESC LIMIT ?", (*args, page_size + 1)).fetchall()
+            items = [_summary(row) for row in rows[:page_size]]
+            last = items[-1] if len(rows) > page_size else None
+            page = {"emails": items, "next_cursor": _encode_position(last["date"], last["id"]) if last else None}
+            if before is None:
+                # Counted once, on the first page
+                page["total"] = conn.execute("SELECT COUNT(*) FROM messages WHERE folder = ?", (folder,)).fetchone()[0]
+            return page
+        return await self.pool.read(query)
+
+    async def read(self, email_id: int) -> Optional[dict]:
+        """Headers and text body of one message, parsed from its file"""
+        row = await self.pool.read(
+            lambda conn: conn.execute(f"SELECT {HEADER_COLUMNS}, path FROM messages WHERE id = ?", (email_id,)).fetchone()
+        )
+        if row is None:
+            return None
+
+        def parse():
+            with open(self.maildir / row["path"], "rb") as message:
+                return BytesParser(policy=policy.default).parse(message)
+
+        try:
+            message = await asyncio.to_thread(parse)
+        except FileNotFoundError:
+            return None
+        part = message.get_body(preferencelist=("plain", "html"))
+        return {**_summary(row), "message_id": message["Message-ID"], "body": part.get_content() if part else ""}
+
+    def folders(self) -> List[str]:
+        return list(self._folders())
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+
+_store: Optional[MailStore] = None
+
+
+def get_mail_store() -> MailStore:
+    """Return the process-wide mail store, opening it on first use"""
+    global _store
+    if _store is None:
+        _store = MailStore(
+            os.getenv("MCP_MAILDIR") or str(DATA_DIR / "maildir"),
+            os.getenv("MCP_MAIL_INDEX_DB") or str(DATA_DIR / "mail_index.db"),
+            pool_size=int(os.getenv("MCP_MAIL_POOL_SIZE", 4)),
+        )
+    return _store
+
+
+async def close_mail_store() -> None:
+    """Close the mail store at server shutdown"""
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
+        logger.info("Mail store closed")
@@ -1,15 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from docs_mcp import mcp as docs_mcp_server
-from email_mcp import mcp as email_mcp_server
+from mcp_common.metrics import CONTENT_TYPE, REGISTRY
+from registry import ServerRegistry
 import contextlib
 import uvicorn
 
+# Sub-servers are listed in servers.json and started on their first request
+registry = ServerRegistry.from_config()
+REGISTRY.add_collector(registry.metrics_lines)
+
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
-  async with contextlib.AsyncExitStack() as stack:
-    await stack.enter_async_context(docs_mcp_server.session_manager.run())
-    await stack.enter_async_context(email_mcp_server.session_manager.run())
+  async with registry.run():
     yield
 
 app = FastAPI(lifespan=lifespan)
@@ -23,9 +25,18 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
-app.mount("/docs", docs_mcp_server.streamable_http_app())
-app.mount("/email", email_mcp_server.streamable_http_app())
+@app.get("/metrics")
+async def metrics():
+  """Prometheus scrape endpoint for the tool metrics of every mounted server"""
+  return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/servers")
+async def servers():
+  """State and startup cost (import time, start time, memory) of each sub-server"""
+  return registry.snapshot()
+
+registry.mount_all(app)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="localhost", port=10000, log_level="debug")
\ No newline at end of file
+    uvicorn.run(app, host="localhost", port=10000, log_level="debug")
@@ -0,0 +1,372 @@
+"""
+Durable outbox for outgoing email, drained in batches over pooled SMTP.
+
+write_email only inserts the message into an SQLite outbox (synchronous=FULL,
+so it survives a crash once the call returns) and wakes the drainer.
+Concurrent writes are group committed: messages that arrive while a commit
+is in progress share the next transaction and fsync.
+
+The drainer claims due messages in batches and splits each batch across a
+small pool of long-lived SMTP connections, each used from a worker thread.
+Connections are reused across batches instead of reconnecting per message.
+
+Delivery is at least once. A claim carries a lease, so messages claimed by
+a worker that died are picked up again, and several worker processes can
+share one outbox file. Temporary failures (4xx replies, lost connections)
+are retried with exponential backoff. Permanent failures (5xx replies)
+mark the message failed.
+
+Configuration (environment variables):
+- MCP_OUTBOX_DB: SQLite outbox file (default data/outbox.db next to this module)
+- MCP_SMTP_HOST / MCP_SMTP_PORT: relay to deliver to (default localhost:8025,
+  e.g. `python benchmarks/fake_smtp.py` or `python -m aiosmtpd -n`)
+- MCP_SMTP_POOL_SIZE: SMTP connections kept open (default 2)
+- MCP_MAIL_FROM: sender address (default mcp@localhost)
+- MCP_OUTBOX_BATCH_SIZE: messages claimed per batch (default 100)
+- MCP_OUTBOX_MAX_ATTEMPTS: attempts before a message is marked failed (default 5)
+- MCP_OUTBOX_POLL_INTERVAL: seconds between checks for retries due (default 5)
+"""
+
+import os
+import time
+import uuid
+import queue
+import socket
+import asyncio
+import smtplib
+import sqlite3
+import logging
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+from mcp_common.db import ConnectionPool
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).parent / "data" / "outbox.db"
+
+# A claimed message not finished within this many seconds is claimed again
+CLAIM_LEASE = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    message_id TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    claimed_by TEXT,
+    claimed_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt);
+"""
+
+
+class SMTPPool:
+    """Long-lived SMTP connections handed out to worker threads"""
+
+    def __init__(self, host: str, port: int, size: int = 2, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.SimpleQueue[smtplib.SMTP]" = queue.SimpleQueue()
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        conn.ehlo_or_helo_if_needed()
+        self.connects += 1
+        return conn
+
+    def acquire(self) -> smtplib.SMTP:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn: smtplib.SMTP) -> None:
+        self._idle.put(conn)
+
+    @staticmethod
+    def discard(conn: smtplib.SMTP) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def send_batch(self, messages: List[Tuple[int, EmailMessage]]) -> List[Tuple[int, Optional[str], bool]]:
+        """Send on one pooled connection; returns (id, error, permanent) for each message"""
+        results = []
+        conn = None
+        for outbox_id, message in messages:
+            for attempt in range(2):
+                try:
+                    if conn is None:
+                        conn = self.acquire()
+                    conn.send_message(message)
+                    results.append((outbox_id, None, False))
+                    break
+                except smtplib.SMTPServerDisconnected as e:
+                    # The server may have closed an idle connection: reconnect once
+                    self.discard(conn)
+                    conn = None
+                    if attempt:
+                        results.append((outbox_id, f"Disconnected: {e}", False))
+                except smtplib.SMTPRecipientsRefused as e:
+                    code = min(code for code, _ in e.recipients.values())
+                    results.append((outbox_id, f"Recipient refused: {e.recipients}", code >= 500))
+                    break
+                except smtplib.SMTPResponseException as e:
+                    # smtplib has already reset the transaction, so the connection stays usable
+                    results.append((outbox_id, f"{e.smtp_code} {e.smtp_error!r}", e.smtp_code >= 500))
+                    break
+                except (OSError, smtplib.SMTPException) as e:
+                    results.append((outbox_id, f"SMTP error: {e}", False))
+                    self.discard(conn)
+                    conn = None
+                    break
+        if conn is not None:
+            self.release(conn)
+        return results
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.quit()
+            except (OSError, smtplib.SMTPException):
+                self.discard(conn)
+
+
+def _build_message(row) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = row["sender"]
+    message["To"] = row["recipient"]
+    message["Subject"] = row["subject"]
+    message["Date"] = formatdate(row["created_at"], localtime=True)
+    message["Message-ID"] = row["message_id"]
+    message.set_content(row["body"])
+    return message
+
+
+class Outbox:
+    """SQLite-backed outbox and the task that drains it"""
+
+    def __init__(self, path: str, smtp: SMTPPool, sender: str, batch_size: int = 100, max_attempts: int = 5,
+                 poll_interval: float = 5.0, retry_base: float = 2.0):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        setup = sqlite3.connect(path)
+        setup.execute("PRAGMA journal_mode=WAL")
+        setup.executescript(SCHEMA)
+        setup.close()
+        self.pool = ConnectionPool(path, size=1, synchronous="FULL", name="outbox-db")
+        self.smtp = smtp
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._wake = asyncio.Event()
+        # Messages waiting for the next group commit, with the futures that report their ids
+        self._pending: List[Tuple[tuple, asyncio.Future]] = []
+        self._commit_lock = asyncio.Lock()
+        self._commits: Set[asyncio.Task] = set()
+        self.group_commits = 0
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+
+    async def enqueue(self, recipient: str, subject: str, body: str) -> dict:
+        """Persist a message for delivery and return its outbox id and Message-ID"""
+        message_id = make_msgid(domain=self.sender.rpartition("@")[2] or "localhost")
+        now = time.time()
+        committed = asyncio.get_running_loop().create_future()
+        entry = ((message_id, self.sender, recipient, subject, body, now, now), committed)
+        self._pending.append(entry)
+        try:
+            async with self._commit_lock:
+                if not committed.done():
+                    # The commit runs in its own task so that cancelling this caller
+                    # does not abandon the other messages in the batch it took
+                    commit = asyncio.create_task(self._commit_pending())
+                    self._commits.add(commit)
+                    commit.add_done_callback(self._commits.discard)
+                    await asyncio.shield(commit)
+            outbox_id = await committed
+        except asyncio.CancelledError:
+            # Not yet taken by a commit: drop it rather than write a message nobody asked for any more
+            if entry in self._pending:
+                self._pending.remove(entry)
+            raise
+        self._wake.set()
+        return {"id": outbox_id, "message_id": message_id}
+
+    async def _commit_pending(self) -> None:
+        """Insert every message waiting to be enqueued in one transaction and one fsync"""
+        batch, self._pending = self._pending, []
+
+        def insert(conn):
+            return [conn.execute(
+                "INSERT INTO outbox (message_id, sender, recipient, subject, body, next_attempt, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", values,
+            ).lastrowid for values, _ in batch]
+
+        try:
+            ids = await self.pool.write(insert)
+        except Exception as e:
+            for _, committed in batch:
+                committed.set_exception(e)
+            return
+        except BaseException:
+            for _, committed in batch:
+                committed.cancel()
+            raise
+        self.group_commits += 1
+        for outbox_id, (_, committed) in zip(ids, batch):
+            committed.set_result(outbox_id)
+
+    async def _claim(self) -> list:
+        now = time.time()
+        return await self.pool.write(lambda conn: conn.execute(
+            "UPDATE outbox SET status = 'sending', claimed_by = ?, claimed_until = ?, attempts = attempts + 1 "
+            "WHERE id IN (SELECT id FROM outbox WHERE (status = 'queued' AND next_attempt <= ?) "
+            "OR (status = 'sending' AND claimed_until < ?) ORDER BY id LIMIT ?) RETURNING *",
+            (self.worker_id, now + CLAIM_LEASE, now, now, self.batch_size),
+        ).fetchall())
+
+    async def drain_once(self) -> int:
+        """Claim one batch, send it across the SMTP pool and record the outcomes"""
+        rows = await self._claim()
+        if not rows:
+            return 0
+        self.batches += 1
+        attempts = {row["id"]: row["attempts"] for row in rows}
+        messages = [(row["id"], _build_message(row)) for row in rows]
+        # One slice per pooled connection, sent concurrently
+        slices = [messages[i::self.smtp.size] for i in range(min(self.smtp.size, len(messages)))]
+        outcomes = await asyncio.gather(*(asyncio.to_thread(self.smtp.send_batch, part) for part in slices))
+
+        now = time.time()
+        sent, retry, failed = [], [], []
+        for outbox_id, error, permanent in (result for part in outcomes for result in part):
+            if error is None:
+                sent.append((now, outbox_id))
+            elif permanent or attempts[outbox_id] >= self.max_attempts:
+                failed.append((error, outbox_id))
+                logger.warning(f"Email {outbox_id} failed permanently: {error}")
+            else:
+                retry.append((now + self.retry_base ** attempts[outbox_id], error, outbox_id))
+
+        def record(conn):
+            conn.executemany("UPDATE outbox SET status = 'sent', sent_at = ?, claimed_by = NULL WHERE id = ?", sent)
+            conn.executemany("UPDATE outbox SET status = 'failed', last_error = ?, claimed_by = NULL WHERE id = ?", failed)
+            conn.executemany(
+                "UPDATE outbox SET status = 'queued', next_attempt = ?, last_error = ?, claimed_by = NULL WHERE id = ?",
+                retry,
+            )
+
+        await self.pool.write(record)
+        self.sent += len(sent)
+        self.failed += len(failed)
+        self.retried += len(retry)
+        logger.info(f"Outbox batch: {len(sent)} sent, {len(retry)} to retry, {len(failed)} failed")
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                while await self.drain_once():
+                    pass
+            except Exception as e:
+                logger.error(f"Outbox drain failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Let commits whose callers were cancelled finish before the pool closes
+        await asyncio.gather(*self._commits, return_exceptions=True)
+        await asyncio.to_thread(self.smtp.close)
+        await self.pool.close()
+
+    async def status(self, outbox_id: Optional[int] = None) -> dict:
+        """Delivery state of one message, or message counts by state"""
+        if outbox_id is not None:
+            row = await self.pool.read(lambda conn: conn.execute(
+                "SELECT id, message_id, recipient, subject, status, attempts, last_error, created_at, sent_at "
+                "FROM outbox WHERE id = ?", (outbox_id,)).fetchone())
+            return dict(row) if row is not None else None
+        counts = await self.pool.read(
+            lambda conn: conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        )
+        return {
+            "counts": {status: count for status, count in counts},
+            "sent_this_process": self.sent,
+            "failed_this_process": self.failed,
+            "retried_this_process": self.retried,
+            "batches": self.batches,
+            "group_commits": self.group_commits,
+            "smtp_connects": self.smtp.connects,
+        }
+
+
+_outbox: Optional[Outbox] = None
+
+
+def get_outbox() -> Outbox:
+    """Return the process-wide outbox, opening it on first use"""
+    global _outbox
+    if _outbox is None:
+        smtp = SMTPPool(
+            os.getenv("MCP_SMTP_HOST", "localhost"),
+            int(os.getenv("MCP_SMTP_PORT", 8025)),
+            size=int(os.getenv("MCP_SMTP_POOL_SIZE", 2)),
+        )
+        _outbox = Outbox(
+            os.getenv("MCP_OUTBOX_DB") or str(DEFAULT_DB_PATH),
+            smtp,
+            sender=os.getenv("MCP_MAIL_FROM", "mcp@localhost"),
+            batch_size=int(os.getenv("MCP_OUTBOX_BATCH_SIZE", 100)),
+            max_attempts=int(os.getenv("MCP_OUTBOX_MAX_ATTEMPTS", 5)),
+            poll_interval=float(os.getenv("MCP_OUTBOX_POLL_INTERVAL", 5)),
+        )
+    return _outbox
+
+
+async def close_outbox() -> None:
+    """Stop the drainer and close SMTP and database connections"""
+    global _outbox
+    if _outbox is not None:
+        await _outbox.stop()
+        _outbox = None
+        logger.info("Outbox closed")
@@ -0,0 +1,290 @@
+"""
+Registry-driven, lazily started MCP sub-servers.
+
+Sub-servers are listed in a JSON config file (servers.json by default,
+MCP_SERVERS_CONFIG to override). The host mounts a lightweight ASGI stub at
+each mount path. On the first request, the stub imports the server module,
+starts a new streamable-http session manager for it and any process-wide
+lifespan the module declares. Only the MCP endpoint is routed; the host
+serves /metrics for every server. A server that has received no
+requests for its idle timeout is shut down again, and the next request
+starts it fresh.
+
+Import time, start time and the resident memory each start added are
+recorded per server. They are exposed at /servers and as gauges at /metrics.
+
+Config entries:
+- name: identifier used in reports
+- mount: URL prefix, e.g. "/gnews"
+- module: module to import, e.g. "docs_mcp" or "gnews_server.server". Servers
+  from other projects are imported as installed packages (see pyproject.toml),
+  so their modules keep their own namespace instead of shadowing the host's
+- attribute: FastMCP instance in the module (default "mcp")
+- lifespan: async context manager factory to run alongside the server,
+  e.g. "server_lifespan" (optional)
+- env: environment defaults applied before the first import (optional)
+- idle_timeout: seconds without requests before shutdown, 0 to keep running
+  (default MCP_IDLE_TIMEOUT or 900)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import importlib
+import contextlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from pydantic import BaseModel, Field
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = Path(__file__).parent / "servers.json"
+
+
+class ServerSpec(BaseModel):
+    """One sub-server entry in the registry config"""
+    name: str
+    mount: str
+    module: str
+    attribute: str = "mcp"
+    lifespan: Optional[str] = None
+    env: Dict[str, str] = Field(default_factory=dict)
+    idle_timeout: Optional[float] = None
+
+
+def _rss_mb() -> Optional[float]:
+    """Resident memory of this process, from /proc (Linux only)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class _SessionEndpoint:
+    """ASGI endpoint handing requests to one session manager"""
+
+    def __init__(self, session_manager: StreamableHTTPSessionManager):
+        self.session_manager = session_manager
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.session_manager.handle_request(scope, receive, send)
+
+
+class LazyServer:
+    """ASGI app that imports and starts its MCP server on the first request"""
+
+    def __init__(self, spec: ServerSpec, default_idle_timeout: float):
+        self.spec = spec
+        self.idle_timeout = spec.idle_timeout if spec.idle_timeout is not None else default_idle_timeout
+        self.module = None
+        self.app = None
+        self.session_manager: Optional[StreamableHTTPSessionManager] = None
+        self._lock = asyncio.Lock()
+        self._supervisor: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self.active_requests = 0
+        self.last_used = 0.0
+        self.starts = 0
+        self.stops = 0
+        self.import_seconds: Optional[float] = None
+        self.start_seconds: Optional[float] = None
+        self.memory_mb: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.app is not None
+
+    def _import(self):
+        """Import the server module after applying its environment defaults"""
+        for key, value in self.spec.env.items():
+            os.environ.setdefault(key, value)
+        return importlib.import_module(self.spec.module)
+
+    async def _supervise(self, started: asyncio.Future) -> None:
+        """Own the server's contexts so they are entered and exited in one task"""
+        try:
+            server = getattr(self.module, self.spec.attribute)
+            # A session manager can only run once, so each start gets its own
+            # rather than the one FastMCP keeps for streamable_http_app()
+            self.session_manager = StreamableHTTPSessionManager(
+                app=server._mcp_server,
+                event_store=server._event_store,
+                json_response=server.settings.json_response,
+                stateless=server.settings.stateless_http,
+                security_settings=server.settings.transport_security,
+            )
+            endpoint = _SessionEndpoint(self.session_manager)
+            app = Starlette(routes=[Route(server.settings.streamable_http_path, endpoint=endpoint)])
+            async with contextlib.AsyncExitStack() as stack:
+                if self.spec.lifespan:
+                    await stack.enter_async_context(getattr(self.module, self.spec.lifespan)())
+                await stack.enter_async_context(self.session_manager.run())
+                started.set_result(app)
+                await self._stop.wait()
+        except BaseException as e:
+            if not started.done():
+                started.set_exception(e)
+                return
+            raise
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self.running:
+                return
+            memory_before = _rss_mb()
+            if self.module is None:
+                begin = time.perf_counter()
+                self.module = await asyncio.to_thread(self._import)
+                self.import_seconds = time.perf_counter() - begin
+
+            begin = time.perf_counter()
+            self._stop = asyncio.Event()
+            started = asyncio.get_running_loop().create_future()
+            self._supervisor = asyncio.create_task(self._supervise(started))
+            self.app = await started
+            self.start_seconds = time.perf_counter() - begin
+            memory_after = _rss_mb()
+            if memory_before is not None and memory_after is not None:
+                self.memory_mb = memory_after - memory_before
+            self.starts += 1
+            self.last_error = None
+            logger.info(
+                f"Started MCP server '{self.spec.name}' at {self.spec.mount}: import {self.import_seconds * 1000:.1f}ms, "
+                f"start {self.start_seconds * 1000:.1f}ms, +{self.memory_mb or 0:.1f}MB RSS"
+            )
+
+    async def stop(self) -> None:
+        async with self._lock:
+            if not self.running:
+                return
+            self.app = None
+            self._stop.set()
+            try:
+                await self._supervisor
+            except Exception as e:
+                logger.warning(f"MCP server '{self.spec.name}' did not shut down cleanly: {e}")
+            self._supervisor = None
+            self.session_manager = None
+            self.stops += 1
+            logger.info(f"Stopped MCP server '{self.spec.name}'")
+
+    def idle_for(self) -> float:
+        if not self.running or self.active_requests:
+            return 0.0
+        return time.monotonic() - self.last_used
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return
+        self.active_requests += 1
+        self.last_used = time.monotonic()
+        try:
+            if not self.running:
+                try:
+                    await self.start()
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.error(f"Failed to start MCP server '{self.spec.name}': {e}")
+                    response = JSONResponse({"error": f"MCP server '{self.spec.name}' failed to start: {e}"}, status_code=503)
+                    await response(scope, receive, send)
+                    return
+            await self.app(scope, receive, send)
+        finally:
+            self.active_requests -= 1
+            self.last_used = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {
+            "mount": self.spec.mount,
+            "running": self.running,
+            "active_requests": self.active_requests,
+            "idle_seconds": round(self.idle_for(), 1),
+            "idle_timeout": self.idle_timeout,
+            "starts": self.starts,
+            "stops": self.stops,
+            "import_ms": round(self.import_seconds * 1000, 1) if self.import_seconds is not None else None,
+            "start_ms": round(self.start_seconds * 1000, 1) if self.start_seconds is not None else None,
+            "memory_mb": round(self.memory_mb, 1) if self.memory_mb is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class ServerRegistry:
+    """All configured sub-servers plus the idle reaper"""
+
+    def __init__(self, specs: List[ServerSpec], default_idle_timeout: float = 900.0, reap_interval: float = 30.0):
+        self.servers = {spec.name: LazyServer(spec, default_idle_timeout) for spec in specs}
+        self.reap_interval = reap_interval
+        self._reaper: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, path: Optional[str] = None) -> "ServerRegistry":
+        config = Path(path or os.getenv("MCP_SERVERS_CONFIG") or DEFAULT_CONFIG)
+        specs = [ServerSpec(**entry) for entry in json.loads(config.read_text())]
+        return cls(
+            specs,
+            default_idle_timeout=float(os.getenv("MCP_IDLE_TIMEOUT", 900)),
+            reap_interval=float(os.getenv("MCP_IDLE_CHECK_INTERVAL", 30)),
+        )
+
+    def mount_all(self, app) -> None:
+        for server in self.servers.values():
+            app.mount(server.spec.mount, server)
+
+    async def reap_idle(self) -> None:
+        for server in self.servers.values():
+            if server.idle_timeout and server.idle_for() > server.idle_timeout:
+                await server.stop()
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            await self.reap_idle()
+
+    @contextlib.asynccontextmanager
+    async def run(self):
+        """Run the idle reaper, and stop every started server on exit"""
+        self._reaper = asyncio.create_task(self._reap_forever())
+        try:
+            yield self
+        finally:
+            self._reaper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reaper
+            for server in self.servers.values():
+                await server.stop()
+
+    def snapshot(self) -> dict:
+        return {name: server.snapshot() for name, server in self.servers.items()}
+
+    def metrics_lines(self) -> List[str]:
+        """Per-server startup cost and state as Prometheus gauges"""
+        lines = []
+        gauges = [
+            ("mcp_server_running", "Whether the sub-server is started", lambda s: int(s.running)),
+            ("mcp_server_starts", "Times the sub-server was started", lambda s: s.starts),
+            ("mcp_server_import_seconds", "Time to import the sub-server module", lambda s: s.import_seconds),
+            ("mcp_server_start_seconds", "Time to start the sub-server on its last start", lambda s: s.start_seconds),
+            ("mcp_server_startup_memory_bytes", "Resident memory added by the sub-server's last start",
+             lambda s: s.memory_mb * 1024 * 1024 if s.memory_mb is not None else None),
+        ]
+        for name, documentation, value_of in gauges:
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+            for server_name, server in self.servers.items():
+                value = value_of(server)
+                if value is not None:
+                    lines.append(f'{name}{{server="{server_name}"}} {value}')
+        return lines
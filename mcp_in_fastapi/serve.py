@@ -0,0 +1,63 @@
+"""
+Run the FastAPI composite app with several uvicorn workers.
+
+Each worker is a separate process with its own copy of the mounted MCP
+servers. Stateless mode (MCP_STATELESS=1) is turned on automatically when
+more than one worker is requested: a streamable-http session lives in one
+worker's memory, and requests are spread across workers. The worker count is
+passed on as MCP_WORKERS, so servers with upstream limits (gnews) give each
+worker its share of them.
+
+Usage:
+    python serve.py --workers 4 --port 10000
+    python serve.py --workers 1 --stateful --event-db data/events.db
+"""
+
+import os
+import argparse
+import logging
+
+import uvicorn
+
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the MCP FastAPI app with N uvicorn workers")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", 10000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MCP_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--stateful", action="store_true",
+                        help="Keep in-memory sessions (needs sticky routing when workers > 1)")
+    parser.add_argument("--event-db", help="SQLite file for resumable stream events in stateful mode")
+    parser.add_argument("--log-level", default="warning")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ["MCP_WORKERS"] = str(args.workers)
+    if args.stateful:
+        os.environ["MCP_STATELESS"] = "0"
+        if args.event_db:
+            os.environ["MCP_EVENT_DB"] = args.event_db
+        if args.workers > 1:
+            logger.warning("Stateful sessions with several workers require sticky routing by mcp-session-id")
+    elif args.workers > 1:
+        os.environ.setdefault("MCP_STATELESS", "1")
+
+    # Workers are spawned processes and import the app themselves
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Test script for the MCP servers mounted in the FastAPI app
+Run this to verify them without a network (SMTP goes to a local stand-in)
+"""
+
+import sys
+import time
+import asyncio
+import tempfile
+from email.message import EmailMessage
+from email.utils import formatdate
+from pathlib import Path
+
+# Add the current directory and the benchmarks (for the SMTP stand-in) to the path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+
+def make_message(recipient: str, subject: str = "Hello", sender: str = "mcp@localhost",
+                 date: float = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = recipient
+    message["Subject"] = subject
+    message["Date"] = formatdate(date if date is not None else time.time())
+    message.set_content(f"Body of {subject}")
+    return message
+
+
+async def test_outbox_group_commit():
+    """Test that concurrent enqueues share transactions"""
+    from outbox import Outbox, SMTPPool
+
+    print("\n📤 Testing outbox group commit...")
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = Outbox(str(Path(tmp) / "outbox.db"), SMTPPool("127.0.0.1", 1), sender="mcp@localhost")
+        try:
+            queued = await asyncio.gather(*(
+                outbox.enqueue(f"user{i}@example.com", f"Message {i}", "Body") for i in range(20)
+            ))
+            ids = [item["id"] for item in queued]
+            status = await outbox.status()
+            if sorted(ids) != list(range(1, 21)) or status["counts"] != {"queued": 20}:
+                print(f"❌ Enqueued ids {ids}, counts {status['counts']}")
+                return False
+            if outbox.group_commits >= 20:
+                print(f"❌ {outbox.group_commits} commits for 20 concurrent messages")
+                return False
+            print(f"✅ 20 concurrent messages persisted in {outbox.group_commits} transactions")
+        finally:
+            await outbox.stop()
+
+    return True
+
+
+async def test_outbox_cancelled_enqueue():
+    """Test that cancelling the caller running a group commit does not strand the rest of its batch"""
+    from outbox import Outbox, SMTPPool
+
+    print("\n🛑 Testing cancelled enqueues...")
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = Outbox(str(Path(tmp) / "outbox.db"), SMTPPool("127.0.0.1", 1), sender="mcp@localhost")
+        write = outbox.pool.write
+
+        async def slow_write(fn):
+            await asyncio.sleep(0.2)
+            return await write(fn)
+
+        outbox.pool.write = slow_write
+        try:
+            # Queue three callers behind the lock so the first commits for all of them
+            async with outbox._commit_lock:
+                callers = [asyncio.ensure_future(outbox.enqueue(f"user{i}@example.com", f"Message {i}", "Body"))
+                           for i in range(3)]
+                await asyncio.sleep(0)
+            await asyncio.sleep(0.05)
+            callers[0].cancel()
+            done, pending = await asyncio.wait(callers[1:], timeout=2)
+            if pending:
+                print("❌ Waiters hung after the caller committing their batch was cancelled")
+                return False
+            status = await outbox.status()
+            if status["counts"] != {"queued": 3} or len({task.result()["id"] for task in done}) != 2:
+                print(f"❌ Batch of a cancelled committer not written: {status['counts']}")
+                return False
+            print("✅ The batch is committed and acknowledged after its committer is cancelled")
+
+            async with outbox._commit_lock:
+                caller = asyncio.ensure_future(outbox.enqueue("gone@example.com", "Gone", "Body"))
+                await asyncio.sleep(0)
+                caller.cancel()
+                await asyncio.sleep(0)
+            await outbox.enqueue("kept@example.com", "Kept", "Body")
+            if (await outbox.status())["counts"] != {"queued": 4}:
+                print("❌ A message cancelled before its commit was still written")
+                return False
+            print("✅ A message cancelled before its commit is dropped from the batch")
+        finally:
+            await outbox.stop()
+
+    return True
+
+
+async def test_outbox_lease_reclaim():
+    """Test that messages claimed by a worker that died are delivered by another"""
+    import outbox as outbox_module
+    from fake_smtp import FakeSMTPServer
+    from outbox import Outbox, SMTPPool
+
+    print("\n🔁 Testing outbox lease reclaim...")
+    with tempfile.TemporaryDirectory() as tmp, FakeSMTPServer() as smtp:
+        path = str(Path(tmp) / "outbox.db")
+        crashed = Outbox(path, SMTPPool("127.0.0.1", smtp.port), sender="mcp@localhost")
+        survivor = Outbox(path, SMTPPool("127.0.0.1", smtp.port), sender="mcp@localhost")
+        lease = outbox_module.CLAIM_LEASE
+        try:
+            for i in range(3):
+                await crashed.enqueue(f"user{i}@example.com", f"Message {i}", "Body")
+            # Claimed, then the worker dies before recording an outcome
+            outbox_module.CLAIM_LEASE = 0.2
+            if len(await crashed._claim()) != 3:
+                print("❌ Queued messages were not claimed")
+                return False
+            if await survivor.drain_once() != 0:
+                print("❌ Messages under an active lease were claimed by another worker")
+                return False
+            print("✅ Messages under an active lease are left to their worker")
+
+            await asyncio.sleep(0.3)
+            if await survivor.drain_once() != 3:
+                print("❌ Messages with an expired lease were not claimed again")
+                return False
+            status = await survivor.status(1)
+            if status["status"] != "sent" or status["attempts"] != 2 or smtp.stats["messages"] != 3:
+                print(f"❌ Reclaimed message not delivered: {status}, {dict(smtp.stats)}")
+                return False
+            print("✅ Messages with an expired lease are claimed again and delivered")
+        finally:
+            outbox_module.CLAIM_LEASE = lease
+            await crashed.stop()
+            await survivor.stop()
+
+    return True
+
+
+async def test_smtp_failures():
+    """Test that 4xx replies are retried and 5xx replies fail permanently"""
+    from fake_smtp import FakeSMTPServer
+    from outbox import Outbox, SMTPPool
+
+    print("\n📮 Testing SMTP failure handling...")
+    with FakeSMTPServer(defer_rate=1.0) as smtp:
+        pool = SMTPPool("127.0.0.1", smtp.port, size=1)
+        results = await asyncio.to_thread(pool.send_batch, [
+            (1, make_message("deferred@example.com")),
+            (2, make_message("reject@example.com")),
+            (3, make_message("deferred-too@example.com")),
+        ])
+        await asyncio.to_thread(pool.close)
+    outcomes = {outbox_id: (error is not None, permanent) for outbox_id, error, permanent in results}
+    if outcomes != {1: (True, False), 2: (True, True), 3: (True, False)}:
+        print(f"❌ Unexpected send_batch results: {results}")
+        return False
+    if pool.connects != 1:
+        print(f"❌ Failed messages cost {pool.connects} connections")
+        return False
+    print("✅ 451 reported as temporary, 550 as permanent, on one reused connection")
+
+    with tempfile.TemporaryDirectory() as tmp, FakeSMTPServer(defer_rate=1.0) as smtp:
+        outbox = Outbox(str(Path(tmp) / "outbox.db"), SMTPPool("127.0.0.1", smtp.port, size=1),
+                        sender="mcp@localhost", max_attempts=2, retry_base=0.1)
+        try:
+            deferred = await outbox.enqueue("deferred@example.com", "Later", "Body")
+            refused = await outbox.enqueue("reject@example.com", "Never", "Body")
+            await outbox.drain_once()
+            if (await outbox.status(deferred["id"]))["status"] != "queued":
+                print("❌ A 4xx reply was not queued for a retry")
+                return False
+            if (await outbox.status(refused["id"]))["status"] != "failed":
+                print("❌ A 5xx reply was not marked failed")
+                return False
+            print("✅ The outbox retries 4xx replies and fails 5xx replies")
+
+            await asyncio.sleep(0.15)
+            await outbox.drain_once()
+            status = await outbox.status(deferred["id"])
+            if status["status"] != "failed" or status["attempts"] != 2:
+                print(f"❌ Retries did not stop at max_attempts: {status}")
+                return False
+            print("✅ A message still deferred after max_attempts is marked failed")
+        finally:
+            await outbox.stop()
+
+    return True
+
+
+async def test_mailbox_paging():
+    """Test keyset paging, incremental sync and folders of the Maildir index"""
+    from mail_store import MailStore
+
+    print("\n📬 Testing Maildir index paging...")
+    with tempfile.TemporaryDirectory() as tmp:
+        maildir = Path(tmp) / "maildir"
+        for sub in ("new", "cur", "tmp"):
+            (maildir / sub).mkdir(parents=True)
+        start = time.time() - 3600
+        for n in range(25):
+            message = make_message("me@example.com", f"Message {n}", sender=f"sender{n}@example.com",
+                                   date=start + n * 60)
+            (maildir / "new" / f"{1700000000 + n}.M{n}P1.test").write_bytes(bytes(message))
+
+        store = MailStore(str(maildir), str(Path(tmp) / "index.db"), pool_size=2)
+        try:
+            subjects, cursor, pages = [], None, []
+            while True:
+                page = await store.list(page_size=10, cursor=cursor)
+                pages.append(page)
+                subjects.extend(email["subject"] for email in page["emails"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+            if subjects != [f"Message {n}" for n in reversed(range(25))] or len(pages) != 3:
+                print(f"❌ Pages returned {subjects}")
+                return False
+            if pages[0].get("total") != 25 or "total" in pages[1]:
+                print("❌ The total is not counted on the first page only")
+                return False
+            print(f"✅ 25 messages in {len(pages)} pages, newest first, total on the first page")
+
+            syncs = store.syncs
+            await store.list(page_size=10)
+            if store.syncs != syncs:
+                print("❌ An unchanged Maildir was rescanned")
+                return False
+            message = make_message("me@example.com", "Latest", date=time.time())
+            (maildir / "new" / "1800000000.M99P1.test").write_bytes(bytes(message))
+            (maildir / "new" / f"{1700000000}.M0P1.test").rename(maildir / "cur" / f"{1700000000}.M0P1.test:2,S")
+            # Delivered last but dated before every other message
+            message = make_message("me@example.com", "Backfilled", date=start - 60)
+            (maildir / "new" / "1800000001.M100P1.test").write_bytes(bytes(message))
+            page = await store.list(page_size=2)
+            if page["emails"][0]["subject"] != "Latest" or page["total"] != 27:
+                print(f"❌ New message not indexed: {page}")
+                return False
+            email = await store.read(page["emails"][0]["id"])
+            oldest = (await store.list(page_size=100))["emails"][-1]
+            if email["body"].strip() != "Body of Latest" or (await store.read(oldest["id"])) is None:
+                print("❌ Messages could not be read after a sync")
+                return False
+            subjects, cursor = [], None
+            while True:
+                page = await store.list(page_size=4, cursor=cursor)
+                subjects.extend(email["subject"] for email in page["emails"])
+                if (cursor := page["next_cursor"]) is None:
+                    break
+            if subjects != ["Latest", *(f"Message {n}" for n in reversed(range(25))), "Backfilled"]:
+                print(f"❌ Listing is not ordered by message date: {subjects}")
+                return False
+            print("✅ Only a changed Maildir is rescanned; new and moved messages are listed by date")
+
+            for sub in ("new", "cur", "tmp"):
+                (maildir / ".Sent" / sub).mkdir(parents=True)
+            (maildir / ".Sent" / "cur" / "1800000001.M1P1.test:2,S").write_bytes(bytes(make_message("you@example.com", "Sent one")))
+            sent = await store.list(folder="Sent")
+            if [email["subject"] for email in sent["emails"]] != ["Sent one"] or "Sent" not in store.folders():
+                print(f"❌ Sent folder listed as {sent}")
+                return False
+            try:
+                await store.list(cursor="bogus")
+            except ValueError:
+                pass
+            else:
+                print("❌ An invalid cursor was accepted")
+                return False
+            print("✅ Subfolders listed separately; invalid cursors rejected")
+        finally:
+            await store.close()
+
+    return True
+
+
+PROBE_SERVER = """
+import contextlib
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("probe", json_response=True)
+lifespans = 0
+
+
+@mcp.tool()
+def echo(text: str) -> str:
+    return text
+
+
+@contextlib.asynccontextmanager
+async def probe_lifespan():
+    global lifespans
+    lifespans += 1
+    yield
+"""
+
+
+async def test_registry_restart():
+    """Test that a sub-server stopped for being idle serves requests again after a restart"""
+    import httpx
+    from registry import ServerRegistry, ServerSpec
+
+    print("\n♻️ Testing sub-server restart...")
+    headers = {"Accept": "application/json, text/event-stream"}
+    initialize = {
+        "jsonrpc": "2.0", "id": 1, "method": "initialize",
+        "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "test", "version": "1"}},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "restart_probe.py").write_text(PROBE_SERVER)
+        sys.path.insert(0, tmp)
+        registry = ServerRegistry([ServerSpec(name="probe", mount="/probe", module="restart_probe",
+                                              lifespan="probe_lifespan", idle_timeout=0.1)])
+        server = registry.servers["probe"]
+        transport = httpx.ASGITransport(app=server)
+        try:
+            async with registry.run(), httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                managers = []
+                for start in range(2):
+                    response = await client.post("/mcp", json=initialize, headers=headers)
+                    session = response.headers.get("mcp-session-id")
+                    if response.status_code != 200 or not session:
+                        print(f"❌ Initialize after start {start + 1} returned {response.status_code}: {response.text}")
+                        return False
+                    await client.post("/mcp", json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+                                      headers={**headers, "mcp-session-id": session})
+                    response = await client.post("/mcp", headers={**headers, "mcp-session-id": session}, json={
+                        "jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                        "params": {"name": "echo", "arguments": {"text": f"start {start + 1}"}},
+                    })
+                    if response.json()["result"]["content"][0]["text"] != f"start {start + 1}":
+                        print(f"❌ Tool call after start {start + 1} returned {response.text}")
+                        return False
+                    managers.append(server.session_manager)
+
+                    await asyncio.sleep(0.2)
+                    await registry.reap_idle()
+                    if server.running or server.session_manager is not None:
+                        print("❌ Idle server was not stopped")
+                        return False
+
+                module = sys.modules["restart_probe"]
+                if server.starts != 2 or server.stops != 2 or module.lifespans != 2 or managers[0] is managers[1]:
+                    print(f"❌ Restart state: {server.snapshot()}, {module.lifespans} lifespans")
+                    return False
+                if module.mcp._session_manager is not None:
+                    print("❌ The registry set up the FastMCP instance's own session manager")
+                    return False
+                print(f"✅ Served, stopped when idle and served again with a new session manager: {server.snapshot()}")
+        finally:
+            sys.path.remove(tmp)
+            sys.modules.pop("restart_probe", None)
+
+    return True
+
+
+# Tests that run against local components only (no network)
+OFFLINE_TESTS = [
+    test_outbox_group_commit,
+    test_outbox_cancelled_enqueue,
+    test_outbox_lease_reclaim,
+    test_smtp_failures,
+    test_mailbox_paging,
+    test_registry_restart,
+]
+
+
+if __name__ == "__main__":
+    print("🚀 MCP FastAPI Servers Test Suite")
+    print("=" * 50)
+
+    try:
+        for offline_test in OFFLINE_TESTS:
+            if not asyncio.run(offline_test()):
+                print(f"\n❌ {offline_test.__name__} failed")
+                sys.exit(1)
+        print("\n🎉 All tests completed successfully!")
+        sys.exit(0)
+    except KeyboardInterrupt:
+        print("\n🛑 Tests interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n💥 Test suite error: {e}")
+        sys.exit(1)